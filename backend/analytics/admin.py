@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import ResponseTimeRollup
+
+
+@admin.register(ResponseTimeRollup)
+class ResponseTimeRollupAdmin(admin.ModelAdmin):
+    list_display = ("hour", "metric", "city", "emergency_type", "count")
+    list_filter = ("metric", "emergency_type")
+    search_fields = ("city",)
+    date_hierarchy = "hour"
+    exclude = ("sketch",)
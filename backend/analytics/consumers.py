@@ -0,0 +1,20 @@
+# backend/analytics/consumers.py
+from analytics.hotspots import HotspotDetector
+from analytics.models import Hotspot
+from outbox.publish import publish
+from outbox.registry import consumer
+
+
+@consumer("analytics.hotspots", topics=["emergency.created"])
+def detect_hotspots(event):
+    # A duplicate report is the same incident, not a denser area
+    if event.payload.get("parent_id"):
+        return
+    hotspot = HotspotDetector().observe(
+        event.payload["latitude"],
+        event.payload["longitude"],
+        event.created_at,
+    )
+    if hotspot is not None:
+        row = Hotspot.objects.create(**hotspot)
+        publish("hotspot.detected", row, hotspot)
@@ -0,0 +1,63 @@
+# backend/analytics/heatmap.py
+"""
+Emergency density per geohash cell, for the map view.
+
+Emergencies store a precision-9 geohash, so a coarser cell is just a prefix:
+the query groups by SUBSTR(geohash, 1, precision) and returns one row per
+occupied cell. Restricting to a viewport by geohash `prefix` is a LIKE
+'prefix%' that the varchar_pattern_ops index on the column serves.
+"""
+
+from django.db.models import Count
+from django.db.models.functions import Substr
+
+from config.geo import geohash_center
+from emergencies.models import Emergency
+
+MAX_PRECISION = Emergency.GEOHASH_PRECISION
+
+
+def heatmap(
+    precision,
+    since=None,
+    until=None,
+    status=None,
+    emergency_type=None,
+    prefix=None,
+):
+    """[{geohash, count, latitude, longitude}] for occupied cells"""
+    if not 1 <= precision <= MAX_PRECISION:
+        raise ValueError(f"precision must be between 1 and {MAX_PRECISION}")
+    emergencies = Emergency.objects.exclude(geohash="")
+    if prefix:
+        if len(prefix) > precision:
+            raise ValueError("prefix can't be longer than precision")
+        emergencies = emergencies.filter(geohash__startswith=prefix.lower())
+    if since is not None:
+        emergencies = emergencies.filter(created_at__gte=since)
+    if until is not None:
+        emergencies = emergencies.filter(created_at__lt=until)
+    if status:
+        emergencies = emergencies.filter(status=status)
+    if emergency_type:
+        emergencies = emergencies.filter(emergency_type=emergency_type)
+
+    cells = (
+        emergencies.order_by()
+        .annotate(cell=Substr("geohash", 1, precision))
+        .values("cell")
+        .annotate(count=Count("id"))
+        .values_list("cell", "count")
+    )
+    result = []
+    for cell, count in cells:
+        latitude, longitude = geohash_center(cell)
+        result.append(
+            {
+                "geohash": cell,
+                "count": count,
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+        )
+    return result
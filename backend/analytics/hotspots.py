@@ -0,0 +1,174 @@
+# backend/analytics/hotspots.py
+"""
+Streaming hotspot detection over new emergencies.
+
+Each emergency is counted in its geohash cell (HOTSPOTS["PRECISION"]) in
+one-minute buckets covering the sliding window. A cell's density is its own
+count plus its eight neighbours', so a cluster straddling a cell border is
+still seen. When the density reaches the next of HOTSPOTS["THRESHOLDS"], a
+Hotspot row is written and hotspot.detected is published to the outbox.
+
+The counts are HotspotBucket rows, so any number of outbox_relay processes
+can feed the detector. Counting an emergency first locks the HotspotCell
+rows of its cell and the neighbours, in geohash order: reports around the
+same cluster are counted one after another, and a threshold fires once.
+The consumer's savepoint commits the count with the event's progress, so a
+retried event is not counted twice.
+
+Buckets that left the window are deleted as their cells are counted again;
+`manage.py prune_hotspots` clears the rest, and with --rebuild recounts the
+window from the emergencies table when the counts were lost.
+"""
+
+import math
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from analytics.models import HotspotBucket, HotspotCell
+from config.geo import geohash_center, geohash_encode, geohash_neighbors
+
+DEFAULTS = {
+    "PRECISION": 6,
+    "WINDOW_SECONDS": 900,
+    "BUCKET_SECONDS": 60,
+    "THRESHOLDS": [5, 10, 25, 50],
+}
+
+
+def hotspot_setting(name):
+    return getattr(settings, "HOTSPOTS", {}).get(name, DEFAULTS[name])
+
+
+class HotspotDetector:
+    def __init__(
+        self,
+        precision=None,
+        window_seconds=None,
+        bucket_seconds=None,
+        thresholds=None,
+    ):
+        self.precision = precision or hotspot_setting("PRECISION")
+        self.window_seconds = window_seconds or hotspot_setting("WINDOW_SECONDS")
+        self.bucket_seconds = bucket_seconds or hotspot_setting("BUCKET_SECONDS")
+        self.thresholds = sorted(thresholds or hotspot_setting("THRESHOLDS"))
+        self.buckets_per_window = math.ceil(self.window_seconds / self.bucket_seconds)
+
+    def bucket(self, timestamp):
+        return int(timestamp.timestamp() // self.bucket_seconds)
+
+    def oldest_bucket(self, timestamp):
+        return self.bucket(timestamp) - self.buckets_per_window + 1
+
+    def lock_cells(self, keys):
+        """HotspotCell rows of `keys`, created if need be and locked in order"""
+        HotspotCell.objects.bulk_create(
+            [HotspotCell(geohash=key) for key in keys], ignore_conflicts=True
+        )
+        return {
+            cell.geohash: cell
+            for cell in HotspotCell.objects.select_for_update()
+            .filter(geohash__in=keys)
+            .order_by("geohash")
+        }
+
+    def observe(self, latitude, longitude, timestamp):
+        """Count an emergency; returns a hotspot dict when a threshold is crossed"""
+        cell = geohash_encode(latitude, longitude, self.precision)
+        keys = sorted([cell, *geohash_neighbors(cell)])
+        bucket = self.bucket(timestamp)
+
+        with transaction.atomic():
+            cells = self.lock_cells(keys)
+            counted = HotspotBucket.objects.filter(geohash=cell, bucket=bucket).update(
+                count=F("count") + 1
+            )
+            if not counted:
+                HotspotBucket.objects.create(geohash=cell, bucket=bucket, count=1)
+            buckets = HotspotBucket.objects.filter(geohash__in=keys)
+            buckets.filter(bucket__lt=self.oldest_bucket(timestamp)).delete()
+            count = buckets.aggregate(total=Sum("count"))["total"]
+
+            level = bisect_right(self.thresholds, count) - 1
+            if level <= cells[cell].level:
+                if level < cells[cell].level:
+                    # Cooling down below the reported level re-arms it
+                    HotspotCell.objects.filter(pk=cell).update(level=level)
+                return None
+            # The neighbours see the same cluster; don't report it from each
+            HotspotCell.objects.filter(geohash__in=keys, level__lt=level).update(
+                level=level
+            )
+
+        center_lat, center_lng = geohash_center(cell)
+        return {
+            "geohash": cell,
+            "count": count,
+            "threshold": self.thresholds[level],
+            "latitude": center_lat,
+            "longitude": center_lng,
+            "window_seconds": self.window_seconds,
+        }
+
+    def prune(self, now=None):
+        """Delete buckets that left the window, and cells with none around them
+
+        A cell stays while it or a neighbour still has counts, since its
+        level belongs to that cluster. Returns how many cells were dropped;
+        their levels start over.
+        """
+        oldest = self.oldest_bucket(now or timezone.now())
+        with transaction.atomic():
+            HotspotBucket.objects.filter(bucket__lt=oldest).delete()
+            counted = set(
+                HotspotBucket.objects.values_list("geohash", flat=True).distinct()
+            )
+            kept = counted.union(*(geohash_neighbors(cell) for cell in counted))
+            idle = [
+                cell
+                for cell in HotspotCell.objects.select_for_update()
+                .order_by("geohash")
+                .values_list("geohash", flat=True)
+                if cell not in kept
+            ]
+            dropped, _ = HotspotCell.objects.filter(geohash__in=idle).delete()
+        return dropped
+
+    def warm_up(self, now=None):
+        """Recount the window from the emergencies created in it
+
+        For when the counts were lost; reported levels are kept. Run it
+        while no relay is running, since it replaces the counts. Returns
+        how many cells were counted.
+        """
+        from emergencies.models import Emergency
+
+        now = now or timezone.now()
+        since = datetime.fromtimestamp(
+            self.oldest_bucket(now) * self.bucket_seconds, tz=dt_timezone.utc
+        )
+        counts = Counter()
+        recent = (
+            Emergency.objects.filter(created_at__gte=since, parent__isnull=True)
+            .order_by()
+            .values_list("latitude", "longitude", "created_at")
+        )
+        for latitude, longitude, created_at in recent.iterator():
+            cell = geohash_encode(latitude, longitude, self.precision)
+            counts[cell, self.bucket(created_at)] += 1
+        with transaction.atomic():
+            HotspotBucket.objects.all().delete()
+            HotspotBucket.objects.bulk_create(
+                [
+                    HotspotBucket(geohash=cell, bucket=bucket, count=count)
+                    for (cell, bucket), count in counts.items()
+                ],
+                batch_size=1000,
+            )
+        return len({cell for cell, _ in counts})
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from analytics.hotspots import HotspotDetector
+
+
+class Command(BaseCommand):
+    help = "Delete hotspot counts that left the sliding window"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recount the window from emergencies first (stop the relays)",
+        )
+
+    def handle(self, *args, **options):
+        detector = HotspotDetector()
+        if options["rebuild"]:
+            cells = detector.warm_up()
+            self.stdout.write(f"Recounted {cells} hotspot cells")
+        dropped = detector.prune()
+        self.stdout.write(f"Dropped {dropped} idle hotspot cells")
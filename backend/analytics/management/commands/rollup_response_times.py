@@ -0,0 +1,45 @@
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from analytics.rollups import rollup_range
+
+
+class Command(BaseCommand):
+    help = "Rebuild hourly response-time sketches from emergencies"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=24,
+            help="Rebuild this many recent hours (late arrivals land in them)",
+        )
+        parser.add_argument("--since", help="ISO datetime; backfill from here")
+        parser.add_argument("--until", help="ISO datetime; defaults to now")
+
+    def parse(self, value):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"Not an ISO datetime: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
+
+    def handle(self, *args, **options):
+        # The current, still open hour is included
+        until = (
+            self.parse(options["until"])
+            if options["until"]
+            else timezone.now() + timedelta(hours=1)
+        )
+        since = (
+            self.parse(options["since"])
+            if options["since"]
+            else until - timedelta(hours=options["hours"] + 1)
+        )
+        written = rollup_range(since, until)
+        self.stdout.write(f"Wrote {written} rollup cells from {since} to {until}")
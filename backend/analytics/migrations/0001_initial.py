@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="ResponseTimeRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("DISPATCH", "Created to dispatched"),
+                            ("ARRIVAL", "Created to arrived"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("city", models.CharField(blank=True, max_length=100)),
+                ("emergency_type", models.CharField(max_length=50)),
+                ("count", models.IntegerField(default=0)),
+                ("sketch", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "response_time_rollups",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="responsetimerollup",
+            constraint=models.UniqueConstraint(
+                fields=("metric", "hour", "city", "emergency_type"),
+                name="response_time_rollup_cell",
+            ),
+        ),
+    ]
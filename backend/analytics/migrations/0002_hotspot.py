@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Hotspot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("geohash", models.CharField(max_length=12)),
+                ("count", models.IntegerField()),
+                ("threshold", models.IntegerField()),
+                ("window_seconds", models.IntegerField()),
+                ("latitude", models.FloatField()),
+                ("longitude", models.FloatField()),
+                ("detected_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "hotspots",
+                "indexes": [
+                    models.Index(
+                        fields=["detected_at"], name="hotspots_detecte_59cc00_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.27 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0002_hotspot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HotspotBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("geohash", models.CharField(max_length=12)),
+                ("bucket", models.IntegerField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "hotspot_buckets",
+            },
+        ),
+        migrations.CreateModel(
+            name="HotspotCell",
+            fields=[
+                (
+                    "geohash",
+                    models.CharField(max_length=12, primary_key=True, serialize=False),
+                ),
+                ("level", models.SmallIntegerField(default=-1)),
+            ],
+            options={
+                "db_table": "hotspot_cells",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="hotspotbucket",
+            constraint=models.UniqueConstraint(
+                fields=("geohash", "bucket"), name="hotspot_bucket_cell"
+            ),
+        ),
+    ]
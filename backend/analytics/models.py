@@ -0,0 +1,89 @@
+# backend/analytics/models.py
+from django.db import models
+
+
+class ResponseTimeRollup(models.Model):
+    """DDSketch of response times for one (metric, hour, city, type) cell
+
+    `hour` is the UTC hour the emergencies were created in. Rows are rebuilt
+    from emergencies by `manage.py rollup_response_times`.
+    """
+
+    METRICS = [
+        ("DISPATCH", "Created to dispatched"),
+        ("ARRIVAL", "Created to arrived"),
+    ]
+
+    metric = models.CharField(max_length=20, choices=METRICS)
+    hour = models.DateTimeField()
+    city = models.CharField(max_length=100, blank=True)
+    emergency_type = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+    # analytics.sketch.DDSketch.to_dict(), values in seconds
+    sketch = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "response_time_rollups"
+        constraints = [
+            # Also the index for metric + hour range lookups
+            models.UniqueConstraint(
+                fields=["metric", "hour", "city", "emergency_type"],
+                name="response_time_rollup_cell",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.hour:%Y-%m-%d %H}h {self.city or '-'}"
+
+
+class Hotspot(models.Model):
+    """A geohash cell whose emergency density crossed a threshold"""
+
+    geohash = models.CharField(max_length=12)
+    # Emergencies in the cell and its neighbours over the window
+    count = models.IntegerField()
+    threshold = models.IntegerField()
+    window_seconds = models.IntegerField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "hotspots"
+        indexes = [models.Index(fields=["detected_at"])]
+
+    def __str__(self):
+        return f"{self.geohash}: {self.count} emergencies"
+
+
+class HotspotCell(models.Model):
+    """Alert state of a geohash cell the hotspot detector has counted in
+
+    Its row is also the lock that serializes counting around the cell, so
+    relays running side by side see each other's counts.
+    """
+
+    geohash = models.CharField(max_length=12, primary_key=True)
+    # Highest HOTSPOTS["THRESHOLDS"] index reported while the cell stays hot
+    level = models.SmallIntegerField(default=-1)
+
+    class Meta:
+        db_table = "hotspot_cells"
+
+
+class HotspotBucket(models.Model):
+    """Emergencies counted in a cell during one bucket of the sliding window"""
+
+    geohash = models.CharField(max_length=12)
+    # Unix time // HOTSPOTS["BUCKET_SECONDS"]
+    bucket = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "hotspot_buckets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["geohash", "bucket"], name="hotspot_bucket_cell"
+            ),
+        ]
@@ -0,0 +1,115 @@
+# backend/analytics/rollups.py
+"""
+Hourly response-time rollups.
+
+`rollup(start, end)` rebuilds every cell whose hour falls in [start, end)
+from the raw emergencies, so re-running it is safe and picks up dispatches
+and arrivals that landed after the hour closed. `response_time_stats()`
+answers percentile queries by merging the stored sketches.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from analytics.models import ResponseTimeRollup
+from analytics.sketch import DDSketch
+from emergencies.models import Emergency
+
+# ResponseTimeRollup.metric -> Emergency timestamp measured from created_at
+METRIC_FIELDS = {"DISPATCH": "dispatched_at", "ARRIVAL": "arrived_at"}
+
+GROUP_KEYS = {
+    "city": lambda hour, city, emergency_type: city,
+    "emergency_type": lambda hour, city, emergency_type: emergency_type,
+    "hour": lambda hour, city, emergency_type: hour.isoformat(),
+    "hour_of_day": lambda hour, city, emergency_type: f"{hour.hour:02d}",
+}
+
+
+def floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup(start, end, chunk_size=2000):
+    """Rebuild the rollups of the hours in [start, end); returns rows written"""
+    start, end = floor_hour(start), floor_hour(end)
+    sketches = defaultdict(DDSketch)
+    rows = (
+        Emergency.objects.filter(created_at__gte=start, created_at__lt=end)
+        .order_by()
+        .values_list("created_at", "city", "emergency_type", *METRIC_FIELDS.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    for created_at, city, emergency_type, *timestamps in rows:
+        hour = floor_hour(created_at)
+        for metric, timestamp in zip(METRIC_FIELDS, timestamps):
+            if timestamp is not None:
+                sketches[(metric, hour, city, emergency_type)].add(
+                    (timestamp - created_at).total_seconds()
+                )
+
+    with transaction.atomic():
+        ResponseTimeRollup.objects.filter(hour__gte=start, hour__lt=end).delete()
+        ResponseTimeRollup.objects.bulk_create(
+            [
+                ResponseTimeRollup(
+                    metric=metric,
+                    hour=hour,
+                    city=city,
+                    emergency_type=emergency_type,
+                    count=sketch.count,
+                    sketch=sketch.to_dict(),
+                )
+                for (metric, hour, city, emergency_type), sketch in sketches.items()
+            ],
+            batch_size=500,
+        )
+    return len(sketches)
+
+
+def rollup_range(start, end, step=timedelta(days=1)):
+    """rollup() a long range a day at a time to bound memory"""
+    written = 0
+    while start < end:
+        written += rollup(start, min(start + step, end))
+        start += step
+    return written
+
+
+def response_time_stats(
+    metric, since, until, city=None, emergency_type=None, group_by=None
+):
+    """[{group, count, mean, p50, p90, p99}] in seconds over [since, until)"""
+    rollups = ResponseTimeRollup.objects.filter(
+        metric=metric, hour__gte=floor_hour(since), hour__lt=until
+    )
+    if city:
+        rollups = rollups.filter(city=city)
+    if emergency_type:
+        rollups = rollups.filter(emergency_type=emergency_type)
+
+    group_key = GROUP_KEYS[group_by] if group_by else None
+    merged = {}
+    for hour, row_city, row_type, data in rollups.values_list(
+        "hour", "city", "emergency_type", "sketch"
+    ):
+        key = group_key(hour, row_city, row_type) if group_key else None
+        sketch = DDSketch.from_dict(data)
+        if key in merged:
+            merged[key].merge(sketch)
+        else:
+            merged[key] = sketch
+
+    return [
+        {
+            "group": key,
+            "count": sketch.count,
+            "mean": sketch.mean,
+            "p50": sketch.quantile(0.5),
+            "p90": sketch.quantile(0.9),
+            "p99": sketch.quantile(0.99),
+        }
+        for key, sketch in sorted(merged.items(), key=lambda item: item[0] or "")
+    ]
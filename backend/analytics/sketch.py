@@ -0,0 +1,114 @@
+# backend/analytics/sketch.py
+"""
+DDSketch: a mergeable quantile sketch with relative-error guarantees.
+
+Values are counted in logarithmic buckets, bucket k covering
+(gamma^(k-1), gamma^k] with gamma = (1 + alpha) / (1 - alpha), so any
+quantile is within `alpha` relative error of the exact one. Two sketches
+with the same alpha merge by adding bucket counts, which is what lets hourly
+rollups be combined over arbitrary ranges.
+See Masson et al., "DDSketch", VLDB 2019.
+"""
+
+import math
+
+DEFAULT_ALPHA = 0.01
+# Lowest buckets are folded together past this many
+MAX_BUCKETS = 2048
+
+
+class DDSketch:
+    def __init__(self, alpha=DEFAULT_ALPHA):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    def key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value, count=1):
+        """Add a non-negative value; negative durations are clock skew"""
+        value = max(value, 0.0)
+        if value == 0:
+            self.zeros += count
+        else:
+            key = self.key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+            if len(self.buckets) > MAX_BUCKETS:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = keys[: len(keys) - MAX_BUCKETS + 1]
+        folded = sum(self.buckets.pop(key) for key in excess)
+        target = keys[len(excess)]
+        self.buckets[target] += folded
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > MAX_BUCKETS:
+            self._collapse()
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                value = 2 * self.gamma**key / (self.gamma + 1)
+                # Exact extremes are known; don't overshoot them
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self):
+        return {
+            "alpha": self.alpha,
+            # JSON object keys must be strings
+            "buckets": {str(key): count for key, count in self.buckets.items()},
+            "zeros": self.zeros,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["alpha"])
+        sketch.buckets = {int(key): count for key, count in data["buckets"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
@@ -0,0 +1,342 @@
+import importlib
+import json
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.apps import apps
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from analytics.heatmap import heatmap
+from analytics.hotspots import HotspotDetector
+from analytics.models import Hotspot, HotspotBucket, HotspotCell
+from analytics.rollups import response_time_stats, rollup
+from analytics.sketch import DDSketch
+from config.geo import geohash_center, geohash_encode, geohash_neighbors
+from emergencies.models import Emergency
+from outbox.models import OutboxEvent
+from outbox.publish import publish
+from outbox.relay import relay_batch
+from users.testing import make_user
+
+QUANTILES = [0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.99, 1]
+
+
+def exact_quantile(values, q):
+    # The rank DDSketch.quantile() targets
+    return sorted(values)[math.floor(q * (len(values) - 1))]
+
+
+class DDSketchTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        # Response times in seconds: a long right tail, like the real ones
+        self.values = [rng.lognormvariate(5, 1.2) for _ in range(20_000)]
+
+    def sketch(self, values, alpha=0.01):
+        sketch = DDSketch(alpha)
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def assertWithinRelativeError(self, sketch, values, alpha):
+        for q in QUANTILES:
+            exact = exact_quantile(values, q)
+            with self.subTest(q=q):
+                self.assertLessEqual(
+                    abs(sketch.quantile(q) - exact), alpha * exact + 1e-9
+                )
+
+    def test_quantiles_are_within_alpha(self):
+        for alpha in (0.01, 0.05):
+            with self.subTest(alpha=alpha):
+                self.assertWithinRelativeError(
+                    self.sketch(self.values, alpha), self.values, alpha
+                )
+
+    def test_merged_sketches_keep_the_guarantee(self):
+        parts = [self.values[i::24] for i in range(24)]
+        merged = DDSketch()
+        for part in parts:
+            merged.merge(self.sketch(part))
+
+        whole = self.sketch(self.values)
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertEqual(merged.count, len(self.values))
+        self.assertAlmostEqual(merged.mean, sum(self.values) / len(self.values))
+        self.assertWithinRelativeError(merged, self.values, 0.01)
+
+    def test_json_round_trip(self):
+        sketch = self.sketch(self.values)
+        restored = DDSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+        for q in QUANTILES:
+            self.assertEqual(restored.quantile(q), sketch.quantile(q))
+
+    def test_zero_and_negative_durations(self):
+        sketch = self.sketch([-3.0, 0.0, 0.0, 10.0])
+        self.assertEqual(sketch.zeros, 3)
+        self.assertEqual(sketch.quantile(0.5), 0.0)
+        self.assertEqual(sketch.quantile(1), 10.0)
+
+    def test_empty_sketch(self):
+        sketch = DDSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        self.assertIsNone(sketch.mean)
+        self.assertIsNone(DDSketch.from_dict(sketch.to_dict()).quantile(0.5))
+
+    def test_merging_different_accuracies_fails(self):
+        with self.assertRaises(ValueError):
+            DDSketch(0.01).merge(DDSketch(0.05))
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user("citizen")
+        cls.hour = datetime(2026, 3, 2, 8, tzinfo=timezone.utc)
+        for i, (city, minutes) in enumerate(
+            [("Manila", 2), ("Manila", 4), ("Manila", 6), ("Cebu", 10)]
+        ):
+            emergency = Emergency.objects.create(
+                user=user,
+                emergency_type="MEDICAL",
+                latitude=14.6,
+                longitude=121.0,
+                city=city,
+            )
+            created_at = cls.hour + timedelta(minutes=i)
+            # created_at is auto_now_add
+            Emergency.objects.filter(pk=emergency.pk).update(
+                created_at=created_at,
+                dispatched_at=created_at + timedelta(minutes=minutes),
+            )
+
+    def test_stats_merge_hourly_rollups(self):
+        self.assertEqual(rollup(self.hour, self.hour + timedelta(hours=1)), 2)
+        # Re-running rebuilds the same rows
+        self.assertEqual(rollup(self.hour, self.hour + timedelta(hours=1)), 2)
+
+        stats = response_time_stats(
+            "DISPATCH",
+            self.hour - timedelta(days=1),
+            self.hour + timedelta(days=1),
+            group_by="city",
+        )
+
+        self.assertEqual([row["group"] for row in stats], ["Cebu", "Manila"])
+        cebu, manila = stats
+        self.assertEqual(cebu["count"], 1)
+        self.assertEqual(manila["count"], 3)
+        self.assertAlmostEqual(manila["p50"], 240, delta=240 * 0.01)
+        self.assertAlmostEqual(manila["mean"], 240)
+        self.assertEqual(
+            response_time_stats("ARRIVAL", self.hour, self.hour + timedelta(hours=1)),
+            [],
+        )
+
+
+class HotspotTests(TestCase):
+    """Sliding-window density counts kept in the database"""
+
+    MANILA = (14.5995, 120.9842)
+
+    def setUp(self):
+        self.detector = HotspotDetector(
+            precision=6, window_seconds=600, bucket_seconds=60, thresholds=[3, 5]
+        )
+        self.now = datetime(2026, 3, 2, 8, tzinfo=timezone.utc)
+
+    def observe(self, count=1, at=None, point=None):
+        return [
+            self.detector.observe(*(point or self.MANILA), at or self.now)
+            for _ in range(count)
+        ]
+
+    def test_each_threshold_fires_once(self):
+        self.assertEqual(self.observe(2), [None, None])
+        (hotspot,) = self.observe()
+        self.assertEqual(hotspot["threshold"], 3)
+        self.assertEqual(hotspot["count"], 3)
+        self.assertEqual(hotspot["geohash"], geohash_encode(*self.MANILA, 6))
+
+        self.assertEqual(self.observe(), [None])
+        (hotspot,) = self.observe()
+        self.assertEqual(hotspot["threshold"], 5)
+        self.assertEqual(self.observe(5), [None] * 5)
+
+    def test_neighbours_share_the_cluster(self):
+        cell = geohash_encode(*self.MANILA, 6)
+        neighbour = geohash_neighbors(cell)[0]
+        self.observe(2)
+        (hotspot,) = self.observe(point=geohash_center(neighbour))
+        self.assertEqual(hotspot["count"], 3)
+        # Already reported from the neighbouring cell
+        self.assertEqual(self.observe(), [None])
+        self.assertEqual(
+            HotspotCell.objects.get(geohash=cell).level,
+            HotspotCell.objects.get(geohash=neighbour).level,
+        )
+
+    def test_counts_leave_the_window(self):
+        self.observe(2)
+        later = self.now + timedelta(seconds=600)
+        self.assertEqual(self.observe(2, at=later), [None, None])
+        # The first two left the window and their bucket is gone
+        self.assertEqual(HotspotBucket.objects.count(), 1)
+        self.assertIsNotNone(self.observe(at=later)[0])
+
+    def test_cooling_down_re_arms_the_threshold(self):
+        self.observe(3)
+        later = self.now + timedelta(seconds=600)
+        self.assertEqual(self.observe(at=later), [None])
+        self.assertEqual(self.observe(at=later), [None])
+        self.assertEqual(self.observe(at=later)[0]["threshold"], 3)
+
+    def test_prune_drops_idle_cells(self):
+        self.observe(3)
+        self.assertEqual(self.detector.prune(self.now + timedelta(seconds=60)), 0)
+        self.assertEqual(self.detector.prune(self.now + timedelta(seconds=600)), 9)
+        self.assertFalse(HotspotBucket.objects.exists())
+        self.assertFalse(HotspotCell.objects.exists())
+
+    def test_warm_up_recounts_the_window(self):
+        user = make_user("citizen")
+        created = []
+        for minutes in (20, 5, 4, 3):
+            emergency = Emergency.objects.create(
+                user=user, emergency_type="FIRE", latitude=14.5995, longitude=120.9842
+            )
+            created.append(emergency)
+            Emergency.objects.filter(pk=emergency.pk).update(
+                created_at=self.now - timedelta(minutes=minutes)
+            )
+        # A duplicate report doesn't count
+        duplicate = Emergency.objects.create(
+            user=user,
+            emergency_type="FIRE",
+            latitude=14.5995,
+            longitude=120.9842,
+            parent=created[-1],
+        )
+        Emergency.objects.filter(pk=duplicate.pk).update(created_at=self.now)
+        HotspotBucket.objects.create(geohash="stale", bucket=1, count=99)
+
+        self.assertEqual(self.detector.warm_up(self.now), 1)
+
+        self.assertEqual(
+            sorted(HotspotBucket.objects.values_list("count", flat=True)), [1, 1, 1]
+        )
+        self.assertEqual(self.observe()[0]["count"], 4)
+
+    def test_relay_publishes_detected_hotspots(self):
+        user = make_user("citizen")
+        with self.settings(HOTSPOTS={"THRESHOLDS": [3], "PRECISION": 6}):
+            for _ in range(4):
+                emergency = Emergency.objects.create(
+                    user=user,
+                    emergency_type="FIRE",
+                    latitude=14.5995,
+                    longitude=120.9842,
+                )
+                with transaction.atomic():
+                    publish("emergency.created", emergency, emergency.event_payload())
+            while relay_batch():
+                pass
+
+        self.assertEqual(Hotspot.objects.get().count, 3)
+        self.assertEqual(
+            OutboxEvent.objects.filter(topic="hotspot.detected").count(), 1
+        )
+
+
+class HeatmapTests(TestCase):
+    """Emergency counts per geohash prefix"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("citizen")
+        cls.staff = make_user("dispatcher", is_staff=True)
+        for lat, lng, emergency_type in (
+            (14.5995, 120.9842, "FIRE"),  # wdw511f02
+            (14.5996, 120.9843, "MEDICAL"),  # wdw511f0f
+            (14.62, 120.97, "FIRE"),  # wdw50trxt
+            (10.3157, 123.8854, "FIRE"),  # wcb4ejft7
+        ):
+            Emergency.objects.create(
+                user=cls.user,
+                emergency_type=emergency_type,
+                latitude=lat,
+                longitude=lng,
+            )
+
+    def counts(self, precision, **filters):
+        return {
+            cell["geohash"]: cell["count"] for cell in heatmap(precision, **filters)
+        }
+
+    def test_cells_group_by_prefix(self):
+        self.assertEqual(self.counts(5), {"wdw51": 2, "wdw50": 1, "wcb4e": 1})
+        self.assertEqual(self.counts(2), {"wd": 3, "wc": 1})
+        self.assertEqual(len(self.counts(9)), 4)
+        (cell,) = [c for c in heatmap(3) if c["geohash"] == "wcb"]
+        self.assertEqual((cell["latitude"], cell["longitude"]), geohash_center("wcb"))
+
+    def test_filters(self):
+        self.assertEqual(self.counts(3, emergency_type="FIRE"), {"wdw": 2, "wcb": 1})
+        self.assertEqual(self.counts(5, prefix="WDW5"), {"wdw51": 2, "wdw50": 1})
+        self.assertEqual(self.counts(3, status="RESOLVED"), {})
+        later = datetime.now(timezone.utc) + timedelta(hours=1)
+        self.assertEqual(self.counts(3, since=later), {})
+        self.assertEqual(sum(self.counts(3, until=later).values()), 4)
+
+    def test_precision_and_prefix_bounds(self):
+        for precision in (0, 10):
+            with self.subTest(precision=precision):
+                with self.assertRaises(ValueError):
+                    heatmap(precision)
+        with self.assertRaises(ValueError):
+            heatmap(2, prefix="wdw")
+
+    def test_resolver_validates_arguments(self):
+        def query(precision, prefix="", user=self.staff):
+            self.client.force_login(user)
+            return self.client.post(
+                "/graphql/",
+                json.dumps(
+                    {
+                        "query": "query($p: Int!, $x: String) {"
+                        " emergencyHeatmap(precision: $p, prefix: $x)"
+                        " { geohash count } }",
+                        "variables": {"p": precision, "x": prefix},
+                    }
+                ),
+                content_type="application/json",
+            ).json()
+
+        cells = query(2)["data"]["emergencyHeatmap"]
+        self.assertEqual(
+            sorted(cells, key=lambda cell: cell["geohash"]),
+            [{"geohash": "wc", "count": 1}, {"geohash": "wd", "count": 3}],
+        )
+        self.assertIn("between 1 and 9", query(10)["errors"][0]["message"])
+        self.assertIn("prefix", query(2, "wdw")["errors"][0]["message"])
+        self.assertIn("errors", query(2, user=self.user))
+
+    def test_geohash_follows_the_location(self):
+        emergency = Emergency.objects.get(geohash__startswith="wcb")
+        emergency.latitude, emergency.longitude = 14.5995, 120.9842
+        emergency.save(update_fields=["latitude", "longitude"])
+        emergency.refresh_from_db()
+        self.assertEqual(emergency.geohash, "wdw511f02")
+
+    def test_backfill(self):
+        migration = importlib.import_module(
+            "emergencies.migrations.0007_backfill_emergency_geohash"
+        )
+        Emergency.objects.filter(emergency_type="FIRE").update(geohash="")
+        self.assertEqual(self.counts(3), {"wdw": 1})
+
+        migration.backfill(apps, None)
+
+        self.assertEqual(self.counts(3), {"wdw": 3, "wcb": 1})
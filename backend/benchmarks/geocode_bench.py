@@ -0,0 +1,96 @@
+"""
+Reverse geocoding benchmark: backlog throughput of geocode_emergencies.
+
+Seeds a throwaway test database with N emergencies (default 1M) that have
+coordinates but no address or city, scattered around the benchmark cities,
+then fills them chunk by chunk the way the geocode_emergencies command
+does. Reports rows per second, gazetteer lookups and the share of points
+answered by the LRU of rounded coordinates.
+
+Usage (from backend/):
+    DB_ENGINE=sqlite python -m benchmarks.geocode_bench --rows 100000
+    python -m benchmarks.geocode_bench --rows 1000000 --chunk-size 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+
+def seed(count, rng_seed=42):
+    from benchmarks.seed import CITIES
+    from config.geo import geohash_encode
+    from emergencies.models import Emergency
+    from users.models import User
+
+    rng = random.Random(rng_seed)
+    user = User.objects.create_user(
+        username="bench-citizen",
+        email="bench-citizen@example.com",
+        phone="+639100000000",
+        password=None,
+    )
+    for start in range(0, count, 5000):
+        emergencies = []
+        for i in range(start, min(start + 5000, count)):
+            _, lat, lng = rng.choice(CITIES)
+            lat, lng = lat + rng.gauss(0, 0.05), lng + rng.gauss(0, 0.05)
+            emergencies.append(
+                Emergency(
+                    code=f"EMT-GEO-{i:07d}",
+                    user=user,
+                    emergency_type="MEDICAL",
+                    latitude=lat,
+                    longitude=lng,
+                    geohash=geohash_encode(lat, lng, Emergency.GEOHASH_PRECISION),
+                )
+            )
+        Emergency.objects.bulk_create(emergencies, batch_size=1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from config.geocoding import geocoder
+    from emergencies.geocoding import geocode_chunk, unlocated_chunks
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    print(f"🏁 Reverse geocoding benchmark on {connection.vendor}, {args.rows} rows")
+    try:
+        seed(args.rows)
+        geocoder()  # Load the gazetteer outside the timing
+        began = time.perf_counter()
+        filled = 0
+        for chunk in unlocated_chunks(args.chunk_size):
+            filled += geocode_chunk(chunk)
+        seconds = time.perf_counter() - began
+        lookups = geocoder().cached_nearest.cache_info()
+        points = lookups.hits + lookups.misses
+        print(
+            f"  filled {filled}/{args.rows} in {seconds:.1f}s "
+            f"({filled / seconds:.0f} rows/s)  "
+            f"{lookups.misses} lookups, {lookups.hits / points:.0%} cache hits"
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
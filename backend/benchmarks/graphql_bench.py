@@ -0,0 +1,303 @@
+# benchmarks/graphql_bench.py
+"""
+In-process GraphQL performance benchmark with regression gates.
+
+Seeds a throwaway test database at several dataset sizes, runs the key API
+operations through Django's test client and records latency percentiles,
+queries per operation and allocations. Results are compared against a JSON
+baseline and the process exits non-zero when an operation regresses.
+
+Usage (from backend/):
+    DB_ENGINE=sqlite python -m benchmarks.graphql_bench --check
+    python -m benchmarks.graphql_bench --sizes 100,1000 --update-baseline
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+LIST_EMERGENCIES = "{ emergencies { id code emergencyType status createdAt } }"
+LIST_PROVIDERS = "{ providers { id status latitude longitude rating } }"
+CREATE_EMERGENCY = """
+mutation ($userId: UUID!, $latitude: Float!, $longitude: Float!) {
+  createEmergency(
+    emergencyType: "MEDICAL"
+    userId: $userId
+    latitude: $latitude
+    longitude: $longitude
+  ) {
+    emergency { id code }
+  }
+}
+"""
+EMERGENCY_HEATMAP = """
+{ emergencyHeatmap(precision: 5, status: "PENDING") { geohash count } }
+"""
+TOKEN_AUTH = """
+mutation ($username: String!, $password: String!) {
+  tokenAuth(username: $username, password: $password) { token }
+}
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def build_operations(staff, citizen):
+    """Return {name: (callable, runs_factor)} for the benchmarked operations"""
+    from django.test import Client
+
+    from benchmarks.seed import BENCH_PASSWORD
+
+    client = Client()
+    staff_client = Client()
+    staff_client.force_login(staff)
+
+    def graphql(query, variables=None, client=client):
+        response = client.post(
+            "/graphql/",
+            data=json.dumps({"query": query, "variables": variables or {}}),
+            content_type="application/json",
+        )
+        payload = response.json()
+        if response.status_code != 200 or payload.get("errors"):
+            raise RuntimeError(f"GraphQL error: {payload}")
+        return payload
+
+    def dashboard():
+        response = staff_client.get("/dashboard/")
+        if response.status_code != 200:
+            raise RuntimeError(f"Dashboard returned {response.status_code}")
+
+    return {
+        "list_emergencies": (lambda: graphql(LIST_EMERGENCIES), 1),
+        "list_providers": (lambda: graphql(LIST_PROVIDERS), 1),
+        "create_emergency": (
+            lambda: graphql(
+                CREATE_EMERGENCY,
+                {
+                    "userId": str(citizen.id),
+                    "latitude": 14.5995,
+                    "longitude": 120.9842,
+                },
+            ),
+            1,
+        ),
+        # Password hashing dominates tokenAuth, so it gets fewer runs
+        "token_auth": (
+            lambda: graphql(
+                TOKEN_AUTH,
+                {"username": citizen.username, "password": BENCH_PASSWORD},
+            ),
+            0.2,
+        ),
+        "dashboard_stats": (dashboard, 1),
+        "emergency_heatmap": (
+            lambda: graphql(EMERGENCY_HEATMAP, client=staff_client),
+            1,
+        ),
+    }
+
+
+def measure(operation, runs, warmup):
+    """Time an operation and count its queries and allocations"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        operation()
+
+    timings = []
+    query_counts = []
+    for _ in range(runs):
+        # Keep collector pauses out of the timed region
+        gc.collect()
+        gc.disable()
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                operation()
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            gc.enable()
+        query_counts.append(len(ctx.captured_queries))
+
+    # Allocation tracing slows everything down, so it runs in its own pass;
+    # the smallest of a few peaks filters out one-off cache fills. A
+    # collection landing mid-operation moves the peak by tens of KiB, so the
+    # collector is paused here too.
+    peaks = []
+    for _ in range(3):
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            operation()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+    peak = min(peaks)
+
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p90_ms": round(percentile(timings, 90), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": max(query_counts),
+        "alloc_peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(sizes, runs, warmup):
+    from django.core.management import call_command
+
+    from benchmarks.seed import seed
+
+    results = {}
+    for size in sizes:
+        call_command("flush", interactive=False, verbosity=0)
+        staff, citizen = seed(size)
+        results[str(size)] = {}
+        for name, (operation, factor) in build_operations(staff, citizen).items():
+            stats = measure(operation, max(int(runs * factor), 3), warmup)
+            results[str(size)][name] = stats
+            print(
+                f"  size={size:<6} {name:<18} p50={stats['p50_ms']:>9.2f}ms "
+                f"p90={stats['p90_ms']:>9.2f}ms queries={stats['queries']:<5} "
+                f"alloc={stats['alloc_peak_kib']:.0f}KiB"
+            )
+    return results
+
+
+def compare(results, baseline, latency_threshold, alloc_threshold, slack_ms=2.0):
+    """Return a list of human-readable regressions against the baseline
+
+    Latency limits get an absolute `slack_ms` on top of the relative threshold
+    so millisecond-scale jitter on fast operations doesn't fail the gate.
+    """
+    regressions = []
+    for size, operations in results.items():
+        for name, current in operations.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous:
+                continue
+            label = f"size={size} {name}"
+            if current["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{label}: queries {previous['queries']} -> {current['queries']}"
+                )
+            # Tail latency is noisier, so p90 gets twice the headroom of p50
+            for key, threshold in (
+                ("p50_ms", latency_threshold),
+                ("p90_ms", latency_threshold * 2),
+            ):
+                limit = previous[key] * (1 + threshold) + slack_ms
+                if current[key] > limit:
+                    regressions.append(
+                        f"{label}: {key} {previous[key]} -> {current[key]} "
+                        f"(limit {limit:.3f})"
+                    )
+            limit = previous["alloc_peak_kib"] * (1 + alloc_threshold)
+            if current["alloc_peak_kib"] > limit:
+                regressions.append(
+                    f"{label}: alloc_peak_kib {previous['alloc_peak_kib']} -> "
+                    f"{current['alloc_peak_kib']} (limit {limit:.1f})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument(
+        "--check", action="store_true", help="Fail on regressions vs baseline"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the baseline for the current engine",
+    )
+    parser.add_argument("--latency-threshold", type=float, default=0.25)
+    parser.add_argument("--latency-slack-ms", type=float, default=2.0)
+    parser.add_argument("--alloc-threshold", type=float, default=0.20)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # Never touch the development database in backend/db.sqlite3
+    scratch = tempfile.TemporaryDirectory(prefix="graphql-bench-")
+    os.environ.setdefault("SQLITE_PATH", str(Path(scratch.name) / "db.sqlite3"))
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment(debug=False)
+    settings.DEBUG = False
+    # Sampled requests are profiled and logged, which skews their numbers
+    settings.GRAPHQL_PROFILING = {**settings.GRAPHQL_PROFILING, "SAMPLE_RATE": 0}
+    old_name = connection.creation.create_test_db(verbosity=0)
+    engine = connection.vendor
+    print(f"🏁 GraphQL benchmark on {engine} ({connection.settings_dict['NAME']})")
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(",")]
+        results = run(sizes, args.runs, args.warmup)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.output:
+        args.output.write_text(json.dumps({engine: results}, indent=2) + "\n")
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+
+    if args.update_baseline:
+        baselines[engine] = results
+        args.baseline.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"💾 Baseline for {engine} written to {args.baseline}")
+        return 0
+
+    if args.check:
+        if engine not in baselines:
+            print(f"❌ No {engine} baseline in {args.baseline}")
+            return 1
+        regressions = compare(
+            results,
+            baselines[engine],
+            args.latency_threshold,
+            args.alloc_threshold,
+            args.latency_slack_ms,
+        )
+        if regressions:
+            print("❌ Performance regressions:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
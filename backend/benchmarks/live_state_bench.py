@@ -0,0 +1,163 @@
+"""
+Location ping benchmark: update throughput and bloat of provider_live_state.
+
+Seeds a throwaway test database with N providers (default 10k), then sends
+location pings through Provider.save(update_fields=...) the way
+updateProviderLocation does, each in its own transaction. Reports pings per
+second and the size of providers, provider_live_state and their indexes
+before and after. On PostgreSQL it also reports the share of HOT updates
+(no index entries written) from pg_stat_user_tables.
+
+Usage (from backend/):
+    DB_ENGINE=sqlite python -m benchmarks.live_state_bench
+    python -m benchmarks.live_state_bench --providers 10000 --pings 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+TABLES = ["providers", "provider_live_state"]
+# Backends report their table counters to pg_stat about once a second
+STATS_DELAY = 2
+
+
+def seed(count, rng_seed=42):
+    from django.contrib.auth.hashers import make_password
+
+    from benchmarks.seed import BENCH_PASSWORD, CITIES
+    from providers.models import Provider, ProviderLiveState
+    from users.models import User
+
+    rng = random.Random(rng_seed)
+    password = make_password(BENCH_PASSWORD)
+    for start in range(0, count, 5000):
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-provider{i}",
+                    email=f"bench-provider{i}@example.com",
+                    phone=f"+63{9200000000 + i}",
+                    password=password,
+                    user_type="PROVIDER",
+                )
+                for i in range(start, min(start + 5000, count))
+            ]
+        )
+        providers = []
+        for user in users:
+            _, lat, lng = rng.choice(CITIES)
+            providers.append(
+                Provider(
+                    user=user,
+                    status="AVAILABLE",
+                    latitude=lat + rng.gauss(0, 0.05),
+                    longitude=lng + rng.gauss(0, 0.05),
+                )
+            )
+        Provider.objects.bulk_create(providers)
+        ProviderLiveState.objects.bulk_create(
+            [provider.get_live() for provider in providers]
+        )
+
+
+def sizes():
+    """{table: (table bytes, index bytes)}"""
+    from monitoring.dbstats import relation_sizes
+
+    result = {}
+    for table in TABLES:
+        table_bytes, indexes = relation_sizes(table) or (0, {})
+        result[table] = table_bytes, sum(indexes.values())
+    return result
+
+
+def update_counts(table):
+    """(updates, HOT updates) PostgreSQL has counted for a table"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(
+            "SELECT n_tup_upd, n_tup_hot_upd FROM pg_stat_user_tables "
+            "WHERE relid = %s::regclass",
+            [table],
+        )
+        return cursor.fetchone()
+
+
+def ping(providers, count, rng):
+    from django.utils import timezone
+
+    start = time.perf_counter()
+    for _ in range(count):
+        provider = rng.choice(providers)
+        provider.latitude += rng.gauss(0, 0.0005)
+        provider.longitude += rng.gauss(0, 0.0005)
+        provider.last_ping = timezone.now()
+        provider.save(update_fields=["latitude", "longitude", "last_ping"])
+    return time.perf_counter() - start
+
+
+def kib(size):
+    return f"{size / 1024:.1f}KiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--providers", type=int, default=10_000)
+    parser.add_argument("--pings", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from providers.models import Provider
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    print(f"🏁 Location ping benchmark on {connection.vendor}")
+    postgres = connection.vendor == "postgresql"
+    try:
+        seed(args.providers)
+        before = sizes()
+        counts_before = postgres and update_counts("provider_live_state")
+        providers = list(Provider.objects.all())
+        elapsed = ping(providers, args.pings, random.Random(7))
+        print(
+            f"  providers={args.providers:<7} pings={args.pings:<7} "
+            f"{args.pings / elapsed:>9.0f} pings/s"
+        )
+        after = sizes()
+        for table in TABLES:
+            (table_before, index_before), (table_after, index_after) = (
+                before[table],
+                after[table],
+            )
+            print(
+                f"  {table:<20} table {kib(table_before)} -> {kib(table_after)}  "
+                f"indexes {kib(index_before)} -> {kib(index_after)}"
+            )
+        if postgres:
+            time.sleep(STATS_DELAY)
+            updates, hot = update_counts("provider_live_state")
+            updates -= counts_before[0]
+            hot -= counts_before[1]
+            share = hot / updates if updates else 0
+            print(f"  HOT updates {hot}/{updates} ({share:.0%})")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# benchmarks/seed.py
+import random
+
+from django.contrib.auth.hashers import make_password
+
+BENCH_PASSWORD = "bench-password-123"
+
+CITIES = [
+    ("Manila", 14.5995, 120.9842),
+    ("Quezon City", 14.6760, 121.0437),
+    ("Cebu City", 10.3157, 123.8854),
+    ("Davao City", 7.1907, 125.4553),
+]
+
+
+def seed(size, rng_seed=42):
+    """Create `size` citizens and emergencies plus size // 10 providers
+
+    Rows are generated from a fixed random seed so every run benchmarks the
+    same dataset. Returns the staff user and a citizen for authenticated
+    operations.
+    """
+    from config.geo import geohash_encode
+    from emergencies.models import Emergency
+    from providers.models import Provider, ProviderLiveState
+    from providers.services import service_mask
+    from users.models import User
+
+    rng = random.Random(rng_seed)
+    # Hash once; every seeded account shares the same password
+    password = make_password(BENCH_PASSWORD)
+
+    staff = User.objects.create(
+        username="bench-staff",
+        email="bench-staff@example.com",
+        phone="+630000000000",
+        password=password,
+        user_type="ADMIN",
+        is_staff=True,
+    )
+
+    citizens = User.objects.bulk_create(
+        [
+            User(
+                username=f"bench-citizen{i}",
+                email=f"bench-citizen{i}@example.com",
+                phone=f"+63{9100000000 + i}",
+                password=password,
+                first_name=f"Citizen{i}",
+                last_name="Bench",
+            )
+            for i in range(size)
+        ],
+        batch_size=1000,
+    )
+
+    provider_users = User.objects.bulk_create(
+        [
+            User(
+                username=f"bench-provider{i}",
+                email=f"bench-provider{i}@example.com",
+                phone=f"+63{9200000000 + i}",
+                password=password,
+                first_name=f"Provider{i}",
+                last_name="Bench",
+                user_type="PROVIDER",
+            )
+            for i in range(max(size // 10, 1))
+        ],
+        batch_size=1000,
+    )
+
+    service_types = [code for code, _ in Provider.SERVICE_TYPES]
+    statuses = [code for code, _ in Provider.STATUS_CHOICES]
+    providers = []
+    for user in provider_users:
+        _, lat, lng = rng.choice(CITIES)
+        services = rng.sample(service_types, 2)
+        providers.append(
+            Provider(
+                user=user,
+                service_types=services,
+                service_mask=service_mask(services),
+                status=rng.choice(statuses),
+                latitude=lat + rng.gauss(0, 0.05),
+                longitude=lng + rng.gauss(0, 0.05),
+                is_verified=rng.random() < 0.8,
+            )
+        )
+    providers = Provider.objects.bulk_create(providers, batch_size=1000)
+    # bulk_create skips save(), which writes the live-state row
+    ProviderLiveState.objects.bulk_create(
+        [provider.get_live() for provider in providers], batch_size=1000
+    )
+
+    emergency_types = [code for code, _ in Emergency.EMERGENCY_TYPES]
+    emergency_statuses = [code for code, _ in Emergency.STATUS_CHOICES]
+    emergencies = []
+    for i, user in enumerate(citizens):
+        city, lat, lng = rng.choice(CITIES)
+        lat, lng = lat + rng.gauss(0, 0.05), lng + rng.gauss(0, 0.05)
+        emergencies.append(
+            Emergency(
+                code=f"EMT-BENCH-{i:07d}",
+                user=user,
+                provider=rng.choice(providers) if rng.random() < 0.5 else None,
+                emergency_type=rng.choice(emergency_types),
+                status=rng.choice(emergency_statuses),
+                latitude=lat,
+                longitude=lng,
+                # bulk_create skips save(), which normally fills this in
+                geohash=geohash_encode(lat, lng, Emergency.GEOHASH_PRECISION),
+                city=city,
+            )
+        )
+    Emergency.objects.bulk_create(emergencies, batch_size=1000)
+
+    return staff, citizens[0]
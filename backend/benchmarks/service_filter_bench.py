@@ -0,0 +1,136 @@
+# benchmarks/service_filter_bench.py
+"""
+Capability filter benchmark: service_types JSON vs the service_mask index.
+
+Seeds a throwaway test database with N providers (default 100k) and times
+"has any/all of these services" both ways. PostgreSQL runs the JSON side as
+jsonb containment (@>); SQLite has no containment lookup, so there it is a
+substring match on the JSON text, which is what a scan per row costs anyway.
+
+Usage (from backend/):
+    DB_ENGINE=sqlite python -m benchmarks.service_filter_bench
+    python -m benchmarks.service_filter_bench --providers 100000 --runs 20
+"""
+
+import argparse
+import functools
+import operator
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+CASES = [
+    ("any of 1", ["AMBULANCE"], False),
+    ("any of 2", ["AMBULANCE", "FIRE_TRUCK"], False),
+    ("all of 2", ["AMBULANCE", "FIRE_TRUCK"], True),
+]
+
+
+def seed(count, rng_seed=42):
+    from django.contrib.auth.hashers import make_password
+
+    from benchmarks.seed import BENCH_PASSWORD
+    from providers.models import Provider
+    from providers.services import service_mask
+    from users.models import User
+
+    rng = random.Random(rng_seed)
+    password = make_password(BENCH_PASSWORD)
+    codes = [code for code, _ in Provider.SERVICE_TYPES]
+    for start in range(0, count, 5000):
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-provider{i}",
+                    email=f"bench-provider{i}@example.com",
+                    phone=f"+63{9200000000 + i}",
+                    password=password,
+                    user_type="PROVIDER",
+                )
+                for i in range(start, min(start + 5000, count))
+            ]
+        )
+        providers = []
+        for user in users:
+            services = rng.sample(codes, rng.randint(1, 3))
+            providers.append(
+                Provider(
+                    user=user,
+                    service_types=services,
+                    service_mask=service_mask(services),
+                )
+            )
+        Provider.objects.bulk_create(providers)
+
+
+def json_filter(queryset, services, match_all):
+    from django.db import connection
+    from django.db.models import Q
+
+    if connection.vendor == "postgresql":
+        lookups = [Q(service_types__contains=[code]) for code in services]
+    else:
+        lookups = [Q(service_types__icontains=f'"{code}"') for code in services]
+    combine = operator.and_ if match_all else operator.or_
+    return queryset.filter(functools.reduce(combine, lookups))
+
+
+def time_count(queryset, runs):
+    timings = []
+    count = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = queryset.count()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return count, timings[len(timings) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--providers", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from providers.models import Provider
+    from providers.services import filter_services
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    print(f"🏁 Service filter benchmark on {connection.vendor}")
+    try:
+        seed(args.providers)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        providers = Provider.objects.all()
+        for label, services, match_all in CASES:
+            json_count, json_ms = time_count(
+                json_filter(providers, services, match_all), args.runs
+            )
+            mask_count, mask_ms = time_count(
+                filter_services(providers, services, match_all), args.runs
+            )
+            if json_count != mask_count:
+                raise RuntimeError(f"{label}: {json_count} != {mask_count} rows")
+            print(
+                f"  providers={args.providers:<7} {label:<9} rows={mask_count:<7} "
+                f"json p50={json_ms:>8.2f}ms  mask p50={mask_ms:>8.2f}ms"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
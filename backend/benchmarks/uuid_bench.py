@@ -0,0 +1,116 @@
+"""
+Primary key benchmark: random uuid4 keys vs time-ordered uuid7 keys.
+
+Inserts N rows (default 10M) into two scratch tables of a throwaway test
+database, one keyed by uuid.uuid4 and one by config.uuids.uuid7, in
+batches of generated keys the way the app inserts rows. Reports insert
+throughput over the whole run and over its last tenth, when the index is
+largest, plus the final table and primary key index sizes. Random keys land
+on random leaf pages, so once the index outgrows the cache every insert
+reads a page back in, and page splits leave the index half empty.
+
+SQLite runs on a file rather than in memory so the page cache matters.
+
+Usage (from backend/):
+    DB_ENGINE=sqlite python -m benchmarks.uuid_bench --rows 1000000
+    python -m benchmarks.uuid_bench --rows 10000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import django
+
+
+def create_table(table):
+    from django.db import connection, models
+
+    quote = connection.ops.quote_name
+    key_type = models.UUIDField().db_type(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} ("
+            f"{quote('id')} {key_type} NOT NULL PRIMARY KEY, "
+            f"{quote('seq')} bigint NOT NULL, "
+            f"{quote('payload')} varchar(64) NOT NULL)"
+        )
+
+
+def insert(table, generate, rows, batch):
+    """Seconds taken by each batch of inserts"""
+    from django.db import connection, models, transaction
+
+    field = models.UUIDField()
+    quote = connection.ops.quote_name
+    sql = f"INSERT INTO {quote(table)} VALUES (%s, %s, %s)"
+    timings = []
+    for start in range(0, rows, batch):
+        values = [
+            (field.get_db_prep_value(generate(), connection), seq, f"row {seq}")
+            for seq in range(start, min(start + batch, rows))
+        ]
+        began = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, values)
+        timings.append(time.perf_counter() - began)
+    return timings
+
+
+def rate(rows, seconds):
+    return f"{rows / seconds:>9.0f} rows/s" if seconds else "        - rows/s"
+
+
+def mib(size):
+    return f"{size / 1024 / 1024:.1f}MiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from config.uuids import uuid7
+    from monitoring.dbstats import relation_sizes
+
+    if connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tempfile.gettempdir(), "uuid_bench.sqlite3"
+        )
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    print(f"🏁 Primary key benchmark on {connection.vendor}, {args.rows} rows")
+    try:
+        for table, generate in (
+            ("uuid_bench_v4", uuid.uuid4),
+            ("uuid_bench_v7", uuid7),
+        ):
+            create_table(table)
+            timings = insert(table, generate, args.rows, args.batch)
+            tail = timings[-max(len(timings) // 10, 1) :]
+            tail_rows = min(len(tail) * args.batch, args.rows)
+            table_bytes, indexes = relation_sizes(table) or (0, {})
+            print(
+                f"  {table:<14} all {rate(args.rows, sum(timings))}  "
+                f"last tenth {rate(tail_rows, sum(tail))}  "
+                f"table {mib(table_bytes)}  pk index {mib(sum(indexes.values()))}"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# backend/config/fields.py
+"""
+Smallint-backed enum columns with a string interface.
+
+EnumField stores the position of a value in its `choices` as a smallint, so
+a status column costs two bytes per row (and per index entry) instead of a
+varchar. Python, forms, the admin and GraphQL still see the string codes:
+`filter(status="PENDING")`, `values("status")` and `instance.status` all
+work with "PENDING", and get_FOO_display() returns the label.
+
+Codes are positions, so choices may only ever be appended to. A lookup for
+a value that isn't a choice matches no rows, like it did on the varchar
+column; saving one raises ValueError.
+"""
+
+from django.core import exceptions
+from django.db import models
+from django.db.models import Case, Value, When
+
+# Never stored: what lookups compare against for values that aren't choices
+UNKNOWN_CODE = -1
+
+
+class EnumField(models.PositiveSmallIntegerField):
+    def __init__(self, *args, choices, **kwargs):
+        super().__init__(*args, choices=choices, **kwargs)
+        self.codes = {value: code for code, (value, _) in enumerate(choices)}
+        self.values = [value for value, _ in choices]
+
+    @property
+    def validators(self):
+        # The smallint range validators don't apply to the string values
+        return list(self._validators)
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else self.values[value]
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        if isinstance(value, int) and 0 <= value < len(self.values):
+            return self.values[value]
+        raise exceptions.ValidationError(
+            self.error_messages["invalid_choice"],
+            code="invalid_choice",
+            params={"value": value},
+        )
+
+    def get_prep_value(self, value):
+        if value is None or hasattr(value, "resolve_expression"):
+            return value
+        try:
+            return self.codes[value]
+        except (KeyError, TypeError):
+            return UNKNOWN_CODE
+
+    def get_db_prep_save(self, value, connection):
+        prepared = super().get_db_prep_save(value, connection)
+        if prepared == UNKNOWN_CODE:
+            raise ValueError(f"{value!r} is not a valid {self.name}")
+        return prepared
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+
+def code_case(source, choices, default, aliases=None):
+    """Expression mapping a legacy string column to EnumField codes
+
+    Matching ignores case; `aliases` maps other legacy spellings to a
+    choice, and anything else becomes `default`.
+    """
+    codes = {value: code for code, (value, _) in enumerate(choices)}
+    spellings = {value: value for value in codes} | (aliases or {})
+    return Case(
+        *[
+            When(**{f"{source}__iexact": spelling}, then=Value(codes[value]))
+            for spelling, value in spellings.items()
+        ],
+        default=Value(codes[default]),
+    )
+
+
+def value_case(source, choices):
+    """Expression mapping EnumField codes back to the string values"""
+    return Case(
+        *[
+            When(**{source: code}, then=Value(value))
+            for code, (value, _) in enumerate(choices)
+        ],
+        default=Value(""),
+    )
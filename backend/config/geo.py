@@ -0,0 +1,195 @@
+# config/geo.py
+"""
+Plain-float geo helpers: great-circle distance and radius queries over
+latitude/longitude columns, without PostGIS.
+
+`within_radius()` narrows rows with a bounding box, which an index on
+(latitude, longitude) can serve, then applies the exact haversine check in
+SQL to the few rows left.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def parse_lat_lng(value):
+    """(lat, lng) from a "14.5995,120.9842" string, or None if it isn't one"""
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing the circle
+
+    min_lng > max_lng when the box crosses the antimeridian.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    if min_lat == -90.0 or max_lat == 90.0:
+        # The circle contains a pole: every longitude is in range
+        return min_lat, max_lat, -180.0, 180.0
+    dlng = dlat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if dlng >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    min_lng = (lng - dlng + 540) % 360 - 180
+    max_lng = (lng + dlng + 540) % 360 - 180
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def bounding_box_q(lat, lng, radius_km, lat_field="latitude", lng_field="longitude"):
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    q = Q(**{f"{lat_field}__gte": min_lat, f"{lat_field}__lte": max_lat})
+    if min_lng <= max_lng:
+        return q & Q(**{f"{lng_field}__gte": min_lng, f"{lng_field}__lte": max_lng})
+    return q & (
+        Q(**{f"{lng_field}__gte": min_lng}) | Q(**{f"{lng_field}__lte": max_lng})
+    )
+
+
+def distance_km(lat, lng, lat_field="latitude", lng_field="longitude"):
+    """Haversine distance from (lat, lng) as a query expression"""
+    dphi = Radians(F(lat_field)) - math.radians(lat)
+    dlambda = Radians(F(lng_field)) - math.radians(lng)
+    a = Power(Sin(dphi / 2), 2) + math.cos(math.radians(lat)) * Cos(
+        Radians(F(lat_field))
+    ) * Power(Sin(dlambda / 2), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), 1.0, output_field=FloatField()))
+
+
+def within_radius(queryset, lat, lng, radius_km, **fields):
+    """Rows of `queryset` within radius_km of (lat, lng), annotated distance_km"""
+    return (
+        queryset.filter(bounding_box_q(lat, lng, radius_km, **fields))
+        .annotate(distance_km=distance_km(lat, lng, **fields))
+        .filter(distance_km__lte=radius_km)
+    )
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_INDEX = {char: i for i, char in enumerate(GEOHASH_ALPHABET)}
+
+
+def geohash_encode(lat, lng, precision=9):
+    """Geohash of a point; precision 9 cells are about 5 m across"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate longitude, latitude, starting with longitude
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            bounds[0] = mid
+        else:
+            bits = bits * 2
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash):
+    """(min_lat, max_lat, min_lng, max_lng) of a geohash cell"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if bits >> shift & 1:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def geohash_center(geohash):
+    min_lat, max_lat, min_lng, max_lng = geohash_bounds(geohash)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def geohash_neighbors(geohash):
+    """The up to eight cells around a geohash cell, at the same precision"""
+    min_lat, max_lat, min_lng, max_lng = geohash_bounds(geohash)
+    height, width = max_lat - min_lat, max_lng - min_lng
+    center_lat, center_lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+    cells = []
+    for dy in (-1, 0, 1):
+        lat = center_lat + dy * height
+        if not -90 < lat < 90:
+            continue
+        for dx in (-1, 0, 1):
+            if dx == dy == 0:
+                continue
+            lng = (center_lng + dx * width + 180) % 360 - 180
+            cells.append(geohash_encode(lat, lng, len(geohash)))
+    return cells
+
+
+def geohash_cover(lat, lng, radius_km, precision):
+    """Cells at `precision` overlapping the bounding box of a circle
+
+    The cells must be at least radius_km across, so the box reaches no more
+    than one cell past the point's own on each side: one to four cells
+    unless the point is within radius_km of a corner of its cell.
+    """
+    cell = geohash_encode(lat, lng, precision)
+    min_lat, max_lat, min_lng, max_lng = geohash_bounds(cell)
+    box_min_lat, box_max_lat, box_min_lng, box_max_lng = bounding_box(
+        lat, lng, radius_km
+    )
+    rows = [0]
+    if box_min_lat < min_lat:
+        rows.append(-1)
+    if box_max_lat > max_lat:
+        rows.append(1)
+    if box_max_lng - box_min_lng >= 360:
+        columns = [-1, 0, 1]
+    else:
+        # Reach either side of the point, across the antimeridian too
+        columns = [0]
+        if (lng - box_min_lng) % 360 > lng - min_lng:
+            columns.append(-1)
+        if (box_max_lng - lng) % 360 > max_lng - lng:
+            columns.append(1)
+    height, width = max_lat - min_lat, max_lng - min_lng
+    center_lat, center_lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+    cells = []
+    for dy in rows:
+        row_lat = center_lat + dy * height
+        if not -90 < row_lat < 90:
+            continue
+        for dx in columns:
+            column_lng = (center_lng + dx * width + 180) % 360 - 180
+            cells.append(geohash_encode(row_lat, column_lng, precision))
+    return cells
@@ -0,0 +1,131 @@
+# backend/config/geocoding.py
+"""
+Offline reverse geocoding: the gazetteer place nearest to a point.
+
+The gazetteer is a CSV of name, city, province, latitude, longitude, loaded
+once per process into a grid of GRID_DEGREES cells, so a lookup measures
+only the places in the few cells within MAX_DISTANCE_KM. Results are kept
+in an LRU keyed by the point rounded to PRECISION decimals (3: about 110 m),
+so reports from the same block cost one lookup.
+
+The bundled config/data/gazetteer.csv lists Philippine cities; point
+GEOCODING["GAZETTEER"] at a fuller export (e.g. barangays) for finer
+addresses.
+"""
+
+import csv
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+
+from config.geo import bounding_box, haversine_km
+
+DEFAULTS = {
+    "GAZETTEER": settings.BASE_DIR / "config" / "data" / "gazetteer.csv",
+    # Points farther than this from every place stay blank
+    "MAX_DISTANCE_KM": 30.0,
+    "PRECISION": 3,
+    "CACHE_SIZE": 100_000,
+}
+GRID_DEGREES = 0.5
+
+
+def geocoding_setting(name):
+    return getattr(settings, "GEOCODING", {}).get(name, DEFAULTS[name])
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    city: str
+    province: str
+    latitude: float
+    longitude: float
+
+    @property
+    def address(self):
+        parts = []
+        for part in (self.name, self.city, self.province):
+            if part and part not in parts:
+                parts.append(part)
+        return ", ".join(parts)
+
+
+def grid_cell(lat, lng):
+    return math.floor(lat / GRID_DEGREES), math.floor(lng / GRID_DEGREES)
+
+
+def grid_range(low, high):
+    return range(math.floor(low / GRID_DEGREES), math.floor(high / GRID_DEGREES) + 1)
+
+
+class ReverseGeocoder:
+    def __init__(self, places, max_distance_km, precision, cache_size):
+        self.grid = {}
+        for place in places:
+            cell = grid_cell(place.latitude, place.longitude)
+            self.grid.setdefault(cell, []).append(place)
+        self.max_distance_km = max_distance_km
+        self.precision = precision
+        self.cached_nearest = lru_cache(maxsize=cache_size)(self.nearest)
+
+    def cells_around(self, lat, lng):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(
+            lat, lng, self.max_distance_km
+        )
+        if min_lng <= max_lng:
+            lng_cells = list(grid_range(min_lng, max_lng))
+        else:
+            # Across the antimeridian
+            lng_cells = [*grid_range(min_lng, 180.0), *grid_range(-180.0, max_lng)]
+        for lat_cell in grid_range(min_lat, max_lat):
+            for lng_cell in lng_cells:
+                yield lat_cell, lng_cell
+
+    def nearest(self, lat, lng):
+        """Closest place within max_distance_km of (lat, lng), or None"""
+        best, best_km = None, self.max_distance_km
+        for cell in self.cells_around(lat, lng):
+            for place in self.grid.get(cell, ()):
+                km = haversine_km(lat, lng, place.latitude, place.longitude)
+                if km <= best_km:
+                    best, best_km = place, km
+        return best
+
+    def lookup(self, lat, lng):
+        """nearest() of the rounded point, through the LRU"""
+        return self.cached_nearest(
+            round(lat, self.precision), round(lng, self.precision)
+        )
+
+
+def load_places(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            Place(
+                name=row["name"],
+                city=row["city"],
+                province=row["province"],
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]),
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+@lru_cache(maxsize=None)
+def geocoder():
+    """The process-wide ReverseGeocoder, built on first use"""
+    return ReverseGeocoder(
+        load_places(geocoding_setting("GAZETTEER")),
+        max_distance_km=geocoding_setting("MAX_DISTANCE_KM"),
+        precision=geocoding_setting("PRECISION"),
+        cache_size=geocoding_setting("CACHE_SIZE"),
+    )
+
+
+def reverse_geocode(lat, lng):
+    """Place nearest to (lat, lng), or None when there is none close enough"""
+    return geocoder().lookup(lat, lng)
@@ -0,0 +1,46 @@
+# backend/config/pagination.py
+"""
+Admin changelist pagination for large tables.
+
+COUNT(*) on PostgreSQL reads every visible row, which takes seconds on a
+table with millions of rows and is paid on every changelist page.
+EstimatedCountPaginator takes the count of an unfiltered changelist from the
+planner statistics (monitoring/dbstats.py) once the table is past
+`estimate_above` rows; filtered lists and small tables are counted exactly.
+A page past the end of an overestimated table recounts exactly, so the page
+links stop at the last real page.
+
+Use it together with `show_full_result_count = False`, which stops the
+changelist from counting the whole table a second time.
+"""
+
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from monitoring.dbstats import estimate_row_count
+
+
+class EstimatedCountPaginator(Paginator):
+    estimate_above = 100_000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model)
+            if estimate > self.estimate_above:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated and page.number > 1 and not page.object_list:
+            # Statistics are stale: count exactly, and let validate_number()
+            # reject the page as out of range
+            self.estimated = False
+            self.__dict__["count"] = super().count
+            self.__dict__.pop("num_pages", None)
+            page = super().page(number)
+        return page
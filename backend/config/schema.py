@@ -1,10 +1,31 @@
+from datetime import timedelta
+
 import graphene
 import graphql_jwt
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
 from graphene_django import DjangoObjectType
+from graphene_django.converter import convert_choice_field_to_enum
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required, staff_member_required
 
-from emergencies.models import Emergency
-from providers.models import Provider
+from analytics.heatmap import heatmap
+from analytics.models import Hotspot
+from analytics.rollups import response_time_stats
+from config.geo import within_radius
+from config.search import EMERGENCIES, PROVIDERS, USERS, search
+from emergencies import bulk as emergency_bulk
+from emergencies import uploads
+from emergencies.dedup import find_parent
+from emergencies.models import Attachment, Emergency
+from notifications.pipeline import broadcast_area_alert
+from outbox.publish import publish
+from providers import bulk as provider_bulk
+from providers.availability import filter_scheduled
+from providers.models import Provider, ProviderLiveState
+from providers.services import filter_services
 
 User = get_user_model()
 
@@ -24,27 +45,309 @@ class ObtainJSONWebToken(graphql_jwt.JSONWebTokenMutation):
         return cls(user=info.context.user)
 
 
+class AttachmentType(DjangoObjectType):
+    url = graphene.String(required=True)
+    thumbnail_url = graphene.String()
+
+    class Meta:
+        model = Attachment
+        fields = ("id", "filename", "content_type", "size", "sha256", "created_at")
+
+    def resolve_url(self, info):
+        return uploads.attachment_storage().url(self.storage_name)
+
+    def resolve_thumbnail_url(self, info):
+        # Empty until the thumbnail consumer has run
+        if self.thumbnail_name:
+            return uploads.attachment_storage().url(self.thumbnail_name)
+        return None
+
+
+class AttachmentUploadType(graphene.ObjectType):
+    """An open resumable upload; PUT the file's chunks to upload_url"""
+
+    id = graphene.UUID(required=True)
+    filename = graphene.String(required=True)
+    content_type = graphene.String(required=True)
+    size = graphene.Int(required=True)
+    received = graphene.Int(required=True)
+    chunk_size = graphene.Int(required=True)
+    upload_url = graphene.String(required=True)
+
+    def resolve_chunk_size(self, info):
+        return uploads.upload_setting("CHUNK_SIZE")
+
+    def resolve_upload_url(self, info):
+        path = reverse("attachment_upload", args=[self.id])
+        return info.context.build_absolute_uri(path)
+
+
 class EmergencyType(DjangoObjectType):
+    # Stored in the emergency_details side table
+    symptoms = graphene.JSONString(required=True)
+    patient_info = graphene.JSONString(required=True)
+    attachments = graphene.JSONString(required=True)
+    files = graphene.List(graphene.NonNull(AttachmentType), required=True)
+
     class Meta:
         model = Emergency
         fields = "__all__"
 
+    def resolve_symptoms(self, info):
+        return self.get_details().symptoms
+
+    def resolve_patient_info(self, info):
+        return self.get_details().patient_info
+
+    def resolve_attachments(self, info):
+        return self.get_details().attachments
+
+    def resolve_files(self, info):
+        return self.files.all()
+
+
+DETAIL_FIELDS = {"symptoms", "patientInfo", "attachments"}
+
+
+def selects_any(info, names):
+    """True when the query asks for any of `names` on the returned objects"""
+    return any(
+        getattr(selection, "name", None) and selection.name.value in names
+        for node in info.field_nodes
+        if node.selection_set
+        for selection in node.selection_set.selections
+    )
+
+
+ProviderStatus = convert_choice_field_to_enum(
+    ProviderLiveState._meta.get_field("status"),
+    name="ProvidersProviderStatusChoices",
+)
+
 
 class ProviderType(DjangoObjectType):
+    # Read through Provider's properties from the provider_live_state row
+    status = graphene.Field(ProviderStatus, required=True)
+    latitude = graphene.Float()
+    longitude = graphene.Float()
+    current_emergency_id = graphene.UUID()
+    current_emergency = graphene.Field(EmergencyType)
+    last_ping = graphene.DateTime()
+
     class Meta:
         model = Provider
         fields = "__all__"
 
 
+class ServiceMatch(graphene.Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+class ResponseTimeMetric(graphene.Enum):
+    DISPATCH = "DISPATCH"
+    ARRIVAL = "ARRIVAL"
+
+
+class ResponseTimeGroup(graphene.Enum):
+    CITY = "city"
+    EMERGENCY_TYPE = "emergency_type"
+    HOUR = "hour"
+    HOUR_OF_DAY = "hour_of_day"
+
+
+class ResponseTimeStatsType(graphene.ObjectType):
+    """Response-time percentiles in seconds for one group"""
+
+    group = graphene.String()
+    count = graphene.Int()
+    mean = graphene.Float()
+    p50 = graphene.Float()
+    p90 = graphene.Float()
+    p99 = graphene.Float()
+
+
+class HeatmapCellType(graphene.ObjectType):
+    """Emergencies in one geohash cell; latitude/longitude is its center"""
+
+    geohash = graphene.String()
+    count = graphene.Int()
+    latitude = graphene.Float()
+    longitude = graphene.Float()
+
+
+def with_current_emergency(info, queryset):
+    """Join each provider's current emergency when the query reads it"""
+    if selects_any(info, {"currentEmergency"}):
+        return queryset.select_related("live__current_emergency")
+    return queryset
+
+
+class SearchResultsType(graphene.ObjectType):
+    """Matches of a search in each kind of record, best first"""
+
+    emergencies = graphene.List(graphene.NonNull(EmergencyType), required=True)
+    providers = graphene.List(graphene.NonNull(ProviderType), required=True)
+    users = graphene.List(graphene.NonNull(UserType), required=True)
+
+    # Only the lists the query selects are searched
+    def resolve_emergencies(root, info):
+        return search(Emergency.objects.all(), EMERGENCIES, root["query"])[
+            : root["first"]
+        ]
+
+    def resolve_providers(root, info):
+        queryset = with_current_emergency(info, Provider.objects.all())
+        return search(queryset, PROVIDERS, root["query"])[: root["first"]]
+
+    def resolve_users(root, info):
+        return search(User.objects.all(), USERS, root["query"])[: root["first"]]
+
+
+class HotspotType(DjangoObjectType):
+    class Meta:
+        model = Hotspot
+        fields = "__all__"
+
+
+def provider_services(queryset, services, service_match):
+    """Filter providers on the indexed service_mask (providers/services.py)"""
+    match = getattr(service_match, "value", service_match)
+    try:
+        return filter_services(queryset, services, match_all=match == "all")
+    except ValueError as e:
+        raise GraphQLError(str(e)) from e
+
+
 class Query(graphene.ObjectType):
-    emergencies = graphene.List(EmergencyType)
-    providers = graphene.List(ProviderType)
+    emergencies = graphene.List(
+        EmergencyType,
+        status=graphene.String(),
+        first=graphene.Int(),
+        include_duplicates=graphene.Boolean(default_value=False),
+    )
+    providers = graphene.List(
+        ProviderType,
+        services=graphene.List(graphene.NonNull(graphene.String)),
+        service_match=ServiceMatch(default_value="any"),
+    )
+    nearest_providers = graphene.List(
+        ProviderType,
+        latitude=graphene.Float(required=True),
+        longitude=graphene.Float(required=True),
+        radius_km=graphene.Float(default_value=10),
+        scheduled_at=graphene.DateTime(),
+        services=graphene.List(graphene.NonNull(graphene.String)),
+        service_match=ServiceMatch(default_value="any"),
+        first=graphene.Int(default_value=20),
+    )
+    response_time_stats = graphene.List(
+        ResponseTimeStatsType,
+        metric=ResponseTimeMetric(required=True),
+        since=graphene.DateTime(required=True),
+        until=graphene.DateTime(required=True),
+        city=graphene.String(),
+        emergency_type=graphene.String(),
+        group_by=ResponseTimeGroup(),
+    )
+    hotspots = graphene.List(HotspotType, since=graphene.DateTime())
+    search = graphene.Field(
+        SearchResultsType,
+        query=graphene.String(required=True),
+        first=graphene.Int(default_value=20),
+    )
+    emergency_heatmap = graphene.List(
+        HeatmapCellType,
+        precision=graphene.Int(required=True),
+        since=graphene.DateTime(),
+        until=graphene.DateTime(),
+        status=graphene.String(),
+        emergency_type=graphene.String(),
+        prefix=graphene.String(),
+    )
+
+    def resolve_emergencies(
+        self, info, status=None, first=None, include_duplicates=False
+    ):
+        queryset = Emergency.objects.all()
+        if selects_any(info, DETAIL_FIELDS):
+            queryset = queryset.select_related("details")
+        if selects_any(info, {"files"}):
+            queryset = queryset.prefetch_related("files")
+        if not include_duplicates:
+            # Duplicate reports are handled through their parent incident
+            queryset = queryset.filter(parent__isnull=True)
+        if status:
+            queryset = queryset.filter(status=status)
+        if first is not None:
+            queryset = queryset[:first]
+        return queryset
+
+    def resolve_providers(self, info, services=None, service_match="any"):
+        queryset = with_current_emergency(info, Provider.objects.all())
+        return provider_services(queryset, services, service_match)
+
+    def resolve_nearest_providers(
+        self,
+        info,
+        latitude,
+        longitude,
+        radius_km,
+        scheduled_at=None,
+        services=None,
+        service_match="any",
+        first=20,
+    ):
+        queryset = provider_services(
+            with_current_emergency(info, Provider.objects.filter(is_active=True)),
+            services,
+            service_match,
+        )
+        queryset = within_radius(
+            queryset,
+            latitude,
+            longitude,
+            radius_km,
+            lat_field="live__latitude",
+            lng_field="live__longitude",
+        )
+        if scheduled_at is not None:
+            # Bit test on the compiled schedule (providers/availability.py)
+            queryset = filter_scheduled(queryset, scheduled_at)
+        return queryset.order_by("distance_km")[:first]
 
-    def resolve_emergencies(self, info):
-        return Emergency.objects.all()
+    @staff_member_required
+    def resolve_response_time_stats(
+        self, info, metric, since, until, group_by=None, **filters
+    ):
+        # Served from hourly sketches (analytics/rollups.py), not emergencies
+        rows = response_time_stats(
+            metric.value,
+            since,
+            until,
+            group_by=group_by.value if group_by else None,
+            **filters,
+        )
+        return [ResponseTimeStatsType(**row) for row in rows]
 
-    def resolve_providers(self, info):
-        return Provider.objects.all()
+    @staff_member_required
+    def resolve_hotspots(self, info, since=None):
+        # Defaults to the ones from the last hour
+        since = since or timezone.now() - timedelta(hours=1)
+        return Hotspot.objects.filter(detected_at__gte=since).order_by("-detected_at")
+
+    @staff_member_required
+    def resolve_search(self, info, query, first):
+        # Full-text and trigram indexed on PostgreSQL (config/search.py)
+        return {"query": query, "first": first}
+
+    @staff_member_required
+    def resolve_emergency_heatmap(self, info, precision, **filters):
+        try:
+            cells = heatmap(precision, **filters)
+        except ValueError as e:
+            raise GraphQLError(str(e)) from e
+        return [HeatmapCellType(**cell) for cell in cells]
 
 
 class CreateEmergency(graphene.Mutation):
@@ -71,16 +374,264 @@ class CreateEmergency(graphene.Mutation):
             e.message = f"User with ID {user_id} does not exist"
             raise
 
-        emergency = Emergency.objects.create(
-            user=user,
-            emergency_type=emergency_type,
-            latitude=latitude,
-            longitude=longitude,
-            description=description or "",
-        )
+        with transaction.atomic():
+            # Reports of an incident that is already open attach to it
+            parent_id = find_parent(emergency_type, latitude, longitude)
+            emergency = Emergency.objects.create(
+                user=user,
+                emergency_type=emergency_type,
+                latitude=latitude,
+                longitude=longitude,
+                description=description or "",
+                parent_id=parent_id,
+            )
+            publish(
+                "emergency.created",
+                emergency,
+                emergency.event_payload(
+                    parent_id=str(parent_id) if parent_id else None
+                ),
+            )
         return CreateEmergency(emergency=emergency)
 
 
+def get_provider(info):
+    """Provider profile of the authenticated user"""
+    try:
+        # Not user.provider_profile, which wouldn't join the live state
+        return Provider.objects.get(user=info.context.user)
+    except Provider.DoesNotExist:
+        raise GraphQLError("Only providers can perform this action") from None
+
+
+class UpdateProviderLocation(graphene.Mutation):
+    class Arguments:
+        latitude = graphene.Float(required=True)
+        longitude = graphene.Float(required=True)
+
+    provider = graphene.Field(ProviderType)
+
+    @login_required
+    def mutate(self, info, latitude, longitude):
+        provider = get_provider(info)
+        provider.latitude = latitude
+        provider.longitude = longitude
+        provider.last_ping = timezone.now()
+        provider.save(update_fields=["latitude", "longitude", "last_ping"])
+        return UpdateProviderLocation(provider=provider)
+
+
+class UpdateProviderStatus(graphene.Mutation):
+    class Arguments:
+        status = graphene.String(required=True)
+
+    provider = graphene.Field(ProviderType)
+
+    @login_required
+    def mutate(self, info, status):
+        if status not in dict(Provider.STATUS_CHOICES):
+            raise GraphQLError(f"Unknown provider status {status}")
+        provider = get_provider(info)
+        provider.set_status(status)
+        return UpdateProviderStatus(provider=provider)
+
+
+class AcceptEmergency(graphene.Mutation):
+    class Arguments:
+        emergency_id = graphene.UUID(required=True)
+
+    emergency = graphene.Field(EmergencyType)
+
+    @login_required
+    def mutate(self, info, emergency_id):
+        provider = get_provider(info)
+        with transaction.atomic():
+            emergency = (
+                Emergency.objects.select_for_update().filter(id=emergency_id).first()
+            )
+            if emergency is None or emergency.status != "PENDING":
+                raise GraphQLError("Emergency is no longer pending")
+            if emergency.parent_id:
+                raise GraphQLError(f"Emergency is a duplicate of {emergency.parent_id}")
+            emergency.transition_to("DISPATCHED", provider=provider)
+            provider.set_status("IN_EMERGENCY", current_emergency_id=emergency.id)
+        return AcceptEmergency(emergency=emergency)
+
+
+class UpdateEmergencyStatus(graphene.Mutation):
+    class Arguments:
+        emergency_id = graphene.UUID(required=True)
+        status = graphene.String(required=True)
+
+    emergency = graphene.Field(EmergencyType)
+
+    @login_required
+    def mutate(self, info, emergency_id, status):
+        if status not in ("EN_ROUTE", "ON_SITE", "RESOLVED", "CANCELLED"):
+            raise GraphQLError(f"Cannot move an emergency to {status}")
+        provider = get_provider(info)
+        with transaction.atomic():
+            emergency = (
+                Emergency.objects.select_for_update()
+                .filter(id=emergency_id, provider=provider)
+                .first()
+            )
+            if emergency is None:
+                raise GraphQLError("Emergency is not assigned to you")
+            if status not in Emergency.PROVIDER_TRANSITIONS.get(emergency.status, ()):
+                raise GraphQLError(
+                    f"Cannot move an emergency from {emergency.status} to {status}"
+                )
+            emergency.transition_to(status)
+            if status in ("RESOLVED", "CANCELLED"):
+                provider.set_status("AVAILABLE", current_emergency_id=None)
+        return UpdateEmergencyStatus(emergency=emergency)
+
+
+class RateEmergency(graphene.Mutation):
+    """Reporter's 1-5 star rating of the provider, once per emergency"""
+
+    class Arguments:
+        emergency_id = graphene.UUID(required=True)
+        rating = graphene.Int(required=True)
+
+    emergency = graphene.Field(EmergencyType)
+
+    @login_required
+    def mutate(self, info, emergency_id, rating):
+        if not 1 <= rating <= 5:
+            raise GraphQLError("Rating must be between 1 and 5")
+        with transaction.atomic():
+            emergency = (
+                Emergency.objects.select_for_update()
+                .filter(id=emergency_id, user=info.context.user)
+                .first()
+            )
+            if emergency is None or emergency.status != "RESOLVED":
+                raise GraphQLError("Only your resolved emergencies can be rated")
+            if emergency.provider_rating is not None:
+                raise GraphQLError("Emergency was already rated")
+            emergency.provider_rating = rating
+            emergency.save(update_fields=["provider_rating"])
+            publish(
+                "emergency.rated", emergency, emergency.event_payload(rating=rating)
+            )
+        return RateEmergency(emergency=emergency)
+
+
+class UpdateMyLocation(graphene.Mutation):
+    class Arguments:
+        latitude = graphene.Float(required=True)
+        longitude = graphene.Float(required=True)
+
+    ok = graphene.Boolean()
+
+    @login_required
+    def mutate(self, info, latitude, longitude):
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise GraphQLError("Coordinates out of range")
+        user = info.context.user
+        user.set_location(latitude, longitude)
+        user.save(
+            update_fields=[
+                "latitude",
+                "longitude",
+                "last_known_location",
+                "location_updated_at",
+            ]
+        )
+        return UpdateMyLocation(ok=True)
+
+
+# Wider alerts go through the operators, not the app
+MAX_BROADCAST_RADIUS_KM = 50
+
+
+class BroadcastAreaAlert(graphene.Mutation):
+    """Push an alert to every citizen within radius_km of a point"""
+
+    class Arguments:
+        latitude = graphene.Float(required=True)
+        longitude = graphene.Float(required=True)
+        radius_km = graphene.Float(required=True)
+        title = graphene.String(required=True)
+        body = graphene.String()
+        emergency_id = graphene.UUID()
+
+    notification_id = graphene.ID()
+
+    @staff_member_required
+    def mutate(
+        self, info, latitude, longitude, radius_km, title, body="", emergency_id=None
+    ):
+        if not 0 < radius_km <= MAX_BROADCAST_RADIUS_KM:
+            raise GraphQLError(
+                f"radiusKm must be between 0 and {MAX_BROADCAST_RADIUS_KM}"
+            )
+        emergency = None
+        if emergency_id is not None:
+            emergency = Emergency.objects.filter(id=emergency_id).first()
+            if emergency is None:
+                raise GraphQLError(f"Emergency {emergency_id} does not exist")
+        # Only the event is written here; notification_worker finds recipients
+        event = broadcast_area_alert(
+            latitude, longitude, radius_km, title, body=body, emergency=emergency
+        )
+        return BroadcastAreaAlert(notification_id=event.id)
+
+
+BulkIds = graphene.List(graphene.NonNull(graphene.UUID), required=True)
+
+
+class CancelEmergencies(graphene.Mutation):
+    """Cancel open emergencies set-wise (emergencies/bulk.py)
+
+    Selections past OUTBOX["JOB_INLINE_LIMIT"] are queued for the outbox
+    relay and reported in `queued` instead.
+    """
+
+    class Arguments:
+        ids = BulkIds
+
+    cancelled = graphene.Int()
+    queued = graphene.Int()
+
+    @staff_member_required
+    def mutate(self, info, ids):
+        cancelled, queued = emergency_bulk.cancel(ids, info.context.user)
+        return CancelEmergencies(cancelled=cancelled, queued=queued)
+
+
+class VerifyProviders(graphene.Mutation):
+    """Mark providers verified set-wise (providers/bulk.py)"""
+
+    class Arguments:
+        ids = BulkIds
+
+    verified = graphene.Int()
+    queued = graphene.Int()
+
+    @staff_member_required
+    def mutate(self, info, ids):
+        verified, queued = provider_bulk.verify(ids, info.context.user)
+        return VerifyProviders(verified=verified, queued=queued)
+
+
+class SetProvidersOffline(graphene.Mutation):
+    """Force providers OFFLINE set-wise (providers/bulk.py)"""
+
+    class Arguments:
+        ids = BulkIds
+
+    changed = graphene.Int()
+    queued = graphene.Int()
+
+    @staff_member_required
+    def mutate(self, info, ids):
+        changed, queued = provider_bulk.set_offline(ids, info.context.user)
+        return SetProvidersOffline(changed=changed, queued=queued)
+
+
 class CreateUser(graphene.Mutation):
     user = graphene.Field(UserType)
 
@@ -102,11 +653,48 @@ class CreateUser(graphene.Mutation):
         return CreateUser(user=user)
 
 
+class StartAttachmentUpload(graphene.Mutation):
+    """Open a resumable upload of a file to attach to an emergency"""
+
+    class Arguments:
+        emergency_id = graphene.UUID(required=True)
+        filename = graphene.String(required=True)
+        content_type = graphene.String(required=True)
+        size = graphene.Int(required=True)
+        sha256 = graphene.String()
+
+    upload = graphene.Field(AttachmentUploadType)
+
+    @login_required
+    def mutate(self, info, emergency_id, filename, content_type, size, sha256=None):
+        emergency = (
+            Emergency.objects.select_related("provider").filter(id=emergency_id).first()
+        )
+        try:
+            upload = uploads.start_upload(
+                emergency, info.context.user, filename, content_type, size, sha256
+            )
+        except uploads.UploadError as e:
+            raise GraphQLError(str(e)) from e
+        return StartAttachmentUpload(upload=upload)
+
+
 class Mutation(graphene.ObjectType):
     token_auth = ObtainJSONWebToken.Field()
     verify_token = graphql_jwt.Verify.Field()
     refresh_token = graphql_jwt.Refresh.Field()
     create_emergency = CreateEmergency.Field()
+    update_provider_location = UpdateProviderLocation.Field()
+    update_provider_status = UpdateProviderStatus.Field()
+    accept_emergency = AcceptEmergency.Field()
+    update_emergency_status = UpdateEmergencyStatus.Field()
+    rate_emergency = RateEmergency.Field()
+    update_my_location = UpdateMyLocation.Field()
+    broadcast_area_alert = BroadcastAreaAlert.Field()
+    start_attachment_upload = StartAttachmentUpload.Field()
+    cancel_emergencies = CancelEmergencies.Field()
+    verify_providers = VerifyProviders.Field()
+    set_providers_offline = SetProvidersOffline.Field()
 
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
@@ -0,0 +1,189 @@
+# backend/config/search.py
+"""
+Indexed search over emergencies, users and providers.
+
+icontains compiles to UPPER(column) LIKE UPPER('%term%'), which no index can
+serve, so every admin search keystroke scanned the table. On PostgreSQL,
+search() matches instead:
+
+- prose (descriptions, addresses, names) as a full-text document against
+  the search words as prefixes, so "jo cruz" finds "Jose dela Cruz" while
+  it is being typed. The 'simple' configuration doesn't stem: reports mix
+  English, Filipino and place names. Served by a GIN expression index.
+- identifiers (codes, emails, phone and plate numbers) with ILIKE
+  '%term%', served by pg_trgm GIN indexes.
+
+and ranks matches by ts_rank plus trigram similarity. The document
+expressions built here must stay identical to the ones in the
+*_search_indexes migrations, or the planner can't use those indexes.
+
+Other backends fall back to icontains on every word, unranked.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+TS_CONFIG = "simple"
+WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    table: str
+    # Columns of the full-text document
+    document: tuple = ()
+    # Columns matched as substrings through trigram indexes
+    trigram: tuple = ()
+    # (foreign key, SearchSpec): rows whose related row matches also match
+    related: tuple = ()
+
+
+USERS = SearchSpec(
+    "users",
+    document=("first_name", "last_name"),
+    trigram=("username", "email", "phone"),
+)
+EMERGENCIES = SearchSpec(
+    "emergencies",
+    document=("description", "address", "city"),
+    trigram=("code",),
+    related=(("user", USERS),),
+)
+PROVIDERS = SearchSpec(
+    "providers",
+    trigram=("license_number", "vehicle_number"),
+    related=(("user", USERS),),
+)
+
+
+def document_sql(spec, alias=None):
+    quote = connection.ops.quote_name
+    prefix = f"{quote(alias)}." if alias else ""
+    columns = " || ' ' || ".join(
+        f"coalesce({prefix}{quote(column)}, '')" for column in spec.document
+    )
+    return f"to_tsvector('{TS_CONFIG}', {columns})"
+
+
+def prefix_query(words):
+    """to_tsquery() text requiring every word as a prefix"""
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def match_ids(spec, words, term):
+    """Subquery of the ids of rows of `spec.table` matching the search"""
+    quote = connection.ops.quote_name
+    conditions, params = [], []
+    if spec.document:
+        conditions.append(f"{document_sql(spec)} @@ to_tsquery('{TS_CONFIG}', %s)")
+        params.append(prefix_query(words))
+    for column in spec.trigram:
+        conditions.append(f"{quote(column)} ILIKE %s")
+        params.append(like_pattern(term))
+    where = " OR ".join(conditions)
+    return RawSQL(f"SELECT id FROM {quote(spec.table)} WHERE {where}", params)
+
+
+def rank_sql(spec, alias, words, term):
+    """SQL scoring how well the row aliased `alias` matches, with its params"""
+    quote = connection.ops.quote_name
+    parts, params = [], []
+    if spec.document:
+        parts.append(
+            f"ts_rank({document_sql(spec, alias)}, to_tsquery('{TS_CONFIG}', %s))"
+        )
+        params.append(prefix_query(words))
+    for column in spec.trigram:
+        parts.append(f"similarity({quote(alias)}.{quote(column)}, %s)")
+        params.append(term)
+    for field, related in spec.related:
+        inner = f"{alias}_{field}"
+        sql, related_params = rank_sql(related, inner, words, term)
+        parts.append(
+            f"coalesce((SELECT {sql} FROM {quote(related.table)} {quote(inner)} "
+            f"WHERE {quote(inner)}.id = {quote(alias)}.{quote(field + '_id')}), 0)"
+        )
+        params.extend(related_params)
+    return " + ".join(parts), params
+
+
+def fallback_filter(spec, words, prefix=""):
+    """Every word in some column, for backends without the indexes"""
+    columns = spec.document + spec.trigram
+    condition = Q()
+    for word in words:
+        any_column = Q()
+        for column in columns:
+            any_column |= Q(**{f"{prefix}{column}__icontains": word})
+        for field, related in spec.related:
+            any_column |= fallback_filter(related, [word], f"{prefix}{field}__")
+        condition &= any_column
+    return condition
+
+
+def search(queryset, spec, term):
+    """Rows of `queryset` matching `term`, annotated with `rank`, best first
+
+    `queryset` must be over `spec.table`, unaliased (not a subquery).
+    """
+    term = term.strip()
+    words = WORD.findall(term)
+    if not words:
+        return queryset.none()
+    if connection.vendor != "postgresql":
+        return queryset.filter(fallback_filter(spec, words)).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+
+    condition = Q(pk__in=match_ids(spec, words, term))
+    for field, related in spec.related:
+        condition |= Q(**{f"{field}__in": match_ids(related, words, term)})
+    rank, params = rank_sql(spec, spec.table, words, term)
+    return (
+        queryset.filter(condition)
+        .annotate(rank=RawSQL(rank, params, output_field=FloatField()))
+        .order_by("-rank")
+    )
+
+
+class SearchChangeList(ChangeList):
+    """ChangeList ordering search results best first
+
+    The admin orders after searching, which would replace search()'s order
+    by rank. Unless a column header was clicked, rank goes first and the
+    admin's ordering only breaks ties (all of them on the icontains
+    fallback, where rank is 0).
+    """
+
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        if WORD.search(self.query) and ORDER_VAR not in self.params:
+            return ["-rank", *ordering]
+        return ordering
+
+
+class IndexedSearchMixin:
+    """ModelAdmin search through search() rather than icontains
+
+    search_fields still has to be set for the changelist to show the box.
+    """
+
+    search_spec = None
+
+    def get_changelist(self, request, **kwargs):
+        return SearchChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search(queryset, self.search_spec, search_term), False
@@ -42,13 +42,17 @@ INSTALLED_APPS = [
     # 'emergencies',  # Add this
     # 'providers',    # Add this if exists
     # 'users',        # Add this if exists
-    "notifications",  # Add this if exists
+    "notifications.apps.NotificationsConfig",
     "users.apps.UsersConfig",
     "providers.apps.ProvidersConfig",
     "emergencies.apps.EmergenciesConfig",
+    "monitoring.apps.MonitoringConfig",
+    "outbox.apps.OutboxConfig",
+    "analytics.apps.AnalyticsConfig",
     # Third party apps
     "graphene_django",  # If using GraphQL
     "graphql_jwt",
+    "graphql_jwt.refresh_token.apps.RefreshTokenConfig",  # Long running refresh tokens
     "corsheaders",
     "debug_toolbar",
 ]
@@ -108,15 +112,115 @@ DATABASES = {
     }
 }
 
+# SQLite stand-in for benchmarks and local runs without PostgreSQL
+if os.environ.get("DB_ENGINE") == "sqlite":
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+    }
+
 # Add to settings.py for debugging
 GRAPHENE = {
     "SCHEMA": "config.schema.schema",
     "MIDDLEWARE": [
-        "graphene_django.debug.DjangoDebugMiddleware",
+        # Wraps every cursor on every request, so only in development
+        *(["graphene_django.debug.DjangoDebugMiddleware"] if DEBUG else []),
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "monitoring.profiling.ResolverProfilerMiddleware",
     ],
 }
 
+# Per-resolver query/timing profiles (see monitoring/profiling.py)
+GRAPHQL_PROFILING = {
+    "SAMPLE_RATE": float(os.environ.get("GRAPHQL_PROFILE_SAMPLE_RATE", "0.01")),
+    "DEBUG_HEADER": "X-GraphQL-Profile",
+}
+
+# Prometheus labels (see monitoring/metrics.py). Other operations are
+# labelled by their first root field.
+METRICS = {
+    "OPERATION_NAMES": ["DashboardStats"],
+    # /metrics answers the bearer token or these addresses/networks only
+    "TOKEN": os.environ.get("METRICS_TOKEN", ""),
+    "ALLOWED_IPS": os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(","),
+}
+
+# Slow operations are captured with EXPLAIN plans into a bounded table
+SLOW_OPERATIONS = {
+    "THRESHOLD_MS": int(os.environ.get("SLOW_OPERATION_THRESHOLD_MS", "500")),
+    "RING_SIZE": 200,
+    "EXPLAIN_STATEMENTS": 3,
+}
+
+# Push fan-out (see notifications/pipeline.py)
+NOTIFICATIONS = {
+    "TRANSPORT": os.environ.get(
+        "NOTIFICATION_TRANSPORT", "notifications.transports.ConsoleTransport"
+    ),
+    "BATCH_SIZE": 500,
+    "MAX_ATTEMPTS": 5,
+}
+
+# Streaming hotspot detection (see analytics/hotspots.py)
+HOTSPOTS = {
+    "PRECISION": 6,  # cells of about 1.2 x 0.6 km
+    "WINDOW_SECONDS": 900,
+    "THRESHOLDS": [5, 10, 25, 50],
+}
+
+# Provider schedules are wall-clock times here (see providers/availability.py)
+SCHEDULES = {
+    "TIME_ZONE": os.environ.get("SCHEDULE_TIME_ZONE", "Asia/Manila"),
+}
+
+# Duplicate-report detection at ingest (see emergencies/dedup.py)
+DEDUP = {
+    "RADIUS_M": int(os.environ.get("DEDUP_RADIUS_M", 150)),
+    "WINDOW_SECONDS": int(os.environ.get("DEDUP_WINDOW_SECONDS", 900)),
+}
+
+# Resumable attachment uploads (see emergencies/uploads.py)
+ATTACHMENTS = {
+    "CHUNK_SIZE": 1024 * 1024,
+    "MAX_SIZE": int(os.environ.get("ATTACHMENT_MAX_SIZE", 25 * 1024 * 1024)),
+    "CONTENT_TYPES": [
+        "image/jpeg",
+        "image/png",
+        "image/webp",
+        "image/heic",
+        "video/mp4",
+        "audio/mpeg",
+        "audio/mp4",
+    ],
+    # Unfinished uploads idle this long are purged (purge_uploads)
+    "EXPIRE_SECONDS": 24 * 3600,
+    "THUMBNAIL_PX": 320,
+}
+
+# Address and city of new reports from an offline gazetteer (see
+# config/geocoding.py)
+GEOCODING = {
+    "GAZETTEER": os.environ.get(
+        "GAZETTEER_PATH", BASE_DIR / "config" / "data" / "gazetteer.csv"
+    ),
+    "MAX_DISTANCE_KM": float(os.environ.get("GEOCODING_MAX_DISTANCE_KM", 30)),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "emergencies": {"handlers": ["console"], "level": "INFO"},
+        "monitoring": {"handlers": ["console"], "level": "INFO"},
+        "notifications": {"handlers": ["console"], "level": "INFO"},
+        "outbox": {"handlers": ["console"], "level": "INFO"},
+        "providers": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
@@ -156,6 +260,24 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = "static/"
+MEDIA_URL = "media/"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    # Emergency attachments; point ATTACHMENT_STORAGE at an object store
+    # backend (e.g. django-storages' S3Storage) outside development
+    "attachments": {
+        "BACKEND": os.environ.get(
+            "ATTACHMENT_STORAGE", "django.core.files.storage.FileSystemStorage"
+        ),
+        "OPTIONS": {
+            "location": os.environ.get(
+                "ATTACHMENT_LOCATION", os.path.join(BASE_DIR, "media")
+            ),
+        },
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -0,0 +1,425 @@
+import json
+import math
+import threading
+import time
+import uuid
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from config import uuids
+from config.fields import code_case
+from config.geo import KM_PER_DEGREE, bounding_box, haversine_km, within_radius
+from config.geocoding import Place, ReverseGeocoder
+from config.pagination import EstimatedCountPaginator
+from config.search import EMERGENCIES, USERS, fallback_filter, search
+from config.uuids import uuid7
+from emergencies.models import Emergency
+from notifications import pipeline
+from notifications.models import NotificationBatch
+from users.models import User
+from users.testing import make_user
+
+
+class EnumFieldTests(TestCase):
+    """Smallint storage behind the same string interface"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("reporter", user_type="PROVIDER")
+        cls.fire = Emergency.objects.create(
+            user=cls.user,
+            emergency_type="FIRE",
+            priority="RED",
+            latitude=14.6,
+            longitude=121.0,
+        )
+        cls.medical = Emergency.objects.create(
+            user=cls.user,
+            emergency_type="MEDICAL",
+            status="RESOLVED",
+            latitude=14.6,
+            longitude=121.0,
+        )
+
+    def test_stored_as_choice_positions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT emergency_type, priority, status FROM emergencies WHERE id = %s",
+                [Emergency._meta.pk.get_db_prep_value(self.fire.pk, connection)],
+            )
+            self.assertEqual(cursor.fetchone(), (1, 0, 0))
+
+    def test_round_trip(self):
+        fire = Emergency.objects.get(pk=self.fire.pk)
+        self.assertEqual(
+            (fire.emergency_type, fire.priority, fire.status),
+            ("FIRE", "RED", "PENDING"),
+        )
+        self.assertEqual(fire.get_priority_display(), "Critical - Immediate response")
+        self.assertEqual(User.objects.get(pk=self.user.pk).user_type, "PROVIDER")
+
+    def test_lookups_take_string_values(self):
+        self.assertEqual(list(Emergency.objects.filter(status="PENDING")), [self.fire])
+        self.assertEqual(
+            Emergency.objects.filter(status__in=["PENDING", "RESOLVED"]).count(), 2
+        )
+        self.assertEqual(
+            Emergency.objects.exclude(emergency_type="FIRE").get(), self.medical
+        )
+        self.assertEqual(
+            sorted(Emergency.objects.values_list("emergency_type", flat=True)),
+            ["FIRE", "MEDICAL"],
+        )
+        self.assertEqual(
+            Emergency.objects.filter(pk=self.fire.pk).values("status").get(),
+            {"status": "PENDING"},
+        )
+
+    def test_updates_take_string_values(self):
+        Emergency.objects.filter(pk=self.fire.pk).update(status="DISPATCHED")
+        self.fire.refresh_from_db()
+        self.assertEqual(self.fire.status, "DISPATCHED")
+
+    def test_ordering_follows_choice_order(self):
+        # MEDICAL comes before FIRE in EMERGENCY_TYPES
+        self.assertEqual(
+            list(
+                Emergency.objects.order_by("emergency_type").values_list(
+                    "emergency_type", flat=True
+                )
+            ),
+            ["MEDICAL", "FIRE"],
+        )
+
+    def test_unknown_values_match_nothing(self):
+        self.assertFalse(Emergency.objects.filter(status="pending"))
+        self.assertFalse(Emergency.objects.filter(status=["PENDING"]))
+        self.assertEqual(
+            list(Emergency.objects.filter(status__in=["LOST", "PENDING"])), [self.fire]
+        )
+        self.assertEqual(Emergency.objects.exclude(status="LOST").count(), 2)
+        response = self.client.post(
+            "/graphql/",
+            json.dumps({"query": '{ emergencies(status: "pending") { id } }'}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"data": {"emergencies": []}})
+
+    def test_unknown_values_are_not_saved(self):
+        with self.assertRaises(ValueError):
+            Emergency.objects.filter(pk=self.fire.pk).update(status="LOST")
+        self.fire.status = "LOST"
+        with self.assertRaises(ValueError):
+            self.fire.save()
+        field = Emergency._meta.get_field("status")
+        with self.assertRaises(ValidationError):
+            field.clean("LOST", self.fire)
+        self.assertEqual(field.clean("ON_SITE", self.fire), "ON_SITE")
+
+    def test_legacy_strings_map_to_codes(self):
+        Emergency.objects.filter(pk=self.fire.pk).update(city="fire truck")
+        Emergency.objects.filter(pk=self.medical.pk).update(city="Medical")
+        rows = Emergency.objects.annotate(
+            type_code=code_case(
+                "city",
+                Emergency.EMERGENCY_TYPES,
+                "OTHER",
+                aliases={"fire truck": "FIRE"},
+            ),
+        ).order_by("priority")
+        self.assertEqual([row.type_code for row in rows], [1, 0])
+        self.assertEqual(
+            Emergency.objects.annotate(
+                type_code=code_case("address", Emergency.EMERGENCY_TYPES, "OTHER")
+            )
+            .values_list("type_code", flat=True)
+            .distinct()
+            .get(),
+            6,
+        )
+
+
+class UUID7Tests(SimpleTestCase):
+    def test_version_variant_and_timestamp(self):
+        before = time.time_ns() // 1_000_000
+        key = uuid7()
+        after = time.time_ns() // 1_000_000
+        self.assertEqual(key.version, 7)
+        self.assertEqual(key.variant, uuid.RFC_4122)
+        self.assertTrue(before <= key.int >> 80 <= after)
+        self.assertEqual(uuid.UUID(str(key)), key)
+
+    def test_keys_made_in_a_row_are_increasing(self):
+        keys = [uuid7() for _ in range(10_000)]
+        self.assertEqual(keys, sorted(set(keys)))
+        # Also as strings, which is how some backends and clients sort them
+        self.assertEqual([str(k) for k in keys], sorted(str(k) for k in keys))
+
+    def test_clock_stepping_back_keeps_order(self):
+        first = uuid7()
+        with mock.patch("time.time_ns", return_value=(first.int >> 80) * 10**6 - 10**9):
+            second = uuid7()
+        self.assertGreater(second, first)
+        self.assertEqual(second.int >> 80, first.int >> 80)
+
+    def test_random_overflow_moves_to_the_next_millisecond(self):
+        first = uuid7()
+        ms = first.int >> 80
+        with mock.patch.object(uuids, "_last_random", (1 << uuids.RANDOM_BITS) - 1):
+            with mock.patch("time.time_ns", return_value=ms * 10**6):
+                second = uuid7()
+        self.assertEqual(second.int >> 80, ms + 1)
+        self.assertGreater(second, first)
+
+    def test_threads_never_share_a_key(self):
+        keys = []
+
+        def make():
+            keys.extend(uuid7() for _ in range(2_000))
+
+        threads = [threading.Thread(target=make) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(keys)), 8_000)
+
+
+class TimeOrderedKeyTests(TestCase):
+    def test_new_rows_sort_after_older_ones(self):
+        users = [make_user(f"user{i}") for i in range(20)]
+        emergencies = [
+            Emergency.objects.create(
+                user=user, emergency_type="FIRE", latitude=14.6, longitude=121.0
+            )
+            for user in users
+        ]
+        self.assertEqual(
+            list(User.objects.order_by("pk").filter(pk__in=[u.pk for u in users])),
+            users,
+        )
+        self.assertEqual(list(Emergency.objects.order_by("pk")), emergencies)
+
+
+class ReverseGeocoderTests(SimpleTestCase):
+    def geocoder(self, *places, max_distance_km=30.0):
+        return ReverseGeocoder(
+            [
+                Place(name, city, "Province", lat, lng)
+                for name, city, lat, lng in places
+            ],
+            max_distance_km=max_distance_km,
+            precision=3,
+            cache_size=100,
+        )
+
+    def test_nearest_place_within_range(self):
+        geocoder = self.geocoder(
+            ("Ermita", "Manila", 14.5832, 120.9850),
+            ("Tondo", "Manila", 14.6190, 120.9680),
+            ("Cebu City", "Cebu City", 10.3157, 123.8854),
+        )
+        self.assertEqual(geocoder.nearest(14.585, 120.98).name, "Ermita")
+        self.assertEqual(geocoder.nearest(14.62, 120.96).name, "Tondo")
+        self.assertIsNone(geocoder.nearest(12.0, 122.0))
+
+    def test_places_across_grid_cells_and_the_antimeridian(self):
+        geocoder = self.geocoder(
+            ("Below", "A", 14.49, 121.0),
+            ("Taveuni", "B", -16.8, 179.99),
+            max_distance_km=50,
+        )
+        # Nearest place is in the grid cell south of the point
+        self.assertEqual(geocoder.nearest(14.51, 121.0).name, "Below")
+        self.assertEqual(geocoder.nearest(-16.8, -179.99).name, "Taveuni")
+
+    def test_address_skips_repeated_parts(self):
+        self.assertEqual(
+            Place("Manila", "Manila", "Metro Manila", 0, 0).address,
+            "Manila, Metro Manila",
+        )
+        self.assertEqual(Place("Ermita", "Manila", "", 0, 0).address, "Ermita, Manila")
+
+    def test_nearby_points_share_a_cached_lookup(self):
+        geocoder = self.geocoder(("Ermita", "Manila", 14.5832, 120.9850))
+        geocoder.lookup(14.58321, 120.98501)
+        geocoder.lookup(14.58319, 120.98504)
+        geocoder.lookup(14.59, 120.99)
+        info = geocoder.cached_nearest.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))
+
+
+class SearchTests(TestCase):
+    """search() and the admin changelists it backs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.jose = make_user("jdc", first_name="Jose", last_name="dela Cruz")
+        cls.maria = make_user("mcruz", first_name="Maria", last_name="Cruz")
+        cls.fire = Emergency.objects.create(
+            user=cls.jose,
+            emergency_type="FIRE",
+            description="Kitchen fire",
+            latitude=14.6,
+            longitude=121.0,
+        )
+
+    def test_every_word_must_match_some_column(self):
+        self.assertEqual(
+            list(search(User.objects.all(), USERS, "jo cruz")), [self.jose]
+        )
+        self.assertEqual(
+            set(search(User.objects.all(), USERS, " CRUZ ")), {self.jose, self.maria}
+        )
+        self.assertFalse(search(User.objects.all(), USERS, "!!!"))
+
+    def test_related_rows_match(self):
+        self.assertEqual(
+            list(search(Emergency.objects.all(), EMERGENCIES, "jose kitchen")),
+            [self.fire],
+        )
+        self.assertFalse(search(Emergency.objects.all(), EMERGENCIES, "maria"))
+        condition = fallback_filter(EMERGENCIES, ["jdc@example"])
+        self.assertEqual(list(Emergency.objects.filter(condition)), [self.fire])
+
+    def test_admin_orders_search_results_by_rank(self):
+        self.client.force_login(make_user("admin", is_staff=True, is_superuser=True))
+        url = reverse("admin:users_user_changelist")
+
+        def changelist(**params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            return response.context["cl"]
+
+        searched = changelist(q="cruz")
+        self.assertEqual(
+            searched.queryset.query.order_by[:2], ("-rank", "-date_joined")
+        )
+        self.assertEqual(set(searched.result_list), {self.jose, self.maria})
+
+        # Without a term, or with a column picked, the admin's ordering stands
+        for params in ({}, {"q": "cruz", "o": "1"}, {"q": "!!!"}):
+            with self.subTest(params=params):
+                order_by = changelist(**params).queryset.query.order_by
+                self.assertNotIn("-rank", order_by)
+
+
+class RadiusTests(TestCase):
+    """Bounding box plus exact haversine, across the poles and the antimeridian"""
+
+    def users_within(self, lat, lng, radius_km):
+        return set(
+            within_radius(User.objects.all(), lat, lng, radius_km).values_list(
+                "username", flat=True
+            )
+        )
+
+    def place(self, name, lat, lng, **extra):
+        return make_user(name, latitude=lat, longitude=lng, **extra)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(haversine_km(0, 0, 1, 0), KM_PER_DEGREE)
+        self.assertAlmostEqual(haversine_km(0, 179.5, 0, -179.5), KM_PER_DEGREE)
+        self.assertAlmostEqual(haversine_km(90, 0, 90, 123), 0)
+        # Manila to Cebu City
+        self.assertAlmostEqual(
+            haversine_km(14.5995, 120.9842, 10.3157, 123.8854), 570, delta=5
+        )
+
+    def test_bounding_box_clamps(self):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(89.9, 10, 50)
+        self.assertEqual((max_lat, min_lng, max_lng), (90.0, -180.0, 180.0))
+        self.assertLess(min_lat, 89.9)
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(0, 179.9, 50)
+        # Crosses the antimeridian: min_lng > max_lng
+        self.assertTrue(179 < min_lng < 179.9)
+        self.assertTrue(-180 < max_lng < -179)
+
+    def test_radius_boundary(self):
+        km = 1 / KM_PER_DEGREE
+        self.place("inside", 14.6 + 0.99 * km, 121.0)
+        self.place("outside", 14.6 + 1.01 * km, 121.0)
+        self.place("east", 14.6, 121.0 + 0.99 * km / math.cos(math.radians(14.6)))
+        self.assertEqual(self.users_within(14.6, 121.0, 1), {"inside", "east"})
+
+    def test_across_the_antimeridian_and_a_pole(self):
+        self.place("west", 0, -179.99)
+        self.place("far", 0, 179.0)
+        self.place("over_the_pole", 89.99, 180)
+        self.assertEqual(self.users_within(0, 179.99, 5), {"west"})
+        self.assertEqual(self.users_within(89.99, 0, 5), {"over_the_pole"})
+
+    def test_area_alert_reaches_nearby_citizens(self):
+        self.place("near", 14.6, 121.0, push_token="near")
+        self.place("far", 14.8, 121.0, push_token="far")
+        self.place("provider", 14.6, 121.0, push_token="p", user_type="PROVIDER")
+        self.place("inactive", 14.6, 121.0, push_token="x", is_active=False)
+
+        def broadcast(radius_km, user):
+            self.client.force_login(user)
+            return self.client.post(
+                "/graphql/",
+                json.dumps(
+                    {
+                        "query": "mutation($r: Float!) {"
+                        " broadcastAreaAlert(latitude: 14.6, longitude: 121.0,"
+                        ' radiusKm: $r, title: "Flood") { notificationId } }',
+                        "variables": {"r": radius_km},
+                    }
+                ),
+                content_type="application/json",
+            ).json()
+
+        staff = make_user("dispatcher", is_staff=True)
+        self.assertIn("errors", broadcast(10, make_user("citizen")))
+        self.assertIn("between 0 and 50", broadcast(0, staff)["errors"][0]["message"])
+        self.assertIn("between 0 and 50", broadcast(51, staff)["errors"][0]["message"])
+        self.assertNotIn("errors", broadcast(10, staff))
+
+        pipeline.expand_pending_events(batch_size=10)
+        self.assertEqual(
+            [t for batch in NotificationBatch.objects.all() for t in batch.tokens],
+            ["near"],
+        )
+
+
+@mock.patch("config.pagination.estimate_row_count", return_value=10)
+class EstimatedCountPaginatorTests(TestCase):
+    """Planner estimates for big unfiltered changelists, exact counts otherwise"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("a", "b", "c"):
+            make_user(name)
+
+    def paginator(self, queryset=None):
+        paginator = EstimatedCountPaginator(
+            queryset or User.objects.order_by("username"), 1
+        )
+        paginator.estimate_above = 5
+        return paginator
+
+    def test_estimate_above_the_threshold(self, estimate):
+        self.assertEqual(self.paginator().count, 10)
+        estimate.return_value = 4
+        self.assertEqual(self.paginator().count, 3)
+
+    def test_filtered_lists_are_counted(self, estimate):
+        paginator = self.paginator(User.objects.filter(username__gt="a"))
+        self.assertEqual(paginator.count, 2)
+        estimate.assert_not_called()
+
+    def test_empty_trailing_page_recounts(self, estimate):
+        paginator = self.paginator()
+        self.assertEqual([u.username for u in paginator.page(3)], ["c"])
+        self.assertEqual(paginator.num_pages, 10)
+
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+        self.assertEqual((paginator.count, paginator.num_pages), (3, 3))
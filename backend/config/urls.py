@@ -6,8 +6,10 @@ from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
 
+from emergencies import views as emergency_views
+from monitoring import views as monitoring_views
+from monitoring.profiling import ProfiledGraphQLView
 from providers.views import test_debug
 
 from . import views
@@ -49,9 +51,20 @@ urlpatterns = [
     # Dashboard (protected)
     path("dashboard/", views.staff_dashboard, name="staff_dashboard"),
     # GraphQL API
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema))),
+    path(
+        "graphql/",
+        csrf_exempt(ProfiledGraphQLView.as_view(graphiql=True, schema=schema)),
+    ),
+    # Resumable attachment uploads, opened by startAttachmentUpload
+    path(
+        "uploads/<uuid:upload_id>/",
+        emergency_views.upload_chunk,
+        name="attachment_upload",
+    ),
     # Health check
     path("health/", lambda request: HttpResponse("OK")),
+    # Prometheus scrape endpoint
+    path("metrics", monitoring_views.metrics, name="metrics"),
     # Keep old /login/ for compatibility (redirects to /accounts/login/)
     path("login/", lambda request: redirect("login")),
     path("__debug__/", include(debug_toolbar.urls)),
@@ -6,6 +6,7 @@ from django.db.models import Count, Q
 from django.shortcuts import redirect, render
 
 from emergencies.models import Emergency
+from monitoring.models import SlowOperation
 from providers.models import Provider
 from users.models import User
 
@@ -43,7 +44,7 @@ def staff_dashboard(request):
             created_at__date=datetime.now().date()
         ).count(),
         "active": Emergency.objects.filter(
-            status__in=["pending", "dispatched"]
+            status__in=["PENDING", "DISPATCHED"]
         ).count(),
     }
 
@@ -51,7 +52,7 @@ def staff_dashboard(request):
     provider_stats = {
         "total": Provider.objects.count(),
         "verified": Provider.objects.filter(is_verified=True).count(),
-        "available": Provider.objects.filter(status="AVAILABLE").count(),
+        "available": Provider.objects.filter(live__status="AVAILABLE").count(),
     }
 
     context = {
@@ -67,6 +68,7 @@ def staff_dashboard(request):
         # System stats
         "emergency_stats": emergency_stats,
         "provider_stats": provider_stats,
+        "slow_operations": SlowOperation.objects.all()[:10],
         # Current user info
         "current_user": request.user,
     }
@@ -1,10 +1,33 @@
 from django.contrib import admin
 
-from .models import Emergency
+from config.pagination import EstimatedCountPaginator
+from config.search import EMERGENCIES, IndexedSearchMixin
+
+from . import bulk
+from .models import Attachment, Emergency, EmergencyDetails
+
+
+class EmergencyDetailsInline(admin.StackedInline):
+    model = EmergencyDetails
+    can_delete = False
+    extra = 0
+
+
+class AttachmentInline(admin.TabularInline):
+    model = Attachment
+    fk_name = "emergency"
+    fields = ("filename", "content_type", "size", "uploaded_by", "created_at")
+    readonly_fields = fields
+    can_delete = False
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Emergency)
-class EmergencyAdmin(admin.ModelAdmin):
+class EmergencyAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    inlines = [EmergencyDetailsInline, AttachmentInline]
     list_display = (
         "user",
         "code",
@@ -20,4 +43,22 @@ class EmergencyAdmin(admin.ModelAdmin):
         "provider",
     )
     list_filter = ("status", "emergency_type", "priority")
-    search_fields = ("code", "address", "city", "user__email")
+    # Searched through the trigram and full-text indexes (config/search.py)
+    search_fields = ("code", "description", "address", "city", "user__email")
+    search_spec = EMERGENCIES
+
+    # Provider.__str__ reads the provider's user; join both in the page query
+    list_select_related = ("user", "provider__user")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ["cancel_selected"]
+
+    @admin.action(description="Cancel selected emergencies", permissions=["change"])
+    def cancel_selected(self, request, queryset):
+        ids = queryset.order_by().values_list("pk", flat=True).iterator()
+        cancelled, queued = bulk.cancel(ids, request.user)
+        if queued:
+            message = f"Queued {queued} emergencies for the outbox relay to cancel"
+        else:
+            message = f"Cancelled {cancelled} emergencies"
+        self.message_user(request, message)
@@ -0,0 +1,68 @@
+# backend/emergencies/bulk.py
+"""
+Set-wise emergency changes for admin actions and staff mutations.
+
+cancel_chunk() is Emergency.transition_to("CANCELLED") for a chunk of
+emergencies: one UPDATE of those still open, one for their open duplicate
+reports, one INSERT of their emergency.status_changed events, and their
+providers made available again. Large selections run from the relay
+(outbox/jobs.py).
+"""
+
+from django.db import transaction
+
+from emergencies.models import Emergency
+from outbox.jobs import run_chunked
+from outbox.publish import publish_many
+from providers.bulk import release_providers
+
+CLOSED = ("RESOLVED", "CANCELLED")
+# Read to build the event payloads
+PAYLOAD_FIELDS = (
+    "status",
+    "emergency_type",
+    "priority",
+    "user_id",
+    "provider_id",
+    "latitude",
+    "longitude",
+    "city",
+)
+
+
+def cancel_chunk(ids):
+    """Cancel the open emergencies among `ids`; returns how many"""
+    with transaction.atomic():
+        emergencies = list(
+            Emergency.objects.select_for_update()
+            .filter(pk__in=ids)
+            .exclude(status__in=CLOSED)
+            .only(*PAYLOAD_FIELDS)
+        )
+        if not emergencies:
+            return 0
+        pks = [emergency.pk for emergency in emergencies]
+        Emergency.objects.filter(pk__in=pks).update(status="CANCELLED")
+        # Duplicate reports close with their parent incident
+        Emergency.objects.filter(parent_id__in=pks).exclude(status__in=CLOSED).update(
+            status="CANCELLED"
+        )
+        events = []
+        for emergency in emergencies:
+            previous_status, emergency.status = emergency.status, "CANCELLED"
+            events.append(
+                (
+                    emergency,
+                    emergency.event_payload(
+                        previous_status=previous_status, stamped=[]
+                    ),
+                )
+            )
+        publish_many("emergency.status_changed", events)
+        release_providers(pks)
+    return len(pks)
+
+
+def cancel(ids, actor):
+    """Cancel emergencies; returns (cancelled, queued)"""
+    return run_chunked("emergency.bulk_cancel", ids, cancel_chunk, actor)
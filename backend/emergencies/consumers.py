@@ -0,0 +1,25 @@
+# backend/emergencies/consumers.py
+from emergencies.bulk import cancel_chunk
+from emergencies.geocoding import FIELDS, UNLOCATED, geocode_chunk
+from emergencies.models import Attachment, Emergency
+from emergencies.thumbnails import make_thumbnail
+from outbox.registry import consumer
+
+
+@consumer("emergencies.thumbnails", topics=["attachment.uploaded"])
+def thumbnail(event):
+    attachment = Attachment.objects.filter(pk=event.aggregate_id).first()
+    if attachment is not None:
+        make_thumbnail(attachment)
+
+
+@consumer("emergencies.bulk_cancel", topics=["emergency.bulk_cancel"], batched=False)
+def bulk_cancel(event):
+    cancel_chunk(event.payload["ids"])
+
+
+@consumer("emergencies.geocode", topics=["emergency.created"])
+def geocode(event):
+    geocode_chunk(
+        Emergency.objects.filter(UNLOCATED, pk=event.aggregate_id).only(*FIELDS)
+    )
@@ -0,0 +1,120 @@
+# backend/emergencies/dedup.py
+"""
+Duplicate-report detection at ingest.
+
+Many citizens report the same accident within minutes. Before a new
+emergency is inserted, `find_parent()` looks for an open, top-level
+emergency of the same type within DEDUP["RADIUS_M"] metres created in the
+last DEDUP["WINDOW_SECONDS"]. Candidates come from the geohash cells that
+the bounding box of the search circle overlaps, at the finest precision
+whose cells are still at least the radius across: usually four of the 3x3
+block around the report. Those cells are probed through their parent cells,
+usually a single LIKE 'prefix%' on the partial emergencies_open_dedup_idx
+index; the exact distance is checked in Python on the few rows it returns.
+
+On PostgreSQL the report also takes an advisory lock on each of those cells.
+A report within the radius of another lies in one of the other's cells and
+locks its own cell, so the two always share a lock and the second waits for
+the first to commit, then finds it as its parent.
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from config.geo import KM_PER_DEGREE, geohash_cover, haversine_km
+
+DEFAULTS = {
+    "RADIUS_M": 150,
+    "WINDOW_SECONDS": 900,
+}
+
+# Statuses in which an incident can still absorb new reports
+OPEN_STATUSES = ["PENDING", "DISPATCHED", "EN_ROUTE", "ON_SITE"]
+
+
+def dedup_setting(name):
+    return getattr(settings, "DEDUP", {}).get(name, DEFAULTS[name])
+
+
+def cell_precision(latitude, radius_km):
+    """Finest geohash precision whose cells are at least radius_km across"""
+    shrink = math.cos(math.radians(min(abs(latitude), 89.0)))
+    for precision in range(9, 0, -1):
+        lat_bits = 5 * precision // 2
+        lng_bits = 5 * precision - lat_bits
+        height_km = 180 / 2**lat_bits * KM_PER_DEGREE
+        width_km = 360 / 2**lng_bits * KM_PER_DEGREE * shrink
+        if min(height_km, width_km) >= radius_km:
+            return precision
+    return 1
+
+
+def lock_cells(emergency_type, cells):
+    """Serialize concurrent reports in `cells` (PostgreSQL advisory locks)
+
+    Taken in one statement, in sorted order, so that two reports locking
+    overlapping cells can't deadlock.
+    """
+    if connection.vendor != "postgresql":
+        return
+    keys = sorted(f"dedup:{emergency_type}:{cell}" for cell in cells)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtext(key)) "
+            "FROM unnest(%s::text[]) AS key",
+            [keys],
+        )
+
+
+def probe_prefixes(cells):
+    """Geohash prefixes to probe for `cells`: their parent cells
+
+    Most covers fit in one parent, and one probe over a parent's 32 cells is
+    cheaper to plan and run than a probe per cell; the distance check drops
+    the extra rows.
+    """
+    if len(cells) == 1:
+        return cells
+    return sorted({cell[:-1] for cell in cells})
+
+
+def find_parent(emergency_type, latitude, longitude, now=None):
+    """The nearest open emergency this report duplicates, or None
+
+    Call inside the transaction that inserts the new emergency, so the
+    advisory locks cover the insert.
+    """
+    from emergencies.models import Emergency
+
+    radius_km = dedup_setting("RADIUS_M") / 1000
+    now = now or timezone.now()
+    cells = geohash_cover(
+        latitude, longitude, radius_km, cell_precision(latitude, radius_km)
+    )
+    lock_cells(emergency_type, cells)
+
+    nearby = Q()
+    for prefix in probe_prefixes(cells):
+        nearby |= Q(geohash__startswith=prefix)
+    candidates = (
+        Emergency.objects.filter(
+            nearby,
+            emergency_type=emergency_type,
+            status__in=OPEN_STATUSES,
+            parent__isnull=True,
+            created_at__gte=now - timedelta(seconds=dedup_setting("WINDOW_SECONDS")),
+        )
+        .order_by()
+        .values_list("id", "latitude", "longitude")
+    )
+    best = None
+    for emergency_id, lat, lng in candidates:
+        distance = haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km and (best is None or distance < best[0]):
+            best = (distance, emergency_id)
+    return best[1] if best else None
@@ -0,0 +1,59 @@
+# backend/emergencies/geocoding.py
+"""
+Address and city of reports that came in with coordinates only.
+
+createEmergency doesn't wait on this: the emergencies.geocode consumer
+fills each new report from the relay, and the geocode_emergencies command
+works through the backlog a chunk at a time. Only blank fields are filled,
+so staff corrections and client-sent addresses are kept.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from config.geocoding import reverse_geocode
+from emergencies.models import Emergency
+
+FIELDS = ("latitude", "longitude")
+UNLOCATED = Q(address="") | Q(city="")
+
+
+def geocode_chunk(emergencies):
+    """Fill blank address/city of `emergencies`; returns how many were placed
+
+    Points are looked up through the geocoder's LRU, so reports around the
+    same spot cost one lookup, and the chunk is written as two UPDATEs per
+    distinct place rather than one per report. The UPDATEs only touch
+    fields still blank, in case they were edited since being read.
+    """
+    by_place = defaultdict(list)
+    for emergency in emergencies:
+        place = reverse_geocode(emergency.latitude, emergency.longitude)
+        if place is not None:
+            by_place[place].append(emergency.pk)
+    with transaction.atomic():
+        for place, pks in by_place.items():
+            Emergency.objects.filter(pk__in=pks, address="").update(
+                address=place.address
+            )
+            Emergency.objects.filter(pk__in=pks, city="").update(city=place.city)
+    return sum(len(pks) for pks in by_place.values())
+
+
+def unlocated_chunks(size):
+    """Reports with a blank address or city, `size` at a time in pk order
+
+    Keyset-paginated, so each chunk is an index range scan however far in
+    the backlog is. Reports no place is close enough to are passed over.
+    """
+    queryset = Emergency.objects.filter(UNLOCATED).only(*FIELDS).order_by("pk")
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        chunk = list(page[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1].pk
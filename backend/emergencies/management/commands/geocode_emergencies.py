@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from config.geocoding import geocoder
+from emergencies.geocoding import geocode_chunk, unlocated_chunks
+
+
+class Command(BaseCommand):
+    help = "Fill blank emergency addresses and cities from the gazetteer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        scanned = filled = 0
+        for chunk in unlocated_chunks(options["chunk_size"]):
+            scanned += len(chunk)
+            filled += geocode_chunk(chunk)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{filled}/{scanned}")
+        lookups = geocoder().cached_nearest.cache_info()
+        self.stdout.write(
+            f"Geocoded {filled} of {scanned} emergencies "
+            f"({lookups.misses} lookups, {lookups.hits} cache hits)"
+        )
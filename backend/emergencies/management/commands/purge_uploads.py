@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from emergencies.uploads import purge_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished attachment uploads that have gone idle"
+
+    def handle(self, *args, **options):
+        purged = purge_uploads()
+        self.stdout.write(f"Purged {purged} idle uploads")
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0004_emergency_provider_rating"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emergency",
+            index=models.Index(
+                fields=["created_at"], name="emergencies_created_6ad720_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0005_emergency_emergencies_created_6ad720_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emergency",
+            name="geohash",
+            field=models.CharField(blank=True, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name="emergency",
+            index=models.Index(
+                fields=["geohash"],
+                name="emergencies_geohash_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from config.geo import geohash_encode
+
+CHUNK = 2000
+PRECISION = 9
+
+
+def backfill(apps, schema_editor):
+    Emergency = apps.get_model("emergencies", "Emergency")
+    emergencies = (
+        Emergency.objects.filter(geohash="")
+        .only("id", "latitude", "longitude")
+        .order_by("pk")
+    )
+    chunk = []
+    for emergency in emergencies.iterator(chunk_size=CHUNK):
+        emergency.geohash = geohash_encode(
+            emergency.latitude, emergency.longitude, PRECISION
+        )
+        chunk.append(emergency)
+        if len(chunk) == CHUNK:
+            Emergency.objects.bulk_update(chunk, ["geohash"])
+            chunk = []
+    Emergency.objects.bulk_update(chunk, ["geohash"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0006_emergency_geohash"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0007_backfill_emergency_geohash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emergency",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="duplicates",
+                to="emergencies.emergency",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="emergency",
+            index=models.Index(
+                condition=models.Q(
+                    ("parent__isnull", True),
+                    ("status__in", ["PENDING", "DISPATCHED", "EN_ROUTE", "ON_SITE"]),
+                ),
+                fields=["emergency_type", "geohash"],
+                name="emergencies_open_dedup_idx",
+                opclasses=["varchar_pattern_ops", "varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,148 @@
+from django.db import migrations, models
+
+import config.fields
+from config.fields import code_case, value_case
+
+EMERGENCY_TYPES = [
+    ("MEDICAL", "Medical Emergency"),
+    ("FIRE", "Fire"),
+    ("POLICE", "Police"),
+    ("CAR_ACCIDENT", "Car Accident"),
+    ("NATURAL_DISASTER", "Natural Disaster"),
+    ("UTILITY", "Utility Failure"),
+    ("OTHER", "Other"),
+]
+PRIORITY_LEVELS = [
+    ("RED", "Critical - Immediate response"),
+    ("ORANGE", "High - Urgent"),
+    ("YELLOW", "Medium - Prompt"),
+    ("GREEN", "Low - Routine"),
+]
+STATUS_CHOICES = [
+    ("PENDING", "Pending"),
+    ("DISPATCHED", "Dispatched"),
+    ("EN_ROUTE", "En Route"),
+    ("ON_SITE", "On Site"),
+    ("RESOLVED", "Resolved"),
+    ("CANCELLED", "Cancelled"),
+]
+
+
+def to_codes(apps, schema_editor):
+    """One UPDATE copying every string column into its smallint twin"""
+    Emergency = apps.get_model("emergencies", "Emergency")
+    Emergency.objects.update(
+        emergency_type_code=code_case(
+            "emergency_type",
+            EMERGENCY_TYPES,
+            "OTHER",
+            aliases={"ACCIDENT": "CAR_ACCIDENT", "HAZARD": "UTILITY"},
+        ),
+        # Older test data used words instead of colours
+        priority_code=code_case(
+            "priority",
+            PRIORITY_LEVELS,
+            "YELLOW",
+            aliases={
+                "CRITICAL": "RED",
+                "HIGH": "ORANGE",
+                "MEDIUM": "YELLOW",
+                "LOW": "GREEN",
+            },
+        ),
+        # An unknown status must not put the emergency back in dispatch queues
+        status_code=code_case(
+            "status", STATUS_CHOICES, "CANCELLED", aliases={"ARRIVED": "ON_SITE"}
+        ),
+    )
+
+
+def to_strings(apps, schema_editor):
+    Emergency = apps.get_model("emergencies", "Emergency")
+    Emergency.objects.update(
+        emergency_type=value_case("emergency_type_code", EMERGENCY_TYPES),
+        priority=value_case("priority_code", PRIORITY_LEVELS),
+        status=value_case("status_code", STATUS_CHOICES),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0008_emergency_parent"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="emergency",
+            name="emergencies_open_dedup_idx",
+        ),
+        migrations.AddField(
+            model_name="emergency",
+            name="emergency_type_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="emergency",
+            name="priority_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="emergency",
+            name="status_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        # Lets the reverse migration re-add the column before refilling it
+        migrations.AlterField(
+            model_name="emergency",
+            name="emergency_type",
+            field=models.CharField(choices=EMERGENCY_TYPES, max_length=50, null=True),
+        ),
+        migrations.RunPython(to_codes, to_strings),
+        migrations.RemoveField(model_name="emergency", name="emergency_type"),
+        migrations.RemoveField(model_name="emergency", name="priority"),
+        migrations.RemoveField(model_name="emergency", name="status"),
+        migrations.RenameField(
+            model_name="emergency",
+            old_name="emergency_type_code",
+            new_name="emergency_type",
+        ),
+        migrations.RenameField(
+            model_name="emergency", old_name="priority_code", new_name="priority"
+        ),
+        migrations.RenameField(
+            model_name="emergency", old_name="status_code", new_name="status"
+        ),
+        migrations.AlterField(
+            model_name="emergency",
+            name="emergency_type",
+            field=config.fields.EnumField(choices=EMERGENCY_TYPES),
+        ),
+        migrations.AlterField(
+            model_name="emergency",
+            name="priority",
+            field=config.fields.EnumField(choices=PRIORITY_LEVELS, default="YELLOW"),
+        ),
+        migrations.AlterField(
+            model_name="emergency",
+            name="status",
+            field=config.fields.EnumField(choices=STATUS_CHOICES, default="PENDING"),
+        ),
+        migrations.AddIndex(
+            model_name="emergency",
+            index=models.Index(
+                fields=["status", "-created_at"], name="emergencies_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="emergency",
+            index=models.Index(
+                condition=models.Q(
+                    ("parent__isnull", True),
+                    ("status__in", ["PENDING", "DISPATCHED", "EN_ROUTE", "ON_SITE"]),
+                ),
+                fields=["emergency_type", "geohash"],
+                name="emergencies_open_dedup_idx",
+                opclasses=["int2_ops", "varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+CHUNK = 2000
+FIELDS = ["symptoms", "patient_info", "attachments"]
+
+
+def move_out(apps, schema_editor):
+    """Copy non-empty payloads into emergency_details"""
+    Emergency = apps.get_model("emergencies", "Emergency")
+    EmergencyDetails = apps.get_model("emergencies", "EmergencyDetails")
+    rows = Emergency.objects.order_by("pk").values_list("pk", *FIELDS)
+    chunk = []
+    for pk, *values in rows.iterator(chunk_size=CHUNK):
+        if any(values):
+            chunk.append(EmergencyDetails(pk, *values))
+        if len(chunk) == CHUNK:
+            EmergencyDetails.objects.bulk_create(chunk)
+            chunk = []
+    EmergencyDetails.objects.bulk_create(chunk)
+
+
+def move_back(apps, schema_editor):
+    Emergency = apps.get_model("emergencies", "Emergency")
+    EmergencyDetails = apps.get_model("emergencies", "EmergencyDetails")
+    chunk = []
+    for details in EmergencyDetails.objects.order_by("pk").iterator(CHUNK):
+        chunk.append(
+            Emergency(
+                pk=details.pk, **{name: getattr(details, name) for name in FIELDS}
+            )
+        )
+        if len(chunk) == CHUNK:
+            Emergency.objects.bulk_update(chunk, FIELDS)
+            chunk = []
+    Emergency.objects.bulk_update(chunk, FIELDS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0009_enum_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmergencyDetails",
+            fields=[
+                (
+                    "emergency",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="details",
+                        serialize=False,
+                        to="emergencies.emergency",
+                    ),
+                ),
+                ("symptoms", models.JSONField(blank=True, default=list)),
+                ("patient_info", models.JSONField(blank=True, default=dict)),
+                ("attachments", models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                "db_table": "emergency_details",
+                "verbose_name_plural": "emergency details",
+            },
+        ),
+        migrations.RunPython(move_out, move_back),
+        migrations.RemoveField(model_name="emergency", name="symptoms"),
+        migrations.RemoveField(model_name="emergency", name="patient_info"),
+        migrations.RemoveField(model_name="emergency", name="attachments"),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+import config.uuids
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0010_emergency_details"),
+    ]
+
+    # Django fills in the key, the column has no default: nothing to run
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="emergency",
+                    name="id",
+                    field=models.UUIDField(
+                        default=config.uuids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Index expressions must match the ones config/search.py queries with
+INDEXES = {
+    "emergencies_search_idx": (
+        "USING gin (to_tsvector('simple', coalesce(\"description\", '') "
+        "|| ' ' || coalesce(\"address\", '') || ' ' || coalesce(\"city\", '')))"
+    ),
+    "emergencies_code_trgm_idx": 'USING gin ("code" gin_trgm_ops)',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, definition in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON emergencies "
+            f"{definition}"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("emergencies", "0012_attachments"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,7 +1,9 @@
 # backend/emergencies/models.py
-import uuid
+from django.db import models, transaction
 
-from django.db import models
+from config.fields import EnumField
+from config.geo import geohash_encode
+from config.uuids import uuid7
 
 
 class Emergency(models.Model):
@@ -31,13 +33,21 @@ class Emergency(models.Model):
         ("CANCELLED", "Cancelled"),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     code = models.CharField(max_length=20, unique=True, blank=True)
 
     # Relationships
     user = models.ForeignKey(
         "users.User", on_delete=models.CASCADE, related_name="emergencies"
     )
+    # Set when this report duplicates an open incident (emergencies/dedup.py)
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates",
+    )
     provider = models.ForeignKey(
         "providers.Provider",
         on_delete=models.SET_NULL,
@@ -47,26 +57,26 @@ class Emergency(models.Model):
     )
 
     # Emergency details
-    emergency_type = models.CharField(max_length=50, choices=EMERGENCY_TYPES)
-    priority = models.CharField(
-        max_length=20, choices=PRIORITY_LEVELS, default="YELLOW"
-    )
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    # Smallint codes behind string values (config/fields.py); append choices only
+    emergency_type = EnumField(choices=EMERGENCY_TYPES)
+    priority = EnumField(choices=PRIORITY_LEVELS, default="YELLOW")
+    status = EnumField(choices=STATUS_CHOICES, default="PENDING")
 
     # Location - using simple Float fields
     latitude = models.FloatField()
     longitude = models.FloatField()
+    # Filled in by save(); prefix queries aggregate emergencies by map cell
+    geohash = models.CharField(max_length=12, blank=True)
     address = models.TextField(blank=True)
     city = models.CharField(max_length=100, blank=True)
 
-    # Medical-specific
-    symptoms = models.JSONField(default=list, blank=True)
-    patient_info = models.JSONField(default=dict, blank=True)
+    # Symptoms, patient info and attachments live in EmergencyDetails
 
     # Metadata
     description = models.TextField(blank=True)
-    attachments = models.JSONField(default=list, blank=True)
     is_anonymous = models.BooleanField(default=False)
+    # 1-5 stars from the reporter once the emergency is resolved
+    provider_rating = models.PositiveSmallIntegerField(null=True, blank=True)
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -77,8 +87,43 @@ class Emergency(models.Model):
     class Meta:
         db_table = "emergencies"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["status", "-created_at"], name="emergencies_status_idx"
+            ),
+            # varchar_pattern_ops lets LIKE 'prefix%' use the index whatever
+            # the collation (PostgreSQL only; other backends ignore opclasses)
+            models.Index(
+                fields=["geohash"],
+                name="emergencies_geohash_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            # Only open top-level incidents can absorb duplicate reports
+            models.Index(
+                fields=["emergency_type", "geohash"],
+                name="emergencies_open_dedup_idx",
+                opclasses=["int2_ops", "varchar_pattern_ops"],
+                condition=models.Q(
+                    parent__isnull=True,
+                    status__in=["PENDING", "DISPATCHED", "EN_ROUTE", "ON_SITE"],
+                ),
+            ),
+        ]
+
+    # Stored geohash length; cells of about 5 m
+    GEOHASH_PRECISION = 9
 
     def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(
+                self.latitude, self.longitude, self.GEOHASH_PRECISION
+            )
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and {"latitude", "longitude"} & set(
+                update_fields
+            ):
+                kwargs["update_fields"] = {*update_fields, "geohash"}
         if not self.code:
             from django.utils import timezone
 
@@ -97,3 +142,149 @@ class Emergency(models.Model):
 
     def __str__(self):
         return f"{self.code} - {self.get_emergency_type_display()}"
+
+    def get_details(self):
+        """The EmergencyDetails row, or an unsaved empty one"""
+        try:
+            return self.details
+        except EmergencyDetails.DoesNotExist:
+            return EmergencyDetails(emergency=self)
+
+    # Timestamp stamped when an emergency enters each status
+    STATUS_TIMESTAMPS = {
+        "DISPATCHED": "dispatched_at",
+        "ON_SITE": "arrived_at",
+        "RESOLVED": "resolved_at",
+    }
+
+    # Statuses the assigned provider may move an emergency on to: forward
+    # only, and cancelled while it is still open
+    PROVIDER_TRANSITIONS = {
+        "DISPATCHED": ("EN_ROUTE", "ON_SITE", "RESOLVED", "CANCELLED"),
+        "EN_ROUTE": ("ON_SITE", "RESOLVED", "CANCELLED"),
+        "ON_SITE": ("RESOLVED", "CANCELLED"),
+    }
+
+    def event_payload(self, **extra):
+        """Outbox payload describing this emergency"""
+        return {
+            "status": self.status,
+            "emergency_type": self.emergency_type,
+            "priority": self.priority,
+            "user_id": str(self.user_id),
+            "provider_id": str(self.provider_id) if self.provider_id else None,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "city": self.city,
+            **extra,
+        }
+
+    def transition_to(self, status, provider=None):
+        """Move to a new status, stamping its timestamp, and save the change
+
+        Publishes emergency.status_changed in the same transaction.
+        """
+        from django.utils import timezone
+
+        from outbox.publish import publish
+
+        previous_status = self.status
+        self.status = status
+        update_fields = ["status"]
+        if provider is not None:
+            self.provider = provider
+            update_fields.append("provider")
+        stamped = []
+        timestamp_field = self.STATUS_TIMESTAMPS.get(status)
+        if timestamp_field and getattr(self, timestamp_field) is None:
+            setattr(self, timestamp_field, timezone.now())
+            stamped.append(timestamp_field)
+        with transaction.atomic():
+            self.save(update_fields=update_fields + stamped)
+            if status in ("RESOLVED", "CANCELLED"):
+                # Duplicate reports close with their parent incident
+                closed = {"status": status}
+                if timestamp_field:
+                    closed[timestamp_field] = getattr(self, timestamp_field)
+                self.duplicates.exclude(status__in=("RESOLVED", "CANCELLED")).update(
+                    **closed
+                )
+            publish(
+                "emergency.status_changed",
+                self,
+                # `stamped` tells consumers this is the first time in `status`
+                self.event_payload(previous_status=previous_status, stamped=stamped),
+            )
+
+
+class EmergencyDetails(models.Model):
+    """Bulky payloads kept off the hot emergencies row
+
+    Lists and status transitions read and rewrite `emergencies` without
+    dragging these JSON values along; detail views load them on demand.
+    Rows exist only for emergencies that have any details.
+    """
+
+    emergency = models.OneToOneField(
+        Emergency, on_delete=models.CASCADE, primary_key=True, related_name="details"
+    )
+    # Medical-specific
+    symptoms = models.JSONField(default=list, blank=True)
+    patient_info = models.JSONField(default=dict, blank=True)
+    attachments = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        db_table = "emergency_details"
+        verbose_name_plural = "emergency details"
+
+
+class AttachmentUpload(models.Model):
+    """A resumable upload in progress (emergencies/uploads.py)
+
+    Each received chunk is stored as its own object under uploads/<id>/ and
+    listed in `parts`; the last chunk joins them into the Attachment.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    emergency = models.ForeignKey(Emergency, on_delete=models.CASCADE, related_name="+")
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE, related_name="+")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    # Checksum of the whole file, if the client sent one up front
+    sha256 = models.CharField(max_length=64, blank=True)
+    received = models.PositiveBigIntegerField(default=0)
+    # [offset, length, sha256, storage name] of each chunk, in order
+    parts = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "attachment_uploads"
+        indexes = [
+            models.Index(fields=["updated_at"], name="attachment_uploads_idle_idx")
+        ]
+
+
+class Attachment(models.Model):
+    """Reference to an uploaded file; the bytes live in the attachments storage"""
+
+    # Same id as the AttachmentUpload it came from
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    emergency = models.ForeignKey(
+        Emergency, on_delete=models.CASCADE, related_name="files"
+    )
+    uploaded_by = models.ForeignKey(
+        "users.User", on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    storage_name = models.CharField(max_length=255)
+    # Filled in by the emergencies.thumbnails outbox consumer
+    thumbnail_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "attachments"
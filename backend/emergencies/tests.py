@@ -1 +1,614 @@
-# Create your tests here.
+import hashlib
+import json
+import math
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from graphql_jwt.shortcuts import get_token
+
+from config.geo import KM_PER_DEGREE
+from emergencies import bulk, uploads
+from emergencies.dedup import dedup_setting, find_parent
+from emergencies.geocoding import FIELDS, geocode_chunk, unlocated_chunks
+from emergencies.models import (
+    Attachment,
+    AttachmentUpload,
+    Emergency,
+    EmergencyDetails,
+)
+from outbox.models import OutboxEvent
+from outbox.publish import publish
+from outbox.relay import relay_batch
+from providers.models import Provider
+from users.models import User
+from users.testing import make_user
+
+# Session, user, page rows, filter counts: independent of the page size
+MAX_CHANGELIST_QUERIES = 8
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Changelist pages must not run a query per row"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user("admin", is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = Provider.objects.count()
+        for i in range(start, start + count):
+            provider = Provider.objects.create(
+                user=make_user(f"provider{i}", first_name="P", last_name=str(i))
+            )
+            Emergency.objects.create(
+                user=make_user(f"citizen{i}"),
+                provider=provider,
+                emergency_type="MEDICAL",
+                latitude=14.6,
+                longitude=121.0,
+            )
+
+    def changelist_queries(self, model):
+        opts = model._meta
+        url = reverse(f"admin:{opts.app_label}_{opts.model_name}_changelist")
+        # Warm the cached row count behind the paginator
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        for model in (Emergency, Provider, User):
+            with self.subTest(model=model.__name__):
+                self.add_rows(2)
+                few = self.changelist_queries(model)
+                self.add_rows(20)
+                many = self.changelist_queries(model)
+                self.assertEqual(few, many)
+                self.assertLessEqual(many, MAX_CHANGELIST_QUERIES)
+
+    def test_large_table_count_is_estimated(self):
+        self.add_rows(2)
+        with mock.patch("config.pagination.estimate_row_count", return_value=5_000_000):
+            response = self.client.get(
+                reverse("admin:emergencies_emergency_changelist")
+            )
+        self.assertEqual(response.context["cl"].result_count, 5_000_000)
+
+        # Filtered lists are still counted exactly
+        with mock.patch("config.pagination.estimate_row_count", return_value=5_000_000):
+            response = self.client.get(
+                reverse("admin:emergencies_emergency_changelist"),
+                {"status__exact": "PENDING"},
+            )
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+
+def offset(lat, lng, north_m=0, east_m=0):
+    """(lat, lng) moved by the given metres"""
+    return (
+        lat + north_m / 1000 / KM_PER_DEGREE,
+        lng + east_m / 1000 / (KM_PER_DEGREE * math.cos(math.radians(lat))),
+    )
+
+
+class DedupTests(TestCase):
+    """Reports of an open incident within DEDUP["RADIUS_M"] attach to it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("reporter")
+
+    def report(self, lat, lng, emergency_type="CAR_ACCIDENT", **extra):
+        return Emergency.objects.create(
+            user=self.user,
+            emergency_type=emergency_type,
+            latitude=lat,
+            longitude=lng,
+            **extra,
+        )
+
+    def test_nearby_report_of_the_same_type(self):
+        incident = self.report(14.5995, 120.9842)
+        self.assertEqual(
+            find_parent("CAR_ACCIDENT", *offset(14.5995, 120.9842, 60, 80)),
+            incident.id,
+        )
+        self.assertIsNone(find_parent("FIRE", *offset(14.5995, 120.9842, 60, 80)))
+        self.assertIsNone(
+            find_parent("CAR_ACCIDENT", *offset(14.5995, 120.9842, 160, 0))
+        )
+
+    def test_nearest_open_top_level_incident_wins(self):
+        near = self.report(*offset(14.5995, 120.9842, 0, 40))
+        self.report(*offset(14.5995, 120.9842, 0, -90))
+        # Closer, but a duplicate itself or already closed
+        self.report(*offset(14.5995, 120.9842, 0, 10), parent=near)
+        self.report(*offset(14.5995, 120.9842, 10, 0), status="RESOLVED")
+
+        self.assertEqual(find_parent("CAR_ACCIDENT", 14.5995, 120.9842), near.id)
+
+    def test_only_recent_incidents(self):
+        incident = self.report(14.5995, 120.9842)
+        later = timezone.now() + timedelta(seconds=dedup_setting("WINDOW_SECONDS") + 1)
+        self.assertEqual(find_parent("CAR_ACCIDENT", 14.5995, 120.9842), incident.id)
+        self.assertIsNone(find_parent("CAR_ACCIDENT", 14.5995, 120.9842, now=later))
+
+    def test_reports_across_cell_boundaries(self):
+        # The equator and the prime meridian bound cells at every precision
+        for lat, lng in [(0.0, 0.0), (0.0, 120.9842), (14.5995, 0.0)]:
+            with self.subTest(lat=lat, lng=lng):
+                incident = self.report(*offset(lat, lng, -50, -50))
+                self.assertEqual(
+                    find_parent("CAR_ACCIDENT", *offset(lat, lng, 50, 50)),
+                    incident.id,
+                )
+                incident.delete()
+
+    def test_duplicates_close_with_their_parent(self):
+        incident = self.report(14.5995, 120.9842)
+        duplicate = self.report(14.5995, 120.9842, parent=incident)
+
+        incident.transition_to("RESOLVED")
+
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.status, "RESOLVED")
+        self.assertIsNotNone(duplicate.resolved_at)
+
+
+class DetailsTests(TestCase):
+    """Bulky payloads live in emergency_details and load only when asked for"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user("reporter")
+        cls.plain = Emergency.objects.create(
+            user=user, emergency_type="FIRE", latitude=14.6, longitude=121.0
+        )
+        cls.medical = Emergency.objects.create(
+            user=user, emergency_type="MEDICAL", latitude=14.6, longitude=121.0
+        )
+        EmergencyDetails.objects.create(
+            emergency=cls.medical,
+            symptoms=["chest pain"],
+            patient_info={"age": 67},
+        )
+
+    def query(self, fields):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/graphql/",
+                json.dumps(
+                    {"query": f"{{ emergencies {{ emergencyType {fields} }} }}"}
+                ),
+                content_type="application/json",
+            )
+        self.assertNotIn("errors", response.json())
+        return response.json()["data"]["emergencies"], queries
+
+    def test_list_skips_details_unless_selected(self):
+        rows, queries = self.query("status")
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("emergency_details", queries[0]["sql"])
+
+    def test_selected_details_are_joined(self):
+        rows, queries = self.query("symptoms patientInfo attachments")
+        self.assertEqual(len(queries), 1)
+        by_type = {row["emergencyType"]: row for row in rows}
+        self.assertEqual(json.loads(by_type["MEDICAL"]["symptoms"]), ["chest pain"])
+        self.assertEqual(json.loads(by_type["MEDICAL"]["patientInfo"]), {"age": 67})
+        # No side-table row: the defaults
+        self.assertEqual(json.loads(by_type["FIRE"]["symptoms"]), [])
+        self.assertEqual(json.loads(by_type["FIRE"]["attachments"]), [])
+
+    def test_status_update_leaves_details_alone(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.medical.transition_to("DISPATCHED")
+        self.assertFalse(
+            [q for q in queries if "emergency_details" in q["sql"]],
+        )
+        self.assertEqual(self.medical.get_details().symptoms, ["chest pain"])
+        self.assertTrue(self.plain.get_details()._state.adding)
+
+
+class StatusTransitionTests(TestCase):
+    """Providers move their emergencies forward, and cancel only open ones"""
+
+    MUTATION = """
+        mutation($id: UUID!, $status: String!) {
+          updateEmergencyStatus(emergencyId: $id, status: $status) {
+            emergency { status }
+          }
+        }
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = Provider.objects.create(
+            user=make_user("responder", user_type="PROVIDER"), status="IN_EMERGENCY"
+        )
+        cls.emergency = Emergency.objects.create(
+            user=make_user("reporter"),
+            provider=cls.provider,
+            emergency_type="FIRE",
+            status="DISPATCHED",
+            latitude=14.6,
+            longitude=121.0,
+        )
+
+    def update(self, status):
+        self.client.force_login(self.provider.user)
+        response = self.client.post(
+            "/graphql/",
+            json.dumps(
+                {
+                    "query": self.MUTATION,
+                    "variables": {"id": str(self.emergency.pk), "status": status},
+                }
+            ),
+            content_type="application/json",
+        ).json()
+        self.emergency.refresh_from_db()
+        return response.get("errors")
+
+    def test_forward_moves(self):
+        for status in ("EN_ROUTE", "ON_SITE", "RESOLVED"):
+            self.assertIsNone(self.update(status))
+            self.assertEqual(self.emergency.status, status)
+        self.assertIsNotNone(self.emergency.arrived_at)
+        self.provider.refresh_from_db()
+        self.assertEqual(self.provider.status, "AVAILABLE")
+
+    def test_open_emergency_can_be_cancelled(self):
+        self.update("ON_SITE")
+        self.assertIsNone(self.update("CANCELLED"))
+        self.assertEqual(self.emergency.status, "CANCELLED")
+
+    def test_rejected_moves(self):
+        self.update("ON_SITE")
+        for status in ("EN_ROUTE", "ON_SITE", "DISPATCHED", "PENDING"):
+            with self.subTest(status=status):
+                self.assertTrue(self.update(status))
+                self.assertEqual(self.emergency.status, "ON_SITE")
+
+        self.update("RESOLVED")
+        for status in ("CANCELLED", "ON_SITE", "RESOLVED"):
+            with self.subTest(status=status):
+                self.assertIn("from RESOLVED", self.update(status)[0]["message"])
+        self.assertEqual(
+            OutboxEvent.objects.filter(topic="emergency.status_changed").count(), 2
+        )
+
+
+class UploadTests(TestCase):
+    """Resumable chunked uploads through the uploads/<id>/ endpoint"""
+
+    CONTENT = bytes(range(256)) * 40
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("reporter")
+        cls.emergency = Emergency.objects.create(
+            user=cls.user, emergency_type="FIRE", latitude=14.6, longitude=121.0
+        )
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storages = override_settings(
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "attachments": {
+                    "BACKEND": "django.core.files.storage.FileSystemStorage",
+                    "OPTIONS": {"location": location},
+                },
+            },
+            ATTACHMENTS={"CHUNK_SIZE": 4096, "CONTENT_TYPES": ["image/jpeg"]},
+        )
+        storages.enable()
+        self.addCleanup(storages.disable)
+        self.token = get_token(self.user)
+
+    def start(self, sha256=""):
+        return uploads.start_upload(
+            self.emergency,
+            self.user,
+            "photo.JPG",
+            "image/jpeg",
+            len(self.CONTENT),
+            sha256,
+        )
+
+    def put(self, upload, start=None, end=None, sha256=None, token=None):
+        size = len(self.CONTENT)
+        headers = {"HTTP_AUTHORIZATION": f"JWT {token or self.token}"}
+        if sha256 is not None:
+            headers["HTTP_X_CHUNK_SHA256"] = sha256
+        if start is None:
+            body = b""
+            headers["HTTP_CONTENT_RANGE"] = f"bytes */{size}"
+        else:
+            body = self.CONTENT[start:end]
+            headers["HTTP_CONTENT_RANGE"] = f"bytes {start}-{end - 1}/{size}"
+        return self.client.put(
+            reverse("attachment_upload", args=[upload.id]),
+            body,
+            content_type="application/octet-stream",
+            **headers,
+        )
+
+    def stored_files(self, path):
+        storage = uploads.attachment_storage()
+        return storage.listdir(path)[1] if storage.exists(path) else []
+
+    def stored_parts(self, upload):
+        return self.stored_files(f"uploads/{upload.id}")
+
+    def test_chunks_are_joined_into_the_attachment(self):
+        upload = self.start(hashlib.sha256(self.CONTENT).hexdigest())
+
+        response = self.put(upload, 0, 4096)
+        self.assertEqual(response.json()["received"], 4096)
+        self.assertFalse(response.json()["complete"])
+        self.put(upload, 4096, 8192)
+        response = self.put(upload, 8192, len(self.CONTENT))
+
+        self.assertEqual(response.status_code, 201)
+        attachment = Attachment.objects.get(pk=upload.id)
+        self.assertEqual(response.json()["sha256"], attachment.sha256)
+        self.assertTrue(attachment.storage_name.endswith(".jpg"))
+        with uploads.attachment_storage().open(attachment.storage_name) as f:
+            self.assertEqual(f.read(), self.CONTENT)
+        self.assertFalse(AttachmentUpload.objects.filter(pk=upload.id).exists())
+        self.assertEqual(self.stored_parts(upload), [])
+        self.assertTrue(OutboxEvent.objects.filter(topic="attachment.uploaded"))
+
+        # A retried last chunk gets the same answer
+        retry = self.put(upload, 8192, len(self.CONTENT))
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), response.json())
+
+    def test_resume_from_what_arrived(self):
+        upload = self.start()
+        self.put(upload, 0, 4096)
+
+        status = self.put(upload)
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.json()["received"], 4096)
+
+        response = self.put(upload, 4096, 8192)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["received"], 8192)
+
+    def test_offset_mismatch_reports_the_expected_offset(self):
+        upload = self.start()
+        self.put(upload, 0, 4096)
+
+        for start in (0, 8192):
+            with self.subTest(start=start):
+                response = self.put(upload, start, start + 10)
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response.json()["received"], 4096)
+        self.assertEqual(len(self.stored_parts(upload)), 1)
+
+    def test_chunk_sha256_mismatch_is_rejected(self):
+        upload = self.start()
+
+        response = self.put(upload, 0, 4096, sha256="0" * 64)
+
+        self.assertEqual(response.status_code, 400)
+        upload.refresh_from_db()
+        self.assertEqual(upload.received, 0)
+        self.assertEqual(self.stored_parts(upload), [])
+        digest = hashlib.sha256(self.CONTENT[:4096]).hexdigest()
+        self.assertEqual(self.put(upload, 0, 4096, sha256=digest).status_code, 200)
+
+    def test_file_sha256_mismatch_is_rejected(self):
+        upload = self.start(hashlib.sha256(b"something else").hexdigest())
+        self.put(upload, 0, 4096)
+        self.put(upload, 4096, 8192)
+
+        response = self.put(upload, 8192, len(self.CONTENT))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attachment.objects.exists())
+        self.assertEqual(self.stored_files(f"attachments/{self.emergency.id}"), [])
+        # The chunks are kept, so the client can check and resume
+        self.assertEqual(len(self.stored_parts(upload)), 3)
+
+    def test_racing_finish_keeps_one_file(self):
+        upload = self.start()
+        for start in range(0, len(self.CONTENT), 4096):
+            chunk = self.CONTENT[start : start + 4096]
+            upload = uploads.write_chunk(upload, start, len(chunk), BytesIO(chunk))
+        join = uploads.stream_to_storage
+        other = []
+
+        def join_then_lose_the_race(*args):
+            name = join(*args)
+            if not other:
+                other.append(None)
+                # Another request finishes while this one was joining
+                other[0] = uploads.finish_upload(upload)
+            return name
+
+        with mock.patch.object(uploads, "stream_to_storage", join_then_lose_the_race):
+            attachment = uploads.finish_upload(upload)
+
+        self.assertEqual(attachment, other[0])
+        self.assertEqual(
+            self.stored_files(f"attachments/{self.emergency.id}"),
+            [attachment.storage_name.rsplit("/", 1)[1]],
+        )
+        self.assertEqual(
+            OutboxEvent.objects.filter(topic="attachment.uploaded").count(), 1
+        )
+
+    def test_uploads_belong_to_their_user(self):
+        upload = self.start()
+        other = get_token(make_user("someone-else"))
+        self.assertEqual(self.put(upload, 0, 4096, token=other).status_code, 400)
+        self.assertEqual(self.put(upload, token="not-a-token").status_code, 401)
+
+
+class BulkCancelTests(TestCase):
+    """Set-wise cancellation, inline or chunked through the outbox"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = make_user("dispatcher", is_staff=True)
+        cls.reporter = make_user("reporter")
+
+    def report(self, **extra):
+        return Emergency.objects.create(
+            user=self.reporter,
+            emergency_type="FIRE",
+            latitude=14.6,
+            longitude=121.0,
+            **extra,
+        )
+
+    def statuses(self, emergencies):
+        return [
+            Emergency.objects.values_list("status", flat=True).get(pk=e.pk)
+            for e in emergencies
+        ]
+
+    def test_cancel_chunk(self):
+        provider = Provider.objects.create(user=make_user("medic"))
+        incident = self.report(status="DISPATCHED", provider=provider)
+        provider.set_status("IN_EMERGENCY", current_emergency_id=incident.pk)
+        duplicate = self.report(parent=incident)
+        pending = self.report()
+        resolved = self.report(status="RESOLVED")
+
+        cancelled = bulk.cancel_chunk([incident.pk, pending.pk, resolved.pk])
+
+        self.assertEqual(cancelled, 2)
+        self.assertEqual(
+            self.statuses([incident, duplicate, pending, resolved]),
+            ["CANCELLED", "CANCELLED", "CANCELLED", "RESOLVED"],
+        )
+        events = OutboxEvent.objects.filter(topic="emergency.status_changed")
+        self.assertEqual(
+            sorted(e.payload["previous_status"] for e in events),
+            ["DISPATCHED", "PENDING"],
+        )
+        provider.live.refresh_from_db()
+        self.assertEqual(provider.live.status, "AVAILABLE")
+        self.assertIsNone(provider.live.current_emergency_id)
+        # A retried chunk finds nothing left to do
+        self.assertEqual(bulk.cancel_chunk([incident.pk, pending.pk]), 0)
+
+    def test_queries_do_not_grow_with_the_chunk(self):
+        def queries(count):
+            ids = [self.report().pk for _ in range(count)]
+            with CaptureQueriesContext(connection) as captured:
+                bulk.cancel_chunk(ids)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(20))
+
+    def test_large_selections_are_queued_a_chunk_per_event(self):
+        emergencies = [self.report() for _ in range(5)]
+
+        with self.settings(OUTBOX={"JOB_CHUNK": 2, "JOB_INLINE_LIMIT": 3}):
+            self.assertEqual(
+                bulk.cancel([e.pk for e in emergencies], self.staff), (0, 5)
+            )
+        chunks = OutboxEvent.objects.filter(topic="emergency.bulk_cancel")
+        self.assertEqual([len(e.payload["ids"]) for e in chunks], [2, 2, 1])
+        self.assertEqual(set(self.statuses(emergencies)), {"PENDING"})
+
+        # Every chunk commits in a relay batch of its own
+        self.assertEqual([relay_batch() for _ in range(3)], [1, 1, 1])
+        self.assertEqual(set(self.statuses(emergencies)), {"CANCELLED"})
+
+    def test_small_selections_run_inline(self):
+        emergencies = [self.report() for _ in range(3)]
+        self.assertEqual(bulk.cancel([e.pk for e in emergencies], self.staff), (3, 0))
+        self.assertFalse(OutboxEvent.objects.filter(topic="emergency.bulk_cancel"))
+
+
+class GeocodeTests(TestCase):
+    """Blank address and city filled from the gazetteer, edits kept"""
+
+    MANILA = (14.5995, 120.9842)
+    # Far out in the Pacific, nowhere near a place
+    AT_SEA = (15.0, 135.0)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reporter = make_user("reporter")
+
+    def report(self, lat, lng, **extra):
+        return Emergency.objects.create(
+            user=self.reporter,
+            emergency_type="FIRE",
+            latitude=lat,
+            longitude=lng,
+            **extra,
+        )
+
+    def located(self, emergency):
+        emergency.refresh_from_db()
+        return emergency.address, emergency.city
+
+    def test_fills_only_blank_fields(self):
+        blank = self.report(*self.MANILA)
+        addressed = self.report(*self.MANILA, address="Gate 3, Intramuros")
+        moved = self.report(*self.MANILA, city="Pasay")
+        at_sea = self.report(*self.AT_SEA)
+
+        chunk = Emergency.objects.only(*FIELDS).order_by("pk")
+        self.assertEqual(geocode_chunk(chunk), 3)
+
+        self.assertEqual(self.located(blank), ("Manila, Metro Manila", "Manila"))
+        self.assertEqual(self.located(addressed), ("Gate 3, Intramuros", "Manila"))
+        self.assertEqual(self.located(moved), ("Manila, Metro Manila", "Pasay"))
+        self.assertEqual(self.located(at_sea), ("", ""))
+
+    def test_edits_after_the_read_are_kept(self):
+        emergency = self.report(*self.MANILA)
+        chunk = list(Emergency.objects.only(*FIELDS).filter(pk=emergency.pk))
+        # Staff fix the address between the read and the write
+        Emergency.objects.filter(pk=emergency.pk).update(address="Pier 4")
+
+        geocode_chunk(chunk)
+
+        self.assertEqual(self.located(emergency), ("Pier 4", "Manila"))
+
+    def test_unlocated_chunks_page_through_the_backlog(self):
+        emergencies = [self.report(*self.MANILA) for _ in range(5)]
+        self.report(*self.MANILA, address="Known", city="Manila")
+
+        chunks = list(unlocated_chunks(2))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(
+            [e.pk for chunk in chunks for e in chunk],
+            sorted(e.pk for e in emergencies),
+        )
+
+    def test_new_reports_are_located_by_the_relay(self):
+        emergency = self.report(*self.MANILA)
+        with transaction.atomic():
+            publish("emergency.created", emergency, emergency.event_payload())
+
+        while relay_batch():
+            pass
+
+        self.assertEqual(self.located(emergency), ("Manila, Metro Manila", "Manila"))
@@ -0,0 +1,61 @@
+# backend/emergencies/thumbnails.py
+"""
+Thumbnails for image attachments.
+
+Run by the emergencies.thumbnails outbox consumer after an upload finishes,
+so decoding a large photo never holds up the request that uploaded it. Only
+the thumbnail's storage name is kept on the Attachment row.
+
+Needs Pillow; without it attachments simply have no thumbnail.
+"""
+
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+
+from emergencies.models import Attachment
+from emergencies.uploads import attachment_storage, upload_setting
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger("emergencies.thumbnails")
+
+
+def thumbnail_name(attachment):
+    return f"thumbnails/{attachment.emergency_id}/{attachment.id}.jpg"
+
+
+def render_thumbnail(source, px):
+    """JPEG bytes of the image in `source`, at most `px` on its longest side"""
+    with Image.open(source) as image:
+        # Lets the JPEG decoder scale down while decoding
+        image.draft("RGB", (px, px))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((px, px))
+        output = BytesIO()
+        image.convert("RGB").save(output, "JPEG", quality=80, optimize=True)
+    return output.getvalue()
+
+
+def make_thumbnail(attachment):
+    """Store a thumbnail of an image attachment; returns its name or None"""
+    if attachment.thumbnail_name:
+        return attachment.thumbnail_name
+    if Image is None or not attachment.content_type.startswith("image/"):
+        return None
+    storage = attachment_storage()
+    try:
+        with storage.open(attachment.storage_name, "rb") as source:
+            data = render_thumbnail(source, upload_setting("THUMBNAIL_PX"))
+    except (OSError, Image.DecompressionBombError) as e:
+        # Includes UnidentifiedImageError, e.g. HEIC without a plugin
+        logger.warning("No thumbnail for attachment %s: %s", attachment.id, e)
+        return None
+    name = storage.save(thumbnail_name(attachment), ContentFile(data))
+    Attachment.objects.filter(pk=attachment.pk).update(thumbnail_name=name)
+    attachment.thumbnail_name = name
+    return name
@@ -0,0 +1,278 @@
+# backend/emergencies/uploads.py
+"""
+Chunked, resumable attachment uploads.
+
+startAttachmentUpload opens an AttachmentUpload and returns its URL. The
+client then PUTs the file there in order, one chunk per request, with a
+`Content-Range: bytes <first>-<last>/<size>` header (emergencies/views.py).
+A dropped connection loses at most one chunk: `Content-Range: bytes */<size>`
+with an empty body reports how many bytes arrived, and the upload resumes
+from there.
+
+Request bodies are streamed into STORAGES["attachments"] and hashed on the
+way, never held in memory whole. Every chunk is stored as its own object, so
+any Django storage backend works, including object stores without append.
+The last chunk joins the parts into the final file, checking its SHA-256
+while streaming, and creates the Attachment. Thumbnails are made later by an
+outbox consumer (emergencies/thumbnails.py).
+
+Settings (ATTACHMENTS):
+    CHUNK_SIZE      largest chunk accepted per request
+    MAX_SIZE        largest file
+    CONTENT_TYPES   accepted content types
+    EXPIRE_SECONDS  idle time after which an unfinished upload is purged
+    THUMBNAIL_PX    longest side of generated thumbnails
+"""
+
+import hashlib
+import os
+import string
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from emergencies.models import Attachment, AttachmentUpload
+from outbox.publish import publish
+
+DEFAULTS = {
+    "CHUNK_SIZE": 1024 * 1024,
+    "MAX_SIZE": 25 * 1024 * 1024,
+    "CONTENT_TYPES": ["image/jpeg", "image/png"],
+    "EXPIRE_SECONDS": 24 * 3600,
+    "THUMBNAIL_PX": 320,
+}
+
+
+def upload_setting(name):
+    return getattr(settings, "ATTACHMENTS", {}).get(name, DEFAULTS[name])
+
+
+def attachment_storage():
+    return storages["attachments"]
+
+
+class UploadError(Exception):
+    """A rejected upload request; `status` is the HTTP status to answer with"""
+
+    status = 400
+
+
+class OffsetMismatch(UploadError):
+    """A chunk that doesn't start where the upload left off"""
+
+    status = 409
+
+    def __init__(self, received):
+        super().__init__(f"Upload expects the chunk starting at byte {received}")
+        self.received = received
+
+
+class HashingReader:
+    """Read at most `limit` bytes of a stream, hashing and counting them"""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.count = 0
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        remaining = self.limit - self.count
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.stream.read(size) if size else b""
+        self.count += len(data)
+        self.sha256.update(data)
+        return data
+
+
+class PartsReader:
+    """Read stored chunks back to back, holding one open at a time"""
+
+    def __init__(self, storage, names):
+        self.storage = storage
+        self.names = list(names)
+        self.current = None
+
+    def read(self, size=-1):
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return b""
+                self.current = self.storage.open(self.names.pop(0), "rb")
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+
+def stream_to_storage(storage, name, reader, size):
+    """Save what `reader` yields as `name`; returns the name actually used"""
+    content = File(reader)
+    # Backends that upload in one request ask for the size up front
+    content.size = size
+    return storage.save(name, content)
+
+
+def can_attach(user, emergency):
+    """The reporter, the assigned provider and staff may attach files"""
+    if user.is_staff or emergency.user_id == user.pk:
+        return True
+    provider = getattr(emergency, "provider", None)
+    return provider is not None and provider.user_id == user.pk
+
+
+def start_upload(emergency, user, filename, content_type, size, sha256=""):
+    if emergency is None or not can_attach(user, emergency):
+        raise UploadError("Emergency does not exist")
+    if content_type not in upload_setting("CONTENT_TYPES"):
+        raise UploadError(f"Files of type {content_type} are not accepted")
+    if not 0 < size <= upload_setting("MAX_SIZE"):
+        raise UploadError(
+            f"File size must be between 1 and {upload_setting('MAX_SIZE')} bytes"
+        )
+    sha256 = (sha256 or "").lower()
+    if sha256 and (len(sha256) != 64 or sha256.strip(string.hexdigits)):
+        raise UploadError("sha256 must be 64 hex digits")
+    return AttachmentUpload.objects.create(
+        emergency=emergency,
+        user=user,
+        filename=filename[:255],
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+    )
+
+
+def get_upload(upload_id, user):
+    upload = AttachmentUpload.objects.filter(id=upload_id, user=user).first()
+    if upload is None:
+        raise UploadError("Upload does not exist")
+    return upload
+
+
+def write_chunk(upload, start, length, stream, sha256=""):
+    """Store `length` bytes of `stream` as the chunk at offset `start`
+
+    Returns the upload with the chunk recorded. The chunk is written before
+    the upload row is locked, so a slow client never holds a lock.
+    """
+    if start != upload.received:
+        raise OffsetMismatch(upload.received)
+    if not 0 < length <= upload_setting("CHUNK_SIZE"):
+        raise UploadError(
+            f"Chunks must be between 1 and {upload_setting('CHUNK_SIZE')} bytes"
+        )
+    if start + length > upload.size:
+        raise UploadError(f"Chunk runs past the end of the {upload.size} bytes")
+
+    storage = attachment_storage()
+    reader = HashingReader(stream, length)
+    name = stream_to_storage(
+        storage, f"uploads/{upload.id}/{start:012d}", reader, length
+    )
+    digest = reader.sha256.hexdigest()
+    if reader.count != length:
+        storage.delete(name)
+        raise UploadError(f"Chunk ended after {reader.count} of {length} bytes")
+    if sha256 and sha256.lower() != digest:
+        storage.delete(name)
+        raise UploadError("Chunk does not match its SHA-256")
+
+    with transaction.atomic():
+        upload = AttachmentUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.received != start:
+            # A retried request got there first
+            storage.delete(name)
+            raise OffsetMismatch(upload.received)
+        upload.parts.append([start, length, digest, name])
+        upload.received += length
+        upload.save(update_fields=["parts", "received", "updated_at"])
+    return upload
+
+
+def attachment_name(upload):
+    extension = os.path.splitext(get_valid_filename(upload.filename))[1][:10]
+    return f"attachments/{upload.emergency_id}/{upload.id}{extension.lower()}"
+
+
+def finish_upload(upload):
+    """Join the chunks of a fully received upload into its Attachment
+
+    The parts are joined and hashed before the upload row is locked, so a
+    retried last chunk doesn't wait out the join; the lock is only held to
+    check that no other request finished first and to create the
+    Attachment. Safe to call again after a failure: an upload that was
+    already finished returns its Attachment.
+    """
+    storage = attachment_storage()
+    upload_id = upload.pk
+    upload = AttachmentUpload.objects.filter(pk=upload_id).first()
+    if upload is None:
+        # Finished by an earlier request
+        return Attachment.objects.get(pk=upload_id)
+    if upload.received != upload.size:
+        raise UploadError(f"Upload has {upload.received} of {upload.size} bytes")
+    parts = [name for _, _, _, name in upload.parts]
+    reader = HashingReader(PartsReader(storage, parts), upload.size)
+    name = stream_to_storage(storage, attachment_name(upload), reader, upload.size)
+    digest = reader.sha256.hexdigest()
+    mismatch = upload.sha256 and upload.sha256 != digest
+    if reader.count != upload.size or mismatch:
+        storage.delete(name)
+        raise UploadError("Uploaded file does not match its SHA-256")
+
+    with transaction.atomic():
+        locked = (
+            AttachmentUpload.objects.select_for_update().filter(pk=upload_id).first()
+        )
+        if locked is None:
+            # Another request joined the parts first; keep its file
+            storage.delete(name)
+            return Attachment.objects.get(pk=upload_id)
+        attachment = Attachment.objects.create(
+            id=upload.id,
+            emergency_id=upload.emergency_id,
+            uploaded_by_id=upload.user_id,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=upload.size,
+            sha256=digest,
+            storage_name=name,
+        )
+        publish(
+            "attachment.uploaded",
+            attachment,
+            {
+                "emergency_id": str(upload.emergency_id),
+                "content_type": upload.content_type,
+                "size": upload.size,
+            },
+        )
+        upload.delete()
+    delete_parts(storage, parts)
+    return attachment
+
+
+def delete_parts(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def purge_uploads(now=None):
+    """Delete uploads idle for EXPIRE_SECONDS and their chunks; returns how many"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=upload_setting("EXPIRE_SECONDS"))
+    storage = attachment_storage()
+    purged = 0
+    for upload in AttachmentUpload.objects.filter(updated_at__lt=cutoff).iterator():
+        delete_parts(storage, [name for _, _, _, name in upload.parts])
+        upload.delete()
+        purged += 1
+    return purged
@@ -1 +1,92 @@
-# Create your views here.
+# backend/emergencies/views.py
+import re
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.shortcuts import get_user_by_token
+from graphql_jwt.utils import get_credentials
+
+from emergencies import uploads
+from emergencies.models import Attachment
+
+CHUNK_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)$")
+STATUS_RANGE = re.compile(r"bytes \*/(\d+)$")
+
+
+def upload_state(upload):
+    return {
+        "id": str(upload.id),
+        "received": upload.received,
+        "size": upload.size,
+        "complete": False,
+    }
+
+
+def attachment_state(attachment):
+    return {
+        "id": str(attachment.id),
+        "received": attachment.size,
+        "size": attachment.size,
+        "complete": True,
+        "sha256": attachment.sha256,
+    }
+
+
+def error(message, status, **extra):
+    return JsonResponse({"error": message, **extra}, status=status)
+
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+def upload_chunk(request, upload_id):
+    """Receive one chunk of a resumable upload (see emergencies/uploads.py)
+
+    `Content-Range: bytes <first>-<last>/<size>` stores the body at that
+    offset; `Content-Range: bytes */<size>` with no body reports progress and
+    finishes an upload whose bytes have all arrived.
+    """
+    try:
+        token = get_credentials(request)
+        user = get_user_by_token(token, request) if token else None
+    except JSONWebTokenError as e:
+        return error(str(e), 401)
+    if user is None:
+        return error("Authentication required", 401)
+
+    content_range = request.headers.get("Content-Range", "")
+    chunk = CHUNK_RANGE.match(content_range)
+    status = STATUS_RANGE.match(content_range)
+    if not chunk and not status:
+        return error("Content-Range must be bytes <first>-<last>/<size>", 400)
+    # A retry after the upload finished answers like the request that did
+    attachment = Attachment.objects.filter(id=upload_id, uploaded_by=user).first()
+    if attachment is not None:
+        return JsonResponse(attachment_state(attachment), status=201)
+    try:
+        upload = uploads.get_upload(upload_id, user)
+        size = int((chunk or status).groups()[-1])
+        if size != upload.size:
+            raise uploads.UploadError(f"Upload is {upload.size} bytes, not {size}")
+        if chunk:
+            start, last = int(chunk[1]), int(chunk[2])
+            length = last - start + 1
+            if request.headers.get("Content-Length") != str(length):
+                raise uploads.UploadError("Content-Length must match Content-Range")
+            # Read the request as a stream so the chunk is never held whole
+            upload = uploads.write_chunk(
+                upload,
+                start,
+                length,
+                request,
+                request.headers.get("X-Chunk-SHA256", ""),
+            )
+        if upload.received < upload.size:
+            return JsonResponse(upload_state(upload))
+        attachment = uploads.finish_upload(upload)
+    except uploads.OffsetMismatch as e:
+        return error(str(e), e.status, received=e.received)
+    except uploads.UploadError as e:
+        return error(str(e), e.status)
+    return JsonResponse(attachment_state(attachment), status=201)
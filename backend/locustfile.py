@@ -1,34 +1,478 @@
+"""
+Alerto24 load-test scenario pack.
+
+Weighted personas mirror production traffic:
+- CitizenUser: logs in with tokenAuth, reports emergencies, checks the feed
+- ProviderUser: pings location, flips status and works dispatched emergencies
+- DispatcherUser: watches the emergency/provider boards and the staff dashboard
+
+Every GraphQL request is named after its operation (e.g. "gql createEmergency")
+so Locust reports latency and failure rates per operation; GraphQL `errors`
+count as failures. A saturation summary at the end names the user count at
+which each operation's p95 first exceeded SATURATION_P95_MS. Accounts match
+scripts/testing/create_test_data.py.
+
+Surge mode concentrates a spike of reports on one city:
+    SURGE_CITY=Manila SURGE_START=60 SURGE_DURATION=120 SURGE_MULTIPLIER=10 \\
+        locust -f locustfile.py --host http://localhost:8000
+"""
+
+import base64
+import os
 import random
+import time
+
+from locust import HttpUser, between, events, task
+
+CITIZEN_ACCOUNTS = int(os.environ.get("LOCUST_CITIZEN_ACCOUNTS", 1000))
+PROVIDER_ACCOUNTS = int(os.environ.get("LOCUST_PROVIDER_ACCOUNTS", 8))
+PASSWORD = os.environ.get("LOCUST_PASSWORD", "password123")
+DISPATCHER_USERNAME = os.environ.get("LOCUST_DISPATCHER_USERNAME", "admin")
+DISPATCHER_PASSWORD = os.environ.get("LOCUST_DISPATCHER_PASSWORD", "admin123")
+
+# Refresh a bit before graphql_jwt's default 5 minute expiry
+TOKEN_REFRESH_SECONDS = 240
+
+# (city, latitude, longitude, spread in degrees, population weight)
+CITIES = [
+    ("Manila", 14.5995, 120.9842, 0.04, 18),
+    ("Quezon City", 14.6760, 121.0437, 0.06, 30),
+    ("Caloocan", 14.6507, 120.9676, 0.03, 16),
+    ("Davao City", 7.1907, 125.4553, 0.10, 18),
+    ("Cebu City", 10.3157, 123.8854, 0.05, 10),
+    ("Zamboanga City", 6.9214, 122.0790, 0.08, 9),
+]
+
+EMERGENCY_TYPES = [
+    ("MEDICAL", 45),
+    ("CAR_ACCIDENT", 20),
+    ("POLICE", 15),
+    ("FIRE", 10),
+    ("UTILITY", 6),
+    ("NATURAL_DISASTER", 2),
+    ("OTHER", 2),
+]
+
+TOKEN_AUTH = """
+mutation tokenAuth($username: String!, $password: String!) {
+  tokenAuth(username: $username, password: $password) {
+    token
+    refreshToken
+    user { id }
+  }
+}
+"""
+
+REFRESH_TOKEN = """
+mutation refreshToken($refreshToken: String!) {
+  refreshToken(refreshToken: $refreshToken) { token refreshToken }
+}
+"""
+
+CREATE_EMERGENCY = """
+mutation createEmergency(
+  $emergencyType: String!, $userId: UUID!,
+  $latitude: Float!, $longitude: Float!, $description: String
+) {
+  createEmergency(
+    emergencyType: $emergencyType, userId: $userId,
+    latitude: $latitude, longitude: $longitude, description: $description
+  ) {
+    emergency { id code }
+  }
+}
+"""
+
+RECENT_EMERGENCIES = """
+query recentEmergencies($first: Int) {
+  emergencies(first: $first) { id code emergencyType status createdAt }
+}
+"""
+
+PENDING_EMERGENCIES = """
+query pendingEmergencies($first: Int) {
+  emergencies(status: "PENDING", first: $first) {
+    id emergencyType priority latitude longitude createdAt
+  }
+}
+"""
+
+PROVIDER_BOARD = """
+query providerBoard {
+  providers { id status latitude longitude lastPing }
+}
+"""
+
+UPDATE_LOCATION = """
+mutation updateProviderLocation($latitude: Float!, $longitude: Float!) {
+  updateProviderLocation(latitude: $latitude, longitude: $longitude) {
+    provider { id }
+  }
+}
+"""
+
+UPDATE_PROVIDER_STATUS = """
+mutation updateProviderStatus($status: String!) {
+  updateProviderStatus(status: $status) { provider { id status } }
+}
+"""
+
+ACCEPT_EMERGENCY = """
+mutation acceptEmergency($emergencyId: UUID!) {
+  acceptEmergency(emergencyId: $emergencyId) { emergency { id status } }
+}
+"""
+
+UPDATE_EMERGENCY_STATUS = """
+mutation updateEmergencyStatus($emergencyId: UUID!, $status: String!) {
+  updateEmergencyStatus(emergencyId: $emergencyId, status: $status) {
+    emergency { id status }
+  }
+}
+"""
+
+
+def weighted_choice(options):
+    """Pick from (value, weight) pairs"""
+    values = [option[0] for option in options]
+    weights = [option[-1] for option in options]
+    return random.choices(values, weights=weights)[0]
+
+
+def random_city():
+    return random.choices(CITIES, weights=[city[-1] for city in CITIES])[0]
+
+
+def point_near(city):
+    """Gaussian scatter around a city centre"""
+    _, lat, lng, spread, _ = city
+    return random.gauss(lat, spread), random.gauss(lng, spread)
+
+
+def decode_global_id(global_id):
+    """UserType is a relay node; mutations take the raw UUID"""
+    return base64.b64decode(global_id).decode().split(":", 1)[1]
+
+
+class Surge:
+    """Time window in which citizens report far more often, in a single city"""
+
+    def __init__(self):
+        self.city = next(
+            (c for c in CITIES if c[0] == os.environ.get("SURGE_CITY")), None
+        )
+        self.start = float(os.environ.get("SURGE_START", 60))
+        self.duration = float(os.environ.get("SURGE_DURATION", 120))
+        self.multiplier = float(os.environ.get("SURGE_MULTIPLIER", 10))
+        self.test_started = time.monotonic()
+
+    def active(self):
+        if self.city is None:
+            return False
+        elapsed = time.monotonic() - self.test_started
+        return self.start <= elapsed < self.start + self.duration
+
+
+surge = Surge()
+
+
+class SaturationTracker:
+    """Per-operation p95 over fixed windows, noting the load at which it degrades
+
+    The first window where an operation's p95 crosses SATURATION_P95_MS is
+    recorded with the active user count and request rate, and a summary is
+    printed when the test stops.
+    """
+
+    window_seconds = 10
+
+    def __init__(self):
+        self.threshold_ms = float(os.environ.get("SATURATION_P95_MS", 1000))
+        self.environment = None
+        self.reset()
+
+    def reset(self):
+        self.window_started = time.monotonic()
+        self.samples = {}
+        self.saturated = {}
 
-from locust import HttpUser, between, task
+    def record(self, name, response_time):
+        self.samples.setdefault(name, []).append(response_time)
+        if time.monotonic() - self.window_started >= self.window_seconds:
+            self.close_window()
 
+    def close_window(self):
+        elapsed = time.monotonic() - self.window_started
+        runner = getattr(self.environment, "runner", None)
+        users = runner.user_count if runner else 0
+        for name, timings in self.samples.items():
+            if name in self.saturated or len(timings) < 20:
+                continue
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            if p95 > self.threshold_ms:
+                self.saturated[name] = (users, len(timings) / elapsed, p95)
+        self.samples = {}
+        self.window_started = time.monotonic()
 
-class EmergencyUser(HttpUser):
-    wait_time = between(1, 5)
+    def report(self):
+        if not self.saturated:
+            print(f"No operation crossed p95 > {self.threshold_ms:.0f}ms")
+            return
+        print(f"Operations crossing p95 > {self.threshold_ms:.0f}ms:")
+        for name, (users, rps, p95) in sorted(
+            self.saturated.items(), key=lambda item: item[1][0]
+        ):
+            print(f"  {name:<32} at {users} users, {rps:.1f} req/s (p95 {p95:.0f}ms)")
+
+
+saturation = SaturationTracker()
+
+
+@events.init.add_listener
+def attach_environment(environment, **kwargs):
+    saturation.environment = environment
+
+
+@events.test_start.add_listener
+def reset_clocks(environment, **kwargs):
+    surge.test_started = time.monotonic()
+    saturation.reset()
+
+
+@events.request.add_listener
+def track_saturation(name, response_time, exception, **kwargs):
+    if exception is None:
+        saturation.record(name, response_time)
+
+
+@events.test_stop.add_listener
+def report_saturation(environment, **kwargs):
+    saturation.report()
+
+
+class GraphQLUser(HttpUser):
+    abstract = True
+    username = None
+    password = PASSWORD
+
+    def on_start(self):
+        self.token = None
+        self.refresh_token = None
+        self.user_id = None
+        self.token_issued = 0
+        self.login()
+
+    def graphql(self, operation, query, variables=None, auth=True):
+        """POST one operation, failing the sample on HTTP or GraphQL errors"""
+        headers = {}
+        if auth and self.token:
+            headers["Authorization"] = f"JWT {self.token}"
+        with self.client.post(
+            "/graphql/",
+            json={
+                "query": query,
+                "variables": variables or {},
+                "operationName": operation,
+            },
+            headers=headers,
+            name=f"gql {operation}",
+            catch_response=True,
+        ) as response:
+            try:
+                payload = response.json()
+            except ValueError:
+                response.failure(f"HTTP {response.status_code}: non-JSON body")
+                return None
+            if payload.get("errors"):
+                response.failure(payload["errors"][0].get("message", "error"))
+                return None
+            response.success()
+            return payload.get("data")
+
+    def login(self):
+        data = self.graphql(
+            "tokenAuth",
+            TOKEN_AUTH,
+            {"username": self.username, "password": self.password},
+            auth=False,
+        )
+        if data:
+            result = data["tokenAuth"]
+            self.token = result["token"]
+            self.refresh_token = result["refreshToken"]
+            self.user_id = decode_global_id(result["user"]["id"])
+            self.token_issued = time.monotonic()
+
+    def ensure_token(self):
+        """Refresh before expiry; fall back to a fresh login"""
+        if self.token is None:
+            self.login()
+            return
+        if time.monotonic() - self.token_issued < TOKEN_REFRESH_SECONDS:
+            return
+        data = self.graphql(
+            "refreshToken",
+            REFRESH_TOKEN,
+            {"refreshToken": self.refresh_token},
+            auth=False,
+        )
+        if data:
+            self.token = data["refreshToken"]["token"]
+            self.refresh_token = data["refreshToken"]["refreshToken"]
+            self.token_issued = time.monotonic()
+        else:
+            self.login()
+
+
+class CitizenUser(GraphQLUser):
+    weight = 6
+
+    def wait_time(self):
+        if surge.active() and self.home is surge.city:
+            return random.uniform(1, 5) / surge.multiplier
+        return random.uniform(5, 20)
+
+    def on_start(self):
+        self.username = f"citizen{random.randint(1, CITIZEN_ACCOUNTS)}"
+        self.home = random_city()
+        super().on_start()
 
     @task(3)
-    def view_emergencies(self):
-        query = {"query": "{ emergencies { id emergencyType status } }"}
-        self.client.post("/graphql/", json=query)
+    def report_emergency(self):
+        self.ensure_token()
+        if self.user_id is None:
+            return
+        city = surge.city if surge.active() else self.home
+        latitude, longitude = point_near(city)
+        self.graphql(
+            "createEmergency",
+            CREATE_EMERGENCY,
+            {
+                "emergencyType": weighted_choice(EMERGENCY_TYPES),
+                "userId": self.user_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "description": f"Load test report near {city[0]}",
+            },
+        )
+
+    @task(5)
+    def check_feed(self):
+        self.ensure_token()
+        self.graphql("recentEmergencies", RECENT_EMERGENCIES, {"first": 20})
 
     @task(1)
-    def create_emergency(self):
-        mutation = {
-            "query": """
-            mutation {
-              createEmergency(
-                emergencyType: "MEDICAL"
-                latitude: %.6f
-                longitude: %.6f
-              ) {
-                emergency { id code }
-              }
-            }
-            """
-            % (random.uniform(40.7, 40.8), random.uniform(-74.1, -73.9))
-        }
-        self.client.post("/graphql/", json=mutation)
-
-    @task(2)
     def health_check(self):
-        self.client.get("/health/")
+        self.client.get("/health/", name="health")
+
+
+class ProviderUser(GraphQLUser):
+    weight = 3
+    wait_time = between(2, 6)
+
+    def on_start(self):
+        self.username = f"provider_user{random.randint(1, PROVIDER_ACCOUNTS)}"
+        self.home = random_city()
+        self.position = point_near(self.home)
+        self.assignment = None
+        self.assignment_status = None
+        super().on_start()
+        self.graphql(
+            "updateProviderStatus", UPDATE_PROVIDER_STATUS, {"status": "AVAILABLE"}
+        )
+
+    @task(10)
+    def ping_location(self):
+        self.ensure_token()
+        # Drift roughly 100m per ping
+        latitude, longitude = self.position
+        self.position = (
+            latitude + random.gauss(0, 0.001),
+            longitude + random.gauss(0, 0.001),
+        )
+        self.graphql(
+            "updateProviderLocation",
+            UPDATE_LOCATION,
+            {"latitude": self.position[0], "longitude": self.position[1]},
+        )
+
+    @task(3)
+    def work_emergency(self):
+        self.ensure_token()
+        if self.assignment is None:
+            data = self.graphql(
+                "pendingEmergencies", PENDING_EMERGENCIES, {"first": 10}
+            )
+            if not data or not data["emergencies"]:
+                return
+            candidate = random.choice(data["emergencies"])
+            if self.graphql(
+                "acceptEmergency", ACCEPT_EMERGENCY, {"emergencyId": candidate["id"]}
+            ):
+                self.assignment = candidate["id"]
+                self.assignment_status = "DISPATCHED"
+            return
+
+        next_status = {
+            "DISPATCHED": "EN_ROUTE",
+            "EN_ROUTE": "ON_SITE",
+            "ON_SITE": "RESOLVED",
+        }[self.assignment_status]
+        if self.graphql(
+            "updateEmergencyStatus",
+            UPDATE_EMERGENCY_STATUS,
+            {"emergencyId": self.assignment, "status": next_status},
+        ):
+            self.assignment_status = next_status
+        if next_status == "RESOLVED" or self.assignment_status != next_status:
+            self.assignment = None
+
+    @task(1)
+    def take_break(self):
+        if self.assignment is not None:
+            return
+        self.ensure_token()
+        self.graphql(
+            "updateProviderStatus",
+            UPDATE_PROVIDER_STATUS,
+            {"status": random.choice(["BREAK", "AVAILABLE", "AVAILABLE"])},
+        )
+
+
+class DispatcherUser(GraphQLUser):
+    weight = 1
+    wait_time = between(3, 8)
+    username = DISPATCHER_USERNAME
+    password = DISPATCHER_PASSWORD
+
+    def on_start(self):
+        super().on_start()
+        self.dashboard_login()
+
+    def dashboard_login(self):
+        """Session login for the server-rendered staff dashboard"""
+        self.client.get("/accounts/login/", name="dashboard login form")
+        self.client.post(
+            "/accounts/login/",
+            {
+                "username": self.username,
+                "password": self.password,
+                "csrfmiddlewaretoken": self.client.cookies.get("csrftoken", ""),
+            },
+            name="dashboard login",
+        )
+
+    @task(5)
+    def watch_pending(self):
+        self.ensure_token()
+        self.graphql("pendingEmergencies", PENDING_EMERGENCIES, {"first": 50})
+
+    @task(3)
+    def watch_providers(self):
+        self.ensure_token()
+        self.graphql("providerBoard", PROVIDER_BOARD)
+
+    @task(1)
+    def staff_dashboard(self):
+        self.client.get("/dashboard/", name="staff dashboard")
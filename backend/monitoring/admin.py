@@ -0,0 +1,54 @@
+import json
+
+from django.contrib import admin
+from django.utils.html import format_html, format_html_join
+
+from .models import SlowOperation
+
+
+@admin.register(SlowOperation)
+class SlowOperationAdmin(admin.ModelAdmin):
+    list_display = ("operation", "duration_ms", "query_count", "db_ms", "created_at")
+    list_filter = ("operation",)
+    search_fields = ("operation",)
+    readonly_fields = (
+        "operation",
+        "duration_ms",
+        "query_count",
+        "db_ms",
+        "created_at",
+        "variables_pretty",
+        "resolvers_pretty",
+        "statements_pretty",
+    )
+    exclude = ("variables_shape", "resolvers", "statements")
+
+    # Rows are written by the sampler only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @staticmethod
+    def pretty(value):
+        return format_html("<pre>{}</pre>", json.dumps(value, indent=2))
+
+    @admin.display(description="Variables shape")
+    def variables_pretty(self, obj):
+        return self.pretty(obj.variables_shape)
+
+    @admin.display(description="Resolvers")
+    def resolvers_pretty(self, obj):
+        return self.pretty(obj.resolvers)
+
+    @admin.display(description="Statements")
+    def statements_pretty(self, obj):
+        return format_html_join(
+            "",
+            "<p><strong>{} ms</strong></p><pre>{}</pre><pre>{}</pre>",
+            (
+                (statement["duration_ms"], statement["sql"], statement.get("plan"))
+                for statement in obj.statements
+            ),
+        )
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "monitoring"
+    verbose_name = "Monitoring"
+
+    def ready(self):
+        from monitoring import metrics
+
+        connection_created.connect(
+            metrics.install_db_metrics, dispatch_uid="monitoring.db_metrics"
+        )
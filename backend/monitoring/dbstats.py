@@ -0,0 +1,128 @@
+# monitoring/dbstats.py
+"""
+Cheap row-count estimates from planner statistics.
+
+On PostgreSQL, table sizes come from pg_class.reltuples and value
+distributions of low-cardinality columns (status, type) come from the
+most-common-values list in pg_stats, so nothing scans the table. Other
+backends, or tables that have never been analyzed, fall back to an exact
+query cached for a short time.
+
+`relation_sizes()` reports on-disk table and index sizes for capacity
+checks (the `table_sizes` command).
+"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from config.fields import EnumField
+
+FALLBACK_CACHE_SECONDS = 30
+
+
+def estimate_row_count(model):
+    """Approximate number of rows in the model's table"""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0 on older servers) until the table is analyzed
+        if row and row[0] > 0:
+            return int(row[0])
+    return cache.get_or_set(
+        f"dbstats:count:{model._meta.label}",
+        model._default_manager.count,
+        FALLBACK_CACHE_SECONDS,
+    )
+
+
+def stored_value(field, value):
+    """Python value of a pg_stats entry; EnumField columns hold codes"""
+    if isinstance(field, EnumField):
+        return field.values[int(value)]
+    return value
+
+
+def estimate_value_counts(model, field_name):
+    """Approximate {value: rows} for a low-cardinality column"""
+    field = model._meta.get_field(field_name)
+    if connection.vendor == "postgresql":
+        column = field.column
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.reltuples,
+                       s.most_common_vals::text::text[],
+                       s.most_common_freqs
+                FROM pg_class c
+                JOIN pg_stats s
+                  ON s.schemaname = current_schema()
+                 AND s.tablename = c.relname
+                 AND s.attname = %s
+                WHERE c.oid = %s::regclass
+                """,
+                [column, model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0 and row[1]:
+            reltuples, values, freqs = row
+            return {
+                stored_value(field, value): int(round(freq * reltuples))
+                for value, freq in zip(values, freqs)
+            }
+
+    def exact():
+        rows = (
+            model._default_manager.order_by()
+            .values_list(field_name)
+            .annotate(count=Count("pk"))
+        )
+        return {str(value): count for value, count in rows}
+
+    return cache.get_or_set(
+        f"dbstats:values:{model._meta.label}:{field_name}",
+        exact,
+        FALLBACK_CACHE_SECONDS,
+    )
+
+
+def relation_sizes(table):
+    """(table bytes, {index name: bytes}) for a table
+
+    PostgreSQL reads pg_relation_size(); SQLite needs the dbstat virtual
+    table, and other backends return None.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                """
+                SELECT pg_relation_size(c.oid), i.relname, pg_relation_size(i.oid)
+                FROM pg_class c
+                LEFT JOIN pg_index x ON x.indrelid = c.oid
+                LEFT JOIN pg_class i ON i.oid = x.indexrelid
+                WHERE c.oid = %s::regclass
+                """,
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT sum(pgsize) FROM dbstat WHERE name = %s),
+                    m.name,
+                    (SELECT sum(pgsize) FROM dbstat WHERE name = m.name)
+                FROM (SELECT 1)
+                LEFT JOIN sqlite_master m ON m.type = 'index' AND m.tbl_name = %s
+                """,
+                [table, table],
+            )
+        else:
+            return None
+        rows = cursor.fetchall()
+    if not rows:
+        return None
+    return rows[0][0] or 0, {name: size or 0 for _, name, size in rows if name}
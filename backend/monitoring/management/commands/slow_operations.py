@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.models import SlowOperation
+
+
+class Command(BaseCommand):
+    help = "List captured slow GraphQL operations, or show one with its plans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--show", type=int, metavar="ID")
+        parser.add_argument("--clear", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted, _ = SlowOperation.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} slow operations")
+            return
+
+        if options["show"] is not None:
+            try:
+                slow = SlowOperation.objects.get(pk=options["show"])
+            except SlowOperation.DoesNotExist:
+                raise CommandError(
+                    f"No slow operation with id {options['show']}"
+                ) from None
+            self.show(slow)
+            return
+
+        for slow in SlowOperation.objects.all()[: options["limit"]]:
+            self.stdout.write(
+                f"{slow.id:>6}  {slow.created_at:%Y-%m-%d %H:%M:%S}  "
+                f"{slow.duration_ms:>9.1f}ms  {slow.query_count:>4} queries  "
+                f"{slow.operation}"
+            )
+
+    def show(self, slow):
+        self.stdout.write(self.style.MIGRATE_HEADING(str(slow)))
+        self.stdout.write(
+            f"{slow.query_count} queries, {slow.db_ms:.1f}ms in the database"
+        )
+        self.stdout.write(f"variables: {json.dumps(slow.variables_shape)}")
+        for key, stats in slow.resolvers.items():
+            self.stdout.write(f"  {key}: {json.dumps(stats)}")
+        for statement in slow.statements:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(f"\n{statement['duration_ms']}ms")
+            )
+            self.stdout.write(statement["sql"])
+            if statement.get("plan"):
+                self.stdout.write(statement["plan"])
@@ -0,0 +1,45 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.dbstats import estimate_row_count, relation_sizes
+
+
+def kib(size):
+    return f"{size / 1024:>10.1f} KiB"
+
+
+class Command(BaseCommand):
+    help = "Show table and index sizes, e.g. before and after a schema change"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.Model",
+            help="Defaults to emergencies, providers, their live state and users",
+        )
+
+    def handle(self, *args, **options):
+        labels = options["models"] or [
+            "emergencies.Emergency",
+            "providers.Provider",
+            "providers.ProviderLiveState",
+            "users.User",
+        ]
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                raise CommandError(f"Unknown model {label}") from None
+            table = model._meta.db_table
+            sizes = relation_sizes(table)
+            if sizes is None:
+                raise CommandError("Table sizes need PostgreSQL or SQLite's dbstat")
+            table_bytes, indexes = sizes
+            rows = estimate_row_count(model)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{table} ({rows} rows)"))
+            self.stdout.write(f"  {'table':<40}{kib(table_bytes)}")
+            for name, size in sorted(indexes.items()):
+                self.stdout.write(f"  {name:<40}{kib(size)}")
+            total = table_bytes + sum(indexes.values())
+            self.stdout.write(f"  {'total':<40}{kib(total)}")
@@ -0,0 +1,282 @@
+# monitoring/metrics.py
+"""
+Prometheus metrics for the API, the database and background pipelines.
+
+Request and query metrics are recorded inline; gauges that need a lookup
+(connections, queue depths, emergency/provider status counts) are computed
+by collectors at scrape time. Background pipelines expose their backlog with
+`register_queue_depth("name", callable)`.
+
+Queue depths are COUNT(*)s over the pipeline tables, so a process
+recomputes them at most every METRICS["QUEUE_DEPTH_SECONDS"] (about one
+scrape interval) however often it is scraped.
+
+The /metrics endpoint answers only requests carrying
+`Authorization: Bearer <METRICS["TOKEN"]>` or coming from
+METRICS["ALLOWED_IPS"] (addresses or networks; localhost by default).
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR so every worker's samples are
+aggregated into one scrape.
+"""
+
+import hmac
+import ipaddress
+import os
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+GRAPHQL_OPERATION_SECONDS = Histogram(
+    "alerto_graphql_operation_seconds",
+    "GraphQL operation latency",
+    ["operation", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+GRAPHQL_OPERATION_QUERIES = Histogram(
+    "alerto_graphql_operation_db_queries",
+    "SQL queries issued per GraphQL operation",
+    ["operation"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000),
+)
+DB_QUERY_SECONDS = Histogram(
+    "alerto_db_query_seconds",
+    "SQL statement duration",
+    ["alias", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_QUERY_ERRORS = Counter(
+    "alerto_db_query_errors_total",
+    "SQL statements that raised",
+    ["alias", "statement"],
+)
+
+DEFAULTS = {
+    # Operation names our own clients send, labelled as themselves
+    "OPERATION_NAMES": [],
+    "TOKEN": "",
+    "ALLOWED_IPS": ["127.0.0.1", "::1"],
+    "QUEUE_DEPTH_SECONDS": 15,
+}
+
+_queue_depths = {}
+_local = threading.local()
+
+
+def metrics_setting(name):
+    return getattr(settings, "METRICS", {}).get(name, DEFAULTS[name])
+
+
+@lru_cache(maxsize=None)
+def known_operation_names():
+    """Root fields of the schema plus METRICS["OPERATION_NAMES"]"""
+    from graphene_django.settings import graphene_settings
+
+    schema = graphene_settings.SCHEMA.graphql_schema
+    names = set(metrics_setting("OPERATION_NAMES"))
+    for root in (schema.query_type, schema.mutation_type, schema.subscription_type):
+        if root is not None:
+            names.update(root.fields)
+    return frozenset(names)
+
+
+def operation_label(name, root_field=None):
+    """Label for an operation, from names the server knows only
+
+    Operation names are chosen by clients, so one sending random names
+    could otherwise mint a label per request. Unknown names fall back to
+    the operation's first root field, which the schema bounds.
+    """
+    known = known_operation_names()
+    if name in known:
+        return name
+    if root_field in known:
+        return root_field
+    return "anonymous"
+
+
+def scrape_allowed(request):
+    """True for a scraper with the bearer token or from an allowed address"""
+    token = metrics_setting("TOKEN")
+    authorization = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(authorization, f"Bearer {token}"):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network.strip(), strict=False)
+        for network in metrics_setting("ALLOWED_IPS")
+        if network.strip()
+    )
+
+
+def statement_label(sql):
+    verb = sql.lstrip()[:6].upper()
+    if verb in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return verb
+    return "OTHER"
+
+
+def query_count():
+    """SQL statements run by this thread so far"""
+    return getattr(_local, "queries", 0)
+
+
+def db_metrics_wrapper(alias):
+    """Build a connection.execute_wrapper recording every statement"""
+
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        statement = statement_label(sql)
+        try:
+            return execute(sql, params, many, context)
+        except Exception:
+            DB_QUERY_ERRORS.labels(alias, statement).inc()
+            raise
+        finally:
+            DB_QUERY_SECONDS.labels(alias, statement).observe(
+                time.perf_counter() - start
+            )
+            _local.queries = getattr(_local, "queries", 0) + 1
+
+    return wrapper
+
+
+def install_db_metrics(sender, connection, **kwargs):
+    """connection_created receiver: wrap each new connection once"""
+    if not getattr(connection, "_alerto_metrics_installed", False):
+        connection.execute_wrappers.append(db_metrics_wrapper(connection.alias))
+        connection._alerto_metrics_installed = True
+
+
+def observe_operation(operation_name, root_field, seconds, queries, failed):
+    label = operation_label(operation_name, root_field)
+    GRAPHQL_OPERATION_SECONDS.labels(label, "error" if failed else "ok").observe(
+        seconds
+    )
+    GRAPHQL_OPERATION_QUERIES.labels(label).observe(queries)
+
+
+def register_queue_depth(name, func):
+    """Expose `func()` as the backlog of a background pipeline"""
+    _queue_depths[name] = func
+
+
+class RuntimeCollector:
+    """Scrape-time gauges: connections, queue depths and status counts"""
+
+    def __init__(self):
+        self._depths = None
+        self._depths_at = 0.0
+        self._depths_lock = threading.Lock()
+
+    def queue_depths(self):
+        """{queue: depth}, recounted once METRICS["QUEUE_DEPTH_SECONDS"] passed"""
+        with self._depths_lock:
+            age = time.monotonic() - self._depths_at
+            if self._depths is None or age >= metrics_setting("QUEUE_DEPTH_SECONDS"):
+                depths = {}
+                for name, func in sorted(_queue_depths.items()):
+                    try:
+                        depths[name] = func()
+                    except Exception:
+                        continue
+                self._depths = depths
+                self._depths_at = time.monotonic()
+            return self._depths
+
+    def describe(self):
+        # Keeps registration from running collect(), which touches the DB
+        return []
+
+    def collect(self):
+        from emergencies.models import Emergency
+        from monitoring.dbstats import estimate_value_counts
+        from providers.models import ProviderLiveState
+
+        open_connections = GaugeMetricFamily(
+            "alerto_db_connections_open",
+            "Database connections held by this process",
+            labels=["alias"],
+        )
+        for alias in connections:
+            conn = connections[alias]
+            open_connections.add_metric([alias], int(conn.connection is not None))
+        yield open_connections
+
+        server = self.server_connections()
+        if server is not None:
+            in_use = GaugeMetricFamily(
+                "alerto_db_server_connections",
+                "Backends connected to the database server",
+                labels=["state"],
+            )
+            in_use.add_metric(["used"], server[0])
+            in_use.add_metric(["max"], server[1])
+            yield in_use
+
+        depth = GaugeMetricFamily(
+            "alerto_queue_depth",
+            "Pending items in background pipelines",
+            labels=["queue"],
+        )
+        for name, value in self.queue_depths().items():
+            depth.add_metric([name], value)
+        yield depth
+
+        for model, name, noun in (
+            (Emergency, "alerto_emergencies", "emergencies"),
+            # Provider status lives in the narrow live-state table
+            (ProviderLiveState, "alerto_providers", "providers"),
+        ):
+            gauge = GaugeMetricFamily(
+                name,
+                f"Estimated {noun} by status",
+                labels=["status"],
+            )
+            for status, count in estimate_value_counts(model, "status").items():
+                gauge.add_metric([status], count)
+            yield gauge
+
+    @staticmethod
+    def server_connections():
+        conn = connections["default"]
+        if conn.vendor != "postgresql":
+            return None
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*), current_setting('max_connections')::int "
+                "FROM pg_stat_activity WHERE datname = current_database()"
+            )
+            return cursor.fetchone()
+
+
+runtime_collector = RuntimeCollector()
+REGISTRY.register(runtime_collector)
+
+
+def registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    # Worker samples live on disk; scrape-time gauges are computed here
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    merged.register(runtime_collector)
+    return merged
+
+
+def render():
+    return generate_latest(registry())
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowOperation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("operation", models.CharField(max_length=100)),
+                ("duration_ms", models.FloatField()),
+                ("query_count", models.IntegerField(default=0)),
+                ("db_ms", models.FloatField(default=0)),
+                ("variables_shape", models.JSONField(blank=True, default=dict)),
+                ("resolvers", models.JSONField(blank=True, default=dict)),
+                ("statements", models.JSONField(blank=True, default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "slow_operations",
+                "ordering": ["-id"],
+            },
+        ),
+    ]
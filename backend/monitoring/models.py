@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SlowOperation(models.Model):
+    """Diagnostic bundle for a GraphQL operation that crossed the threshold
+
+    The table is a bounded ring buffer: monitoring.slow_operations keeps only
+    the newest SLOW_OPERATIONS["RING_SIZE"] rows.
+    """
+
+    operation = models.CharField(max_length=100)
+    duration_ms = models.FloatField()
+    query_count = models.IntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    variables_shape = models.JSONField(default=dict, blank=True)
+    # Resolver timing tree; empty when the request wasn't profiled
+    resolvers = models.JSONField(default=dict, blank=True)
+    # Slowest statements with their EXPLAIN output
+    statements = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "slow_operations"
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.operation} ({self.duration_ms:.0f}ms)"
@@ -0,0 +1,212 @@
+# monitoring/slow_operations.py
+"""
+Slow GraphQL operation sampler.
+
+Every GraphQL request tracks its few slowest SQL statements. When the whole
+operation crosses SLOW_OPERATIONS["THRESHOLD_MS"], a bundle with the
+operation name, the shape of its variables, the resolver timing tree and the
+slowest statements is handed to a background thread. That thread runs
+EXPLAIN (ANALYZE, BUFFERS) on the SELECTs that take no row locks, off the
+request path, and stores the bundle in the SlowOperation ring buffer. Statement parameters are
+user data (emails, search terms, coordinates), so they are only kept in
+memory for EXPLAIN; the stored bundle has their types.
+
+A slow operation that wasn't sampled by the resolver profiler has no timing
+tree, so its next execution is profiled to capture one.
+"""
+
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from monitoring import metrics
+
+logger = logging.getLogger("monitoring.slow_operations")
+
+DEFAULTS = {
+    "THRESHOLD_MS": 500,
+    "RING_SIZE": 200,
+    "EXPLAIN_STATEMENTS": 3,
+    "MAX_PENDING": 20,
+    "ASYNC": True,
+}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-ops")
+_pending = 0
+_pending_lock = threading.Lock()
+# Operations to profile on their next execution; requests run in threads
+_profile_next = set()
+_profile_lock = threading.Lock()
+
+# SELECT ... FOR UPDATE/SHARE isn't explained: ANALYZE would take its row
+# locks and block the requests that hold or wait for them
+LOCKING_CLAUSE = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE
+)
+
+
+def slow_setting(name):
+    return getattr(settings, "SLOW_OPERATIONS", {}).get(name, DEFAULTS[name])
+
+
+class SlowQueryTracker:
+    """execute_wrapper counting statements and keeping the N slowest"""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.count = 0
+        self.db_seconds = 0.0
+        self.slowest = []
+        self._sequence = itertools.count()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.db_seconds += duration
+            # executemany() batches can't be re-run for a plan
+            entry = (duration, next(self._sequence), sql, None if many else params)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            elif duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def statements(self):
+        """Slowest first, with raw params for EXPLAIN; capture() drops them"""
+        return [
+            {
+                "sql": sql,
+                "params": list(params) if params is not None else None,
+                "duration_ms": round(duration * 1000, 3),
+            }
+            for duration, _, sql, params in sorted(self.slowest, reverse=True)
+        ]
+
+
+def variables_shape(value):
+    """Types and sizes of the variables, never their values"""
+    if isinstance(value, dict):
+        return {key: variables_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shape = [variables_shape(value[0])] if value else []
+        return {"list": len(value), "items": shape}
+    return type(value).__name__
+
+
+def should_profile(operation):
+    """True once for an operation that was recently slow without a profile"""
+    with _profile_lock:
+        if operation in _profile_next:
+            _profile_next.discard(operation)
+            return True
+    return False
+
+
+def pending_captures():
+    return _pending
+
+
+metrics.register_queue_depth("slow_operation_capture", pending_captures)
+
+
+def record(operation_name, operation, duration, tracker, variables, profile):
+    """Queue a bundle for an operation that took `duration` seconds"""
+    global _pending
+
+    if profile is None and operation_name:
+        with _profile_lock:
+            _profile_next.add(operation_name)
+    bundle = {
+        "operation": (operation or "anonymous")[:100],
+        "duration_ms": round(duration * 1000, 3),
+        "query_count": tracker.count,
+        "db_ms": round(tracker.db_seconds * 1000, 3),
+        "variables_shape": variables_shape(variables or {}),
+        "resolvers": profile.as_dict()["resolvers"] if profile else {},
+        "statements": tracker.statements(),
+    }
+    if not slow_setting("ASYNC"):
+        capture(bundle)
+        return
+    with _pending_lock:
+        if _pending >= slow_setting("MAX_PENDING"):
+            logger.warning("Dropping slow operation bundle for %s", operation)
+            return
+        _pending += 1
+    _executor.submit(_capture_async, bundle)
+
+
+def _capture_async(bundle):
+    global _pending
+
+    try:
+        capture(bundle)
+    except Exception:
+        logger.exception("Failed to capture slow operation %s", bundle["operation"])
+    finally:
+        with _pending_lock:
+            _pending -= 1
+        # This thread owns its own connection; don't leave it open
+        connection.close()
+
+
+def explain(sql, params):
+    """EXPLAIN output for a SELECT; ANALYZE and BUFFERS on PostgreSQL"""
+    if params is None or not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    if LOCKING_CLAUSE.search(sql):
+        return None
+    if connection.vendor == "postgresql":
+        prefix = connection.ops.explain_query_prefix(analyze=True, buffers=True)
+    else:
+        prefix = connection.ops.explain_query_prefix()
+    try:
+        # ANALYZE executes the statement; never let it commit anything
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                rows = cursor.fetchall()
+            transaction.set_rollback(True)
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+def param_types(params):
+    """Types of the statement parameters, never their values"""
+    if params is None:
+        return None
+    return [type(param).__name__ for param in params]
+
+
+def capture(bundle):
+    from monitoring.models import SlowOperation
+
+    explained = slow_setting("EXPLAIN_STATEMENTS")
+    for index, statement in enumerate(bundle["statements"]):
+        params = statement.pop("params")
+        if index < explained:
+            statement["plan"] = explain(statement["sql"], params)
+        statement["param_types"] = param_types(params)
+    slow = SlowOperation.objects.create(**bundle)
+
+    # Ring buffer: drop everything older than the newest RING_SIZE rows
+    size = slow_setting("RING_SIZE")
+    cutoff = list(
+        SlowOperation.objects.order_by("-id").values_list("id", flat=True)[
+            size : size + 1
+        ]
+    )
+    if cutoff:
+        SlowOperation.objects.filter(id__lte=cutoff[0]).delete()
+    return slow
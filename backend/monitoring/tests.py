@@ -0,0 +1,230 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from graphql_jwt.shortcuts import get_token
+from prometheus_client.parser import text_string_to_metric_families
+
+from emergencies.models import Emergency
+from monitoring import metrics, slow_operations
+from monitoring.models import SlowOperation
+from users.testing import make_user
+
+SYNC = {"THRESHOLD_MS": 0, "ASYNC": False}
+
+
+@override_settings(SLOW_OPERATIONS=SYNC, GRAPHQL_PROFILING={"SAMPLE_RATE": 0})
+class SlowOperationTests(TestCase):
+    """Bundles captured for slow operations, without the user's data"""
+
+    def setUp(self):
+        patcher = mock.patch.object(slow_operations, "_profile_next", set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def query(self, name, query, variables=None):
+        response = self.client.post(
+            "/graphql/",
+            json.dumps(
+                {
+                    "query": f"query {name}{query}",
+                    "operationName": name,
+                    "variables": variables or {},
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertNotIn("errors", response.json())
+
+    def test_capture_keeps_param_types_only(self):
+        self.client.force_login(make_user("dispatcher", is_staff=True))
+        self.query(
+            "Search",
+            "($q: String!) { search(query: $q) { users { id } } }",
+            {"q": "secret@example.com"},
+        )
+
+        slow = SlowOperation.objects.get()
+        self.assertEqual(slow.operation, "Search")
+        self.assertEqual(slow.variables_shape, {"q": "str"})
+        self.assertGreaterEqual(slow.query_count, 1)
+        self.assertNotIn("secret@example.com", json.dumps(slow.statements))
+        statement = slow.statements[0]
+        self.assertNotIn("params", statement)
+        self.assertIn("str", statement["param_types"])
+        self.assertTrue(statement["plan"])
+
+    def test_ring_buffer_keeps_the_newest(self):
+        with self.settings(SLOW_OPERATIONS={**SYNC, "RING_SIZE": 2}):
+            for name in ("First", "Second", "Third"):
+                self.query(name, " { emergencies { id } }")
+        self.assertEqual(
+            list(
+                SlowOperation.objects.order_by("id").values_list("operation", flat=True)
+            ),
+            ["Second", "Third"],
+        )
+
+    def test_locking_statements_are_not_explained(self):
+        for clause in ("FOR UPDATE", "for no key update", "FOR SHARE SKIP LOCKED"):
+            with self.subTest(clause=clause):
+                self.assertIsNone(
+                    slow_operations.explain(f"SELECT id FROM users {clause}", [])
+                )
+        self.assertTrue(slow_operations.explain("SELECT id FROM users", []))
+        self.assertIsNone(slow_operations.explain("UPDATE users SET phone = ''", []))
+
+    def test_unprofiled_operation_is_profiled_next_time(self):
+        self.query("Listing", " { emergencies { id } }")
+        self.assertTrue(slow_operations.should_profile("Listing"))
+        self.assertFalse(slow_operations.should_profile("Listing"))
+        self.assertEqual(SlowOperation.objects.get().resolvers, {})
+
+
+class MetricsEndpointTests(TestCase):
+    """The scrape endpoint and the labels it exposes"""
+
+    def setUp(self):
+        patcher = mock.patch.object(metrics.runtime_collector, "_depths", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scrape(self, **headers):
+        return self.client.get("/metrics", **headers)
+
+    def families(self):
+        response = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        return {
+            family.name: family
+            for family in text_string_to_metric_families(response.content.decode())
+        }
+
+    def test_only_allowed_scrapers(self):
+        outside = {"REMOTE_ADDR": "203.0.113.9"}
+        self.assertEqual(self.scrape().status_code, 200)
+        self.assertEqual(self.scrape(**outside).status_code, 403)
+        with self.settings(METRICS={"TOKEN": "s3cret", "ALLOWED_IPS": ["10.0.0.0/8"]}):
+            self.assertEqual(self.scrape().status_code, 403)
+            self.assertEqual(
+                self.scrape(**outside, HTTP_AUTHORIZATION="Bearer s3cret").status_code,
+                200,
+            )
+            self.assertEqual(
+                self.scrape(**outside, HTTP_AUTHORIZATION="Bearer nope").status_code,
+                403,
+            )
+            self.assertEqual(self.scrape(REMOTE_ADDR="10.1.2.3").status_code, 200)
+
+    def test_operation_labels_are_bounded(self):
+        for name in ("DashboardStats", "Random1234", ""):
+            response = self.client.post(
+                "/graphql/",
+                json.dumps(
+                    {
+                        "query": f"query {name} {{ emergencies {{ id }} }}",
+                        "operationName": name or None,
+                    }
+                ),
+                content_type="application/json",
+            )
+            self.assertNotIn("errors", response.json())
+        labels = {
+            sample.labels["operation"]
+            for sample in self.families()["alerto_graphql_operation_seconds"].samples
+        }
+        self.assertLessEqual({"DashboardStats", "emergencies"}, labels)
+        self.assertNotIn("Random1234", labels)
+        self.assertLessEqual(labels, metrics.known_operation_names() | {"anonymous"})
+
+    def test_queue_depths_are_cached_between_scrapes(self):
+        depth = mock.Mock(return_value=7)
+        with mock.patch.dict(metrics._queue_depths, {"test_queue": depth}):
+            for _ in range(3):
+                samples = self.families()["alerto_queue_depth"].samples
+            self.assertEqual(depth.call_count, 1)
+            with self.settings(METRICS={"QUEUE_DEPTH_SECONDS": 0}):
+                self.families()
+            self.assertEqual(depth.call_count, 2)
+        self.assertIn(
+            ("test_queue", 7.0),
+            [(sample.labels["queue"], sample.value) for sample in samples],
+        )
+        self.assertLessEqual(
+            {"outbox", "notification_events", "notification_batches"},
+            {sample.labels["queue"] for sample in samples},
+        )
+
+    def test_multiprocess_registry_merges_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                families = self.families()
+        # Worker samples come from the (empty) directory; the scrape-time
+        # gauges are still computed by the scraped process
+        self.assertNotIn("alerto_db_query_seconds", families)
+        self.assertIn("alerto_queue_depth", families)
+        self.assertIn("alerto_emergencies", families)
+
+
+@override_settings(GRAPHQL_PROFILING={"SAMPLE_RATE": 0})
+class ProfilingTests(TestCase):
+    """Sampled and header-forced resolver profiles"""
+
+    QUERY = "{ emergencies { id user { username } } }"
+
+    @classmethod
+    def setUpTestData(cls):
+        user = make_user("reporter")
+        for _ in range(2):
+            Emergency.objects.create(
+                user=user, emergency_type="FIRE", latitude=14.6, longitude=121.0
+            )
+
+    def post(self, **headers):
+        response = self.client.post(
+            "/graphql/",
+            json.dumps({"query": self.QUERY}),
+            content_type="application/json",
+            **headers,
+        )
+        body = response.json()
+        self.assertNotIn("errors", body)
+        return body
+
+    def forced(self, user=None):
+        headers = {"HTTP_X_GRAPHQL_PROFILE": "1"}
+        if user is not None:
+            headers["HTTP_AUTHORIZATION"] = f"JWT {get_token(user)}"
+        return self.post(**headers).get("extensions")
+
+    def test_sampled_request_is_logged_per_resolver(self):
+        with self.settings(GRAPHQL_PROFILING={"SAMPLE_RATE": 1}):
+            with self.assertLogs("monitoring.graphql", "INFO") as logs:
+                body = self.post()
+        self.assertNotIn("extensions", body)
+        profile = json.loads(logs.records[0].getMessage())
+        self.assertEqual(profile["operation"], "emergencies")
+        resolvers = profile["resolvers"]
+        self.assertEqual(resolvers["emergencies"]["calls"], 1)
+        self.assertEqual(resolvers["emergencies.user"]["calls"], 2)
+        self.assertEqual(
+            profile["queries"],
+            sum(stats["queries"] for stats in resolvers.values()),
+        )
+
+    def test_unsampled_request_is_not_profiled(self):
+        with self.assertNoLogs("monitoring.graphql", "INFO"):
+            self.post()
+
+    def test_debug_header_is_for_staff_only(self):
+        self.assertIsNone(self.forced())
+        self.assertIsNone(self.forced(make_user("citizen")))
+
+        with self.assertLogs("monitoring.graphql", "INFO"):
+            extensions = self.forced(make_user("dispatcher", is_staff=True))
+        self.assertEqual(extensions["profile"]["resolvers"]["emergencies"]["calls"], 1)
+
+        with self.settings(DEBUG=True), self.assertLogs("monitoring.graphql", "INFO"):
+            self.assertIn("profile", self.forced())
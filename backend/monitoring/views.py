@@ -0,0 +1,11 @@
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from monitoring import metrics as prometheus
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, for allowed scrapers only"""
+    if not prometheus.scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(prometheus.render(), content_type=CONTENT_TYPE_LATEST)
@@ -1 +1,28 @@
-# Register your models here.
+from django.contrib import admin
+
+from .models import NotificationBatch, NotificationEvent
+
+
+class NotificationBatchInline(admin.TabularInline):
+    model = NotificationBatch
+    fields = ("status", "attempts", "available_at", "failed_tokens", "sent_at")
+    readonly_fields = fields
+    can_delete = False
+    extra = 0
+    show_change_link = True
+
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ("kind", "status", "title", "recipient_count", "created_at")
+    list_filter = ("status", "kind")
+    search_fields = ("title",)
+    raw_id_fields = ("emergency",)
+    inlines = [NotificationBatchInline]
+
+
+@admin.register(NotificationBatch)
+class NotificationBatchAdmin(admin.ModelAdmin):
+    list_display = ("event", "status", "attempts", "available_at", "sent_at")
+    list_filter = ("status",)
+    raw_id_fields = ("event",)
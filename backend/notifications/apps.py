@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "notifications"
+
+    def ready(self):
+        from monitoring import metrics
+        from notifications import pipeline
+
+        metrics.register_queue_depth("notification_events", pipeline.pending_events)
+        metrics.register_queue_depth("notification_batches", pipeline.pending_batches)
@@ -0,0 +1,56 @@
+# backend/notifications/audiences.py
+"""
+Named recipient sets. An event stores {"name": ..., "params": {...}} and the
+worker calls the registered function to get a User queryset, so choosing
+recipients never happens inside the request that raised the event.
+"""
+
+from config.geo import within_radius
+from users.models import User
+
+_audiences = {}
+
+
+def register(name):
+    def decorator(func):
+        _audiences[name] = func
+        return func
+
+    return decorator
+
+
+def resolve(audience):
+    """User queryset for a stored audience"""
+    try:
+        func = _audiences[audience["name"]]
+    except KeyError:
+        raise ValueError(f"Unknown notification audience {audience!r}") from None
+    return func(**audience.get("params", {}))
+
+
+@register("users")
+def users(ids):
+    return User.objects.filter(id__in=ids)
+
+
+@register("available_providers")
+def available_providers():
+    return User.objects.filter(
+        provider_profile__live__status="AVAILABLE",
+        provider_profile__is_active=True,
+    )
+
+
+@register("dispatchers")
+def dispatchers():
+    return User.objects.filter(is_staff=True, is_active=True)
+
+
+@register("nearby_citizens")
+def nearby_citizens(latitude, longitude, radius_km):
+    return within_radius(
+        User.objects.filter(user_type="CITIZEN", is_active=True),
+        latitude,
+        longitude,
+        radius_km,
+    )
@@ -0,0 +1,48 @@
+# backend/notifications/consumers.py
+"""
+Outbox consumers queueing push notifications. The NotificationEvent is
+written in the relay transaction that marks the outbox event done, so a
+retried outbox event doesn't queue the same notification twice.
+"""
+
+from emergencies.models import Emergency
+from notifications.pipeline import (
+    notify,
+    notify_emergency_created,
+    notify_status_change,
+)
+from outbox.registry import consumer
+
+
+@consumer("notifications.emergency_created", topics=["emergency.created"])
+def emergency_created(event):
+    # Duplicate reports ride on their parent; providers were alerted already
+    if event.payload.get("parent_id"):
+        return
+    emergency = Emergency.objects.filter(id=event.aggregate_id).first()
+    if emergency is not None:
+        notify_emergency_created(emergency)
+
+
+@consumer("notifications.emergency_status", topics=["emergency.status_changed"])
+def emergency_status_changed(event):
+    emergency = Emergency.objects.filter(id=event.aggregate_id).first()
+    if emergency is not None:
+        # The emergency may have moved on since; report the status of the event
+        notify_status_change(emergency, event.payload["status"])
+
+
+@consumer("notifications.hotspot", topics=["hotspot.detected"])
+def hotspot_detected(event):
+    hotspot = event.payload
+    notify(
+        "HOTSPOT_DETECTED",
+        "dispatchers",
+        f"Hotspot: {hotspot['count']} emergencies in "
+        f"{hotspot['window_seconds'] // 60} minutes",
+        data={
+            "hotspot_id": event.aggregate_id,
+            "latitude": hotspot["latitude"],
+            "longitude": hotspot["longitude"],
+        },
+    )
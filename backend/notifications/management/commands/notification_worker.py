@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications import pipeline
+from notifications.transports import get_transport
+
+
+class Command(BaseCommand):
+    help = "Expand queued notification events and deliver their batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Concurrent transport calls"
+        )
+        parser.add_argument(
+            "--poll", type=float, default=1.0, help="Seconds to sleep when idle"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the queue once and exit"
+        )
+
+    def handle(self, *args, **options):
+        transport = get_transport()
+        batch_size = min(
+            pipeline.notification_setting("BATCH_SIZE"), transport.max_batch_size
+        )
+        send = partial(pipeline.deliver, transport=transport)
+
+        with ThreadPoolExecutor(
+            max_workers=options["workers"], thread_name_prefix="notify"
+        ) as pool:
+            while True:
+                close_old_connections()
+                expanded = pipeline.expand_pending_events(batch_size)
+                batches = pipeline.claim_batches(options["workers"] * 2)
+                statuses = list(pool.map(send, batches))
+                if expanded or batches:
+                    self.stdout.write(
+                        f"expanded {expanded} events, "
+                        f"sent {statuses.count('SENT')}/{len(batches)} batches"
+                    )
+                elif options["once"]:
+                    return
+                else:
+                    time.sleep(options["poll"])
@@ -0,0 +1,136 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("emergencies", "0003_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("EMERGENCY_CREATED", "Emergency created"),
+                            ("EMERGENCY_DISPATCHED", "Emergency dispatched"),
+                            ("PROVIDER_EN_ROUTE", "Provider en route"),
+                            ("PROVIDER_ON_SITE", "Provider on site"),
+                            ("EMERGENCY_RESOLVED", "Emergency resolved"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("EXPANDED", "Expanded"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("title", models.CharField(max_length=200)),
+                ("body", models.TextField(blank=True)),
+                ("data", models.JSONField(blank=True, default=dict)),
+                ("audience", models.JSONField(default=dict)),
+                ("recipient_count", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expanded_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "emergency",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notification_events",
+                        to="emergencies.emergency",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "notification_events",
+            },
+        ),
+        migrations.CreateModel(
+            name="NotificationBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tokens", models.JSONField(default=list)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("SENDING", "Sending"),
+                            ("SENT", "Sent"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("failed_tokens", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="batches",
+                        to="notifications.notificationevent",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "notification_batches",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="notificationevent",
+            index=models.Index(
+                fields=["status", "id"], name="notificatio_status_75f04d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificationbatch",
+            index=models.Index(
+                fields=["status", "available_at"], name="notificatio_status_ad0105_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notificationevent",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("EMERGENCY_CREATED", "Emergency created"),
+                    ("EMERGENCY_DISPATCHED", "Emergency dispatched"),
+                    ("PROVIDER_EN_ROUTE", "Provider en route"),
+                    ("PROVIDER_ON_SITE", "Provider on site"),
+                    ("EMERGENCY_RESOLVED", "Emergency resolved"),
+                    ("AREA_ALERT", "Area alert"),
+                ],
+                max_length=30,
+            ),
+        ),
+    ]
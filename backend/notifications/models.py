@@ -1 +1,86 @@
-# Create your models here.
+# backend/notifications/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class NotificationEvent(models.Model):
+    """Something recipients should hear about, before fan-out
+
+    The request path stores one event with a serialized `audience`; the
+    worker expands it into NotificationBatch rows.
+    """
+
+    KINDS = [
+        ("EMERGENCY_CREATED", "Emergency created"),
+        ("EMERGENCY_DISPATCHED", "Emergency dispatched"),
+        ("PROVIDER_EN_ROUTE", "Provider en route"),
+        ("PROVIDER_ON_SITE", "Provider on site"),
+        ("EMERGENCY_RESOLVED", "Emergency resolved"),
+        ("AREA_ALERT", "Area alert"),
+        ("HOTSPOT_DETECTED", "Hotspot detected"),
+    ]
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("EXPANDED", "Expanded"),
+        ("FAILED", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KINDS)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    emergency = models.ForeignKey(
+        "emergencies.Emergency",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="notification_events",
+    )
+
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    # {"name": <registered audience>, "params": {...}}, see audiences.py
+    audience = models.JSONField(default=dict)
+
+    recipient_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expanded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "notification_events"
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
+
+
+class NotificationBatch(models.Model):
+    """Up to NOTIFICATIONS["BATCH_SIZE"] push tokens sent in one transport call"""
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("SENDING", "Sending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+    ]
+
+    event = models.ForeignKey(
+        NotificationEvent, on_delete=models.CASCADE, related_name="batches"
+    )
+    tokens = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.IntegerField(default=0)
+    # Not picked up before this; pushed back on retry and while SENDING
+    available_at = models.DateTimeField(default=timezone.now)
+    failed_tokens = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "notification_batches"
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"{self.event.kind} x{len(self.tokens)} ({self.status})"
@@ -0,0 +1,252 @@
+# backend/notifications/pipeline.py
+"""
+Notification fan-out.
+
+`notify()` is all a request does: it stores one NotificationEvent naming an
+audience. The worker (`manage.py notification_worker`) expands each event
+into batches of push tokens and hands the batches to a thread pool that
+calls the transport, so alerting a thousand users costs the request one
+INSERT and the worker a couple of transport calls.
+
+Events and batches are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+several workers can run side by side. A claimed batch is leased for
+LEASE_SECONDS; a worker that dies mid-send leaves it to be picked up again.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from notifications import audiences
+from notifications.models import NotificationBatch, NotificationEvent
+from notifications.transports import SendResult
+from users.models import User
+
+DEFAULTS = {
+    "BATCH_SIZE": 500,
+    "MAX_ATTEMPTS": 5,
+    "RETRY_SECONDS": 30,
+    "LEASE_SECONDS": 300,
+}
+
+# Batches are inserted in groups of this many rows
+INSERT_CHUNK = 100
+
+
+def notification_setting(name):
+    return getattr(settings, "NOTIFICATIONS", {}).get(name, DEFAULTS[name])
+
+
+def notify(kind, audience, title, body="", data=None, emergency=None, **params):
+    """Queue a notification for the named audience (see audiences.py)
+
+    `params` are stored as JSON, so pass ids as strings.
+    """
+    return NotificationEvent.objects.create(
+        kind=kind,
+        audience={"name": audience, "params": params},
+        title=title,
+        body=body,
+        data=data or {},
+        emergency=emergency,
+    )
+
+
+def recipient_tokens(event, chunk_size):
+    """Stream distinct push tokens of the audience, honouring opt-outs"""
+    # UserProfile.notification_preferences = {"emergency_created": false, ...};
+    # the has_key guard keeps users without the key (NOT NULL would drop them)
+    key = event.kind.lower()
+    opted_out = Q(**{f"profile__notification_preferences__{key}": False}) & Q(
+        profile__notification_preferences__has_key=key
+    )
+    return (
+        audiences.resolve(event.audience)
+        .exclude(push_token="")
+        .exclude(opted_out)
+        .order_by()
+        .values_list("push_token", flat=True)
+        .distinct()
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def expand(event, batch_size):
+    """Split an event's recipients into NotificationBatch rows"""
+    batches = []
+    tokens = []
+    count = 0
+    for token in recipient_tokens(event, batch_size):
+        tokens.append(token)
+        count += 1
+        if len(tokens) == batch_size:
+            batches.append(NotificationBatch(event=event, tokens=tokens))
+            tokens = []
+        if len(batches) == INSERT_CHUNK:
+            NotificationBatch.objects.bulk_create(batches)
+            batches = []
+    if tokens:
+        batches.append(NotificationBatch(event=event, tokens=tokens))
+    NotificationBatch.objects.bulk_create(batches)
+
+    event.status = "EXPANDED"
+    event.recipient_count = count
+    event.expanded_at = timezone.now()
+    event.save(update_fields=["status", "recipient_count", "expanded_at"])
+
+
+def expand_pending_events(batch_size, limit=10):
+    expanded = 0
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="PENDING")
+            .order_by("id")[:limit]
+        )
+        for event in events:
+            try:
+                # Savepoint: a failing audience keeps none of its batches
+                with transaction.atomic():
+                    expand(event, batch_size)
+                expanded += 1
+            except Exception as e:
+                event.status = "FAILED"
+                event.last_error = str(e)
+                event.save(update_fields=["status", "last_error"])
+    return expanded
+
+
+def claim_batches(limit):
+    """Lease up to `limit` due batches to this worker"""
+    now = timezone.now()
+    with transaction.atomic():
+        batches = list(
+            NotificationBatch.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(status__in=["PENDING", "SENDING"], available_at__lte=now)
+            .select_related("event")
+            .order_by("available_at")[:limit]
+        )
+        NotificationBatch.objects.filter(id__in=[b.id for b in batches]).update(
+            status="SENDING",
+            attempts=F("attempts") + 1,
+            available_at=now + timedelta(seconds=notification_setting("LEASE_SECONDS")),
+        )
+    for batch in batches:
+        batch.status = "SENDING"
+        batch.attempts += 1
+    return batches
+
+
+def deliver(batch, transport):
+    """Send one claimed batch and record the outcome"""
+    close_old_connections()
+    event = batch.event
+    error = ""
+    try:
+        result = transport.send(batch.tokens, event.title, event.body, event.data)
+    except Exception as e:
+        result = SendResult(failed=list(batch.tokens))
+        error = str(e)
+
+    if result.unregistered:
+        User.objects.filter(push_token__in=result.unregistered).update(push_token="")
+
+    now = timezone.now()
+    batch.last_error = error
+    if not result.failed:
+        batch.status = "SENT"
+        batch.sent_at = now
+    elif batch.attempts >= notification_setting("MAX_ATTEMPTS"):
+        batch.status = "FAILED"
+        batch.failed_tokens = len(result.failed)
+    else:
+        # Retry only what failed, backing off exponentially
+        batch.status = "PENDING"
+        batch.tokens = result.failed
+        batch.available_at = now + timedelta(
+            seconds=notification_setting("RETRY_SECONDS") * 2 ** (batch.attempts - 1)
+        )
+    batch.save(
+        update_fields=[
+            "status",
+            "tokens",
+            "available_at",
+            "failed_tokens",
+            "last_error",
+            "sent_at",
+        ]
+    )
+    return batch.status
+
+
+def pending_batches():
+    return NotificationBatch.objects.filter(status__in=["PENDING", "SENDING"]).count()
+
+
+def pending_events():
+    return NotificationEvent.objects.filter(status="PENDING").count()
+
+
+# Emergency status -> (event kind, title) sent to the reporter
+STATUS_MESSAGES = {
+    "DISPATCHED": ("EMERGENCY_DISPATCHED", "A responder accepted your emergency"),
+    "EN_ROUTE": ("PROVIDER_EN_ROUTE", "Your responder is on the way"),
+    "ON_SITE": ("PROVIDER_ON_SITE", "Your responder has arrived"),
+    "RESOLVED": ("EMERGENCY_RESOLVED", "Your emergency was resolved"),
+}
+
+
+def emergency_data(emergency):
+    return {"emergency_id": str(emergency.id), "status": emergency.status}
+
+
+def notify_emergency_created(emergency):
+    return notify(
+        "EMERGENCY_CREATED",
+        "available_providers",
+        f"New {emergency.get_emergency_type_display()} emergency",
+        body=emergency.address or emergency.city,
+        data=emergency_data(emergency),
+        emergency=emergency,
+    )
+
+
+def broadcast_area_alert(
+    latitude, longitude, radius_km, title, body="", emergency=None
+):
+    """Alert every citizen within radius_km; recipients are found by the worker"""
+    data = emergency_data(emergency) if emergency else {}
+    return notify(
+        "AREA_ALERT",
+        "nearby_citizens",
+        title,
+        body=body,
+        data=data,
+        emergency=emergency,
+        latitude=latitude,
+        longitude=longitude,
+        radius_km=radius_km,
+    )
+
+
+def notify_status_change(emergency, status):
+    """Tell the reporter, and whoever reported a duplicate, the new `status`"""
+    if status not in STATUS_MESSAGES:
+        return None
+    kind, title = STATUS_MESSAGES[status]
+    reporters = {str(emergency.user_id)}
+    reporters.update(
+        str(user_id)
+        for user_id in emergency.duplicates.values_list("user_id", flat=True)
+    )
+    return notify(
+        kind,
+        "users",
+        title,
+        data={"emergency_id": str(emergency.id), "status": status},
+        emergency=emergency,
+        ids=sorted(reporters),
+    )
@@ -1 +1,172 @@
-# Create your tests here.
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from notifications import pipeline, transports
+from notifications.models import NotificationBatch
+from notifications.transports import LocalTransport, SendResult
+from users.models import User, UserProfile
+from users.testing import make_user
+
+LOCAL = {
+    "TRANSPORT": "notifications.transports.LocalTransport",
+    "BATCH_SIZE": 2,
+    "MAX_ATTEMPTS": 2,
+}
+
+
+class NotifyTests(TestCase):
+    """Requests only store the event; recipients are found by the worker"""
+
+    def test_notify_stores_one_event(self):
+        make_user("citizen", push_token="token-1")
+        with self.assertNumQueries(1):
+            event = pipeline.notify(
+                "AREA_ALERT", "users", "Flood", ids=["not-resolved-yet"]
+            )
+        self.assertEqual(event.status, "PENDING")
+        self.assertEqual(event.audience["name"], "users")
+        self.assertFalse(NotificationBatch.objects.exists())
+
+    def test_expand_splits_tokens_into_batches(self):
+        users = [make_user(f"u{i}", push_token=f"token-{i}") for i in range(5)]
+        make_user("no-token")
+        event = pipeline.notify(
+            "AREA_ALERT",
+            "users",
+            "Flood",
+            ids=[str(u.id) for u in users] + [str(u.id) for u in users[:2]],
+        )
+
+        self.assertEqual(pipeline.expand_pending_events(batch_size=2), 1)
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, "EXPANDED")
+        self.assertEqual(event.recipient_count, 5)
+        batches = NotificationBatch.objects.filter(event=event)
+        self.assertEqual(sorted(len(b.tokens) for b in batches), [1, 2, 2])
+        self.assertEqual(
+            sorted(t for b in batches for t in b.tokens),
+            [f"token-{i}" for i in range(5)],
+        )
+
+    def test_expand_honours_opt_outs(self):
+        opted_out = make_user("quiet", push_token="quiet-token")
+        UserProfile.objects.create(
+            user=opted_out, notification_preferences={"area_alert": False}
+        )
+        other_kind = make_user("picky", push_token="picky-token")
+        UserProfile.objects.create(
+            user=other_kind, notification_preferences={"emergency_created": False}
+        )
+        pipeline.notify(
+            "AREA_ALERT", "users", "Flood", ids=[str(opted_out.id), str(other_kind.id)]
+        )
+
+        pipeline.expand_pending_events(batch_size=10)
+
+        self.assertEqual(
+            list(NotificationBatch.objects.values_list("tokens", flat=True)),
+            [["picky-token"]],
+        )
+
+    def test_unknown_audience_fails_the_event(self):
+        event = pipeline.notify("AREA_ALERT", "nobody", "Flood")
+        pipeline.expand_pending_events(batch_size=10)
+        event.refresh_from_db()
+        self.assertEqual(event.status, "FAILED")
+        self.assertIn("nobody", event.last_error)
+
+
+class FlakyTransport(LocalTransport):
+    """Fails `bad` tokens transiently and reports `gone` as unregistered"""
+
+    def __init__(self, bad=(), gone=()):
+        self.bad = set(bad)
+        self.gone = set(gone)
+
+    def send(self, tokens, title, body, data):
+        super().send(tokens, title, body, data)
+        return SendResult(
+            failed=[t for t in tokens if t in self.bad],
+            unregistered=[t for t in tokens if t in self.gone],
+        )
+
+
+@override_settings(NOTIFICATIONS=LOCAL)
+class DeliveryTests(TransactionTestCase):
+    """Worker fan-out through the in-memory LocalTransport"""
+
+    def setUp(self):
+        transports.outbox.clear()
+        self.addCleanup(transports.outbox.clear)
+
+    def queue(self, *tokens):
+        users = [make_user(f"user-{t}", push_token=t) for t in tokens]
+        return pipeline.notify(
+            "EMERGENCY_DISPATCHED",
+            "users",
+            "A responder accepted your emergency",
+            data={"status": "DISPATCHED"},
+            ids=[str(u.id) for u in users],
+        )
+
+    def test_worker_sends_each_batch_once(self):
+        event = self.queue("a", "b", "c")
+
+        call_command("notification_worker", "--once", "--workers=1", stdout=StringIO())
+
+        self.assertEqual(len(transports.outbox), 2)
+        self.assertEqual(
+            sorted(t for message in transports.outbox for t in message["tokens"]),
+            ["a", "b", "c"],
+        )
+        self.assertEqual(
+            transports.outbox[0]["title"], "A responder accepted your emergency"
+        )
+        self.assertEqual(transports.outbox[0]["data"], {"status": "DISPATCHED"})
+        self.assertEqual(set(event.batches.values_list("status", flat=True)), {"SENT"})
+
+    def test_failed_tokens_are_retried_alone(self):
+        self.queue("ok", "flaky")
+        pipeline.expand_pending_events(batch_size=2)
+        transport = FlakyTransport(bad={"flaky"})
+
+        (batch,) = pipeline.claim_batches(10)
+        self.assertEqual(pipeline.deliver(batch, transport), "PENDING")
+        batch.refresh_from_db()
+        self.assertEqual(batch.tokens, ["flaky"])
+        self.assertEqual(batch.attempts, 1)
+        # Backing off: not due again yet
+        self.assertEqual(pipeline.claim_batches(10), [])
+
+        NotificationBatch.objects.update(available_at=batch.created_at)
+        (batch,) = pipeline.claim_batches(10)
+        self.assertEqual(pipeline.deliver(batch, transport), "FAILED")
+        batch.refresh_from_db()
+        self.assertEqual(batch.failed_tokens, 1)
+
+    def test_transport_error_fails_the_whole_batch(self):
+        self.queue("a", "b")
+        pipeline.expand_pending_events(batch_size=2)
+        (batch,) = pipeline.claim_batches(10)
+
+        with mock.patch.object(LocalTransport, "send", side_effect=OSError("down")):
+            self.assertEqual(pipeline.deliver(batch, LocalTransport()), "PENDING")
+
+        batch.refresh_from_db()
+        self.assertEqual(sorted(batch.tokens), ["a", "b"])
+        self.assertEqual(batch.last_error, "down")
+
+    def test_unregistered_tokens_are_cleared(self):
+        self.queue("kept", "gone")
+        pipeline.expand_pending_events(batch_size=2)
+        (batch,) = pipeline.claim_batches(10)
+
+        pipeline.deliver(batch, FlakyTransport(gone={"gone"}))
+
+        self.assertEqual(
+            sorted(User.objects.values_list("push_token", flat=True)), ["", "kept"]
+        )
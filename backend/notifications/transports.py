@@ -0,0 +1,62 @@
+# backend/notifications/transports.py
+"""
+Push transports. NOTIFICATIONS["TRANSPORT"] names the class to use, the same
+way EMAIL_BACKEND picks a mail backend.
+
+A transport sends one message to a list of device tokens in as few calls as
+its provider allows, and reports the tokens that failed. Tokens the provider
+says are no longer registered are cleared from their users.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("notifications")
+
+
+@dataclass
+class SendResult:
+    # Transient failures; the batch is retried for these tokens only
+    failed: list = field(default_factory=list)
+    # Tokens the provider rejected for good
+    unregistered: list = field(default_factory=list)
+
+
+class BaseTransport:
+    # Largest number of tokens the provider accepts per call
+    max_batch_size = 500
+
+    def send(self, tokens, title, body, data):
+        raise NotImplementedError
+
+
+class ConsoleTransport(BaseTransport):
+    """Log every batch instead of sending it"""
+
+    def send(self, tokens, title, body, data):
+        logger.info("push x%d: %s - %s %s", len(tokens), title, body, data)
+        return SendResult()
+
+
+# Messages delivered by LocalTransport, like django.core.mail.outbox
+outbox = []
+
+
+class LocalTransport(BaseTransport):
+    """In-memory stand-in for tests and local runs"""
+
+    def send(self, tokens, title, body, data):
+        outbox.append(
+            {"tokens": list(tokens), "title": title, "body": body, "data": data}
+        )
+        return SendResult()
+
+
+def get_transport():
+    path = getattr(settings, "NOTIFICATIONS", {}).get(
+        "TRANSPORT", "notifications.transports.ConsoleTransport"
+    )
+    return import_string(path)()
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "topic",
+        "aggregate_type",
+        "aggregate_id",
+        "attempts",
+        "created_at",
+        "processed_at",
+    )
+    list_filter = ("topic", "aggregate_type")
+    search_fields = ("aggregate_id",)
+    readonly_fields = ("created_at",)
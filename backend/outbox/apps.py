@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class OutboxConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "outbox"
+    verbose_name = "Outbox"
+
+    def ready(self):
+        from monitoring import metrics
+        from outbox import relay
+
+        # Consumers live in <app>/consumers.py, like admin.py registrations
+        autodiscover_modules("consumers")
+        metrics.register_queue_depth("outbox", relay.pending_events)
@@ -0,0 +1,58 @@
+# backend/outbox/jobs.py
+"""
+Chunked bulk jobs.
+
+run_chunked() applies a set-wise change to a selection of ids JOB_CHUNK at
+a time, each chunk in its own short transaction. A selection larger than
+JOB_INLINE_LIMIT is not applied in the request: it is queued as one outbox
+event per chunk, and a consumer registered for the topic applies each
+chunk from the relay with the same function. batched=False makes the relay
+commit every chunk on its own rather than a batch of them at once:
+
+    @consumer(
+        "emergencies.bulk_cancel", topics=["emergency.bulk_cancel"], batched=False
+    )
+    def bulk_cancel(event):
+        cancel_chunk(event.payload["ids"])
+
+Chunk functions must only touch rows that still need the change, so a
+chunk retried by the relay is harmless.
+"""
+
+from itertools import chain, islice
+
+from django.db import transaction
+
+from outbox.publish import publish_many
+from outbox.relay import outbox_setting
+
+
+def chunks(ids, size):
+    ids = iter(ids)
+    while chunk := list(islice(ids, size)):
+        yield chunk
+
+
+def run_chunked(topic, ids, apply, actor):
+    """Apply `apply` to `ids` chunk by chunk, or queue it under `topic`
+
+    Returns (applied, queued): what `apply` reported for the chunks run
+    here, and how many ids were queued for the relay. `actor` is the user
+    the queued events are recorded against.
+    """
+    size = outbox_setting("JOB_CHUNK")
+    limit = outbox_setting("JOB_INLINE_LIMIT")
+    ids = iter(ids)
+    head = list(islice(ids, limit + 1))
+    if len(head) <= limit:
+        return sum(apply(chunk) for chunk in chunks(head, size)), 0
+
+    queued = 0
+    with transaction.atomic():
+        for batch in chunks(chunks(chain(head, ids), size), 100):
+            publish_many(
+                topic,
+                [(actor, {"ids": [str(pk) for pk in chunk]}) for chunk in batch],
+            )
+            queued += sum(len(chunk) for chunk in batch)
+    return 0, queued
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outbox import relay
+
+# Processed events are pruned at most this often
+PRUNE_INTERVAL = 600
+
+
+class Command(BaseCommand):
+    help = "Relay outbox events to their registered consumers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--poll", type=float, default=0.5, help="Seconds to sleep when idle"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the outbox once and exit"
+        )
+
+    def handle(self, *args, **options):
+        last_prune = 0.0
+        while True:
+            close_old_connections()
+            handled = relay.relay_batch(options["batch_size"])
+            if handled:
+                continue
+            if time.monotonic() - last_prune > PRUNE_INTERVAL:
+                relay.prune()
+                last_prune = time.monotonic()
+            if options["once"]:
+                return
+            time.sleep(options["poll"])
@@ -0,0 +1,40 @@
+# backend/outbox/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """A domain event, written in the transaction that made the change
+
+    The relay hands it to every consumer registered for its topic and marks
+    it processed once all of them succeeded; consumers that already handled
+    it are listed in `completed` so a retry only re-runs the ones that failed.
+    """
+
+    topic = models.CharField(max_length=100)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Not relayed before this; pushed back after a failed attempt
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    completed = models.JSONField(default=list, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "outbox_events"
+        indexes = [
+            # The relay only ever scans unprocessed rows
+            models.Index(
+                fields=["available_at", "id"],
+                name="outbox_pending_idx",
+                condition=models.Q(processed_at__isnull=True),
+            ),
+            models.Index(fields=["aggregate_type", "aggregate_id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.aggregate_type}:{self.aggregate_id}"
@@ -0,0 +1,40 @@
+# backend/outbox/publish.py
+from django.db import connections
+
+from outbox.models import OutboxEvent
+
+
+def build_event(topic, instance, payload):
+    return OutboxEvent(
+        topic=topic,
+        aggregate_type=instance._meta.model_name,
+        aggregate_id=str(instance.pk),
+        payload=payload,
+    )
+
+
+def publish(topic, instance, payload, using="default"):
+    """Record a domain event about `instance` in the current transaction
+
+    Call it inside the `transaction.atomic()` block that saves the change,
+    so the event exists if and only if the change was committed.
+    """
+    if not connections[using].in_atomic_block:
+        raise RuntimeError(f"publish({topic!r}) must run inside transaction.atomic()")
+    event = build_event(topic, instance, payload)
+    event.save(force_insert=True, using=using)
+    return event
+
+
+def publish_many(topic, events, using="default"):
+    """publish() for many instances at once, in a single INSERT
+
+    `events` yields (instance, payload) pairs.
+    """
+    if not connections[using].in_atomic_block:
+        raise RuntimeError(
+            f"publish_many({topic!r}) must run inside transaction.atomic()"
+        )
+    return OutboxEvent.objects.using(using).bulk_create(
+        [build_event(topic, instance, payload) for instance, payload in events]
+    )
@@ -0,0 +1,52 @@
+# backend/outbox/registry.py
+"""
+Consumer registry. Apps register handlers in their own consumers.py,
+which OutboxConfig imports at startup:
+
+    @consumer("notifications.emergency_created", topics=["emergency.created"])
+    def send_alerts(event):
+        ...
+
+Handlers get the OutboxEvent and run in the relay, never in the request.
+Delivery is at-least-once: a handler can see the same event again after a
+failure or a relay crash, so it must be idempotent.
+
+The relay handles a batch of events in one transaction. Handlers that do a
+lot of work per event, like bulk job chunks, register with batched=False:
+each event of their topics then commits on its own, and its row locks are
+released as soon as it is done.
+"""
+
+_consumers = {}
+_unbatched = set()
+
+
+def consumer(name, topics, batched=True):
+    def decorator(func):
+        _consumers[name] = (tuple(topics), func)
+        if not batched:
+            _unbatched.update(topics)
+        return func
+
+    return decorator
+
+
+def matches(pattern, topic):
+    # "emergency.*" matches every emergency topic
+    if pattern.endswith(".*"):
+        return topic.startswith(pattern[:-1])
+    return pattern == topic
+
+
+def consumers_for(topic):
+    """[(name, handler)] registered for a topic"""
+    return [
+        (name, func)
+        for name, (topics, func) in _consumers.items()
+        if any(matches(pattern, topic) for pattern in topics)
+    ]
+
+
+def batched(topic):
+    """False when the topic's events must each commit on their own"""
+    return not any(matches(pattern, topic) for pattern in _unbatched)
@@ -0,0 +1,113 @@
+# backend/outbox/relay.py
+"""
+Outbox relay: reads unprocessed events in id order, a batch at a time, and
+hands each to its consumers.
+
+A batch is locked with SELECT ... FOR UPDATE SKIP LOCKED for as long as it
+is being handled, so relays can run side by side without taking the same
+events, and a relay that dies releases its batch to the others. Each
+consumer runs in its own savepoint: its database writes commit with the
+event's progress, or not at all. A failed consumer is retried with backoff
+while the ones that succeeded are not called again.
+
+Events of topics registered with batched=False (outbox/registry.py) are
+handled in a batch of their own, so a bulk job chunk commits, and releases
+its row locks, without waiting for the rest of a batch.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from outbox.models import OutboxEvent
+from outbox.registry import batched, consumers_for
+
+logger = logging.getLogger("outbox")
+
+DEFAULTS = {
+    "BATCH_SIZE": 100,
+    "RETRY_SECONDS": 10,
+    "MAX_RETRY_SECONDS": 3600,
+    "RETENTION_DAYS": 7,
+    # Bulk jobs (outbox/jobs.py)
+    "JOB_CHUNK": 2000,
+    "JOB_INLINE_LIMIT": 10_000,
+}
+
+
+def outbox_setting(name):
+    return getattr(settings, "OUTBOX", {}).get(name, DEFAULTS[name])
+
+
+def handle(event, now):
+    """Run the event's outstanding consumers; True when all have succeeded"""
+    errors = []
+    for name, func in consumers_for(event.topic):
+        if name in event.completed:
+            continue
+        try:
+            with transaction.atomic():
+                func(event)
+        except Exception as e:
+            logger.exception("Outbox consumer %s failed on event %s", name, event.id)
+            errors.append(f"{name}: {e}")
+        else:
+            event.completed.append(name)
+
+    event.attempts += 1
+    if errors:
+        event.last_error = "\n".join(errors)
+        delay = min(
+            outbox_setting("RETRY_SECONDS") * 2 ** (event.attempts - 1),
+            outbox_setting("MAX_RETRY_SECONDS"),
+        )
+        event.available_at = now + timedelta(seconds=delay)
+    else:
+        event.last_error = ""
+        event.processed_at = now
+    event.save(
+        update_fields=[
+            "attempts",
+            "completed",
+            "last_error",
+            "available_at",
+            "processed_at",
+        ]
+    )
+    return not errors
+
+
+def relay_batch(batch_size=None):
+    """Process one batch of due events; returns how many were handled"""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, available_at__lte=now)
+            .order_by("id")[: batch_size or outbox_setting("BATCH_SIZE")]
+        )
+        handled = 0
+        for event in events:
+            alone = not batched(event.topic)
+            if alone and handled:
+                # Left unlocked at commit, for the next batch
+                break
+            handle(event, now)
+            handled += 1
+            if alone:
+                break
+    return handled
+
+
+def prune():
+    """Delete processed events past the retention window"""
+    cutoff = timezone.now() - timedelta(days=outbox_setting("RETENTION_DAYS"))
+    deleted, _ = OutboxEvent.objects.filter(processed_at__lt=cutoff).delete()
+    return deleted
+
+
+def pending_events():
+    return OutboxEvent.objects.filter(processed_at__isnull=True).count()
@@ -0,0 +1,187 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from outbox import registry
+from outbox.models import OutboxEvent
+from outbox.publish import publish, publish_many
+from outbox.relay import relay_batch
+from users.models import User
+from users.testing import make_user
+
+
+class ConsumerMixin:
+    """Registers throwaway consumers for the test's duration only"""
+
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            mock.patch.dict(registry._consumers, clear=True),
+            mock.patch.object(registry, "_unbatched", set()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.calls = []
+
+    def register(self, name, topics, func=None, **kwargs):
+        def handler(event):
+            self.calls.append((name, event.id))
+            if func:
+                func(event)
+
+        registry.consumer(name, topics, **kwargs)(handler)
+
+
+class PublishTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("publisher")
+
+    def test_publish_requires_a_transaction(self):
+        with mock.patch.object(connection, "in_atomic_block", False):
+            with self.assertRaises(RuntimeError):
+                publish("test.ping", self.user, {})
+            with self.assertRaises(RuntimeError):
+                publish_many("test.ping", [(self.user, {})])
+
+    def test_event_is_rolled_back_with_the_change(self):
+        try:
+            with transaction.atomic():
+                publish("test.ping", self.user, {"n": 1})
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_publish_records_the_aggregate(self):
+        with transaction.atomic():
+            event = publish("test.ping", self.user, {"n": 1})
+            publish_many("test.ping", [(self.user, {"n": 2}), (self.user, {"n": 3})])
+        self.assertEqual(event.aggregate_type, "user")
+        self.assertEqual(event.aggregate_id, str(self.user.pk))
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by("id").values_list("payload", flat=True)),
+            [{"n": 1}, {"n": 2}, {"n": 3}],
+        )
+
+
+class RelayTests(ConsumerMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("publisher")
+
+    def publish(self, topic, count=1):
+        with transaction.atomic():
+            return publish_many(topic, [(self.user, {"n": n}) for n in range(count)])
+
+    def test_events_reach_matching_consumers_in_order(self):
+        self.register("exact", ["test.ping"])
+        self.register("wildcard", ["test.*"])
+        self.register("other", ["other.ping"])
+        first, second = self.publish("test.ping", 2)
+
+        self.assertEqual(relay_batch(), 2)
+
+        self.assertEqual(
+            self.calls,
+            [
+                ("exact", first.id),
+                ("wildcard", first.id),
+                ("exact", second.id),
+                ("wildcard", second.id),
+            ],
+        )
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True))
+        self.assertEqual(relay_batch(), 0)
+
+    def test_batch_size_limits_each_run(self):
+        self.register("exact", ["test.ping"])
+        self.publish("test.ping", 3)
+        self.assertEqual(relay_batch(batch_size=2), 2)
+        self.assertEqual(relay_batch(batch_size=2), 1)
+
+    def test_failed_consumer_alone_is_retried_after_a_backoff(self):
+        def fail(event):
+            # Rolled back with the consumer's savepoint
+            make_user("written-by-failing-consumer")
+            raise ValueError("boom")
+
+        self.register("ok", ["test.ping"])
+        self.register("flaky", ["test.ping"], fail)
+        (event,) = self.publish("test.ping")
+
+        with self.assertLogs("outbox", "ERROR"):
+            relay_batch()
+
+        event.refresh_from_db()
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.completed, ["ok"])
+        self.assertIn("flaky: boom", event.last_error)
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertFalse(User.objects.filter(username="written-by-failing-consumer"))
+        # Not due again until the backoff has passed
+        self.assertEqual(relay_batch(), 0)
+
+        OutboxEvent.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+        with mock.patch.dict(registry._consumers):
+            self.register("flaky", ["test.ping"])
+            relay_batch()
+
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.completed, ["ok", "flaky"])
+        self.assertEqual([name for name, _ in self.calls], ["ok", "flaky", "flaky"])
+
+    def test_unbatched_events_are_handled_alone(self):
+        self.register("ping", ["test.ping"])
+        self.register("chunk", ["test.chunk"], batched=False)
+        self.publish("test.ping", 2)
+        self.publish("test.chunk", 2)
+        self.publish("test.ping")
+
+        # Each run stops before an unbatched event it didn't start with
+        self.assertEqual([relay_batch() for _ in range(5)], [2, 1, 1, 1, 0])
+        self.assertEqual(
+            [name for name, _ in self.calls], ["ping", "ping", "chunk", "chunk", "ping"]
+        )
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class ConcurrentRelayTests(ConsumerMixin, TransactionTestCase):
+    """Relays running side by side never take the same event"""
+
+    def test_locked_events_are_skipped(self):
+        self.register("exact", ["test.ping"])
+        user = make_user("publisher")
+        with transaction.atomic():
+            locked, free = publish_many("test.ping", [(user, {}), (user, {})])
+
+        claimed = threading.Event()
+        release = threading.Event()
+
+        def other_relay():
+            try:
+                with transaction.atomic():
+                    list(OutboxEvent.objects.select_for_update().filter(id=locked.id))
+                    claimed.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_relay)
+        thread.start()
+        try:
+            self.assertTrue(claimed.wait(10))
+            self.assertEqual(relay_batch(), 1)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(self.calls, [("exact", free.id)])
+        self.assertEqual(relay_batch(), 1)
+        self.assertEqual(self.calls[-1], ("exact", locked.id))
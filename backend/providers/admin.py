@@ -1,6 +1,26 @@
 from django.contrib import admin
 
-from .models import Provider
+from config.pagination import EstimatedCountPaginator
+from config.search import PROVIDERS, IndexedSearchMixin
+
+from . import bulk
+from .models import Provider, ProviderLiveState
+from .services import filter_services
+
+
+class ServiceTypeFilter(admin.SimpleListFilter):
+    """Filter on the indexed service_mask instead of the service_types JSON"""
+
+    title = "service type"
+    parameter_name = "service"
+
+    def lookups(self, request, model_admin):
+        return Provider.SERVICE_TYPES
+
+    def queryset(self, request, queryset):
+        if self.value() in dict(Provider.SERVICE_TYPES):
+            return filter_services(queryset, [self.value()])
+        return queryset
 
 
 class ProviderInline(admin.StackedInline):
@@ -9,12 +29,29 @@ class ProviderInline(admin.StackedInline):
     extra = 0  # how many empty slots to show
 
 
+class ProviderLiveStateInline(admin.StackedInline):
+    """Live state, read-only in the admin
+
+    Status changes go through Provider.set_status() (see the actions), which
+    publishes provider.status_changed; the rest is reported by the device.
+    """
+
+    model = ProviderLiveState
+    can_delete = False
+    fields = ("status", "latitude", "longitude", "current_emergency", "last_ping")
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        # Provider.save() creates the row
+        return False
+
+
 @admin.register(Provider)
-class ProviderAdmin(admin.ModelAdmin):
+class ProviderAdmin(IndexedSearchMixin, admin.ModelAdmin):
     # Fields to show in the list view
     list_display = (
         "user",
-        "status",
+        "live_status",
         "is_verified",
         "is_active",
         "total_emergencies",
@@ -25,15 +62,20 @@ class ProviderAdmin(admin.ModelAdmin):
         "service_fee",
     )
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ["verify_selected", "set_selected_offline"]
+
     # Filters on the right-hand sidebar
     list_filter = (
-        "status",
+        "live__status",
         "is_verified",
         "is_active",
-        "service_types",
+        ServiceTypeFilter,
     )
 
-    # Fields searchable via the admin search bar
+    # Fields searchable via the admin search bar, through the trigram and
+    # full-text indexes (config/search.py)
     search_fields = (
         "user__email",
         "user__first_name",
@@ -41,6 +83,7 @@ class ProviderAdmin(admin.ModelAdmin):
         "license_number",
         "vehicle_number",
     )
+    search_spec = PROVIDERS
 
     # Organize fields on the add/edit form
     fieldsets = (
@@ -58,10 +101,6 @@ class ProviderAdmin(admin.ModelAdmin):
                 )
             },
         ),
-        (
-            "Current Status",
-            {"fields": ("status", "latitude", "longitude", "current_emergency_id")},
-        ),
         (
             "Vehicle Info",
             {"fields": ("vehicle_type", "vehicle_number", "vehicle_capacity")},
@@ -74,13 +113,44 @@ class ProviderAdmin(admin.ModelAdmin):
                     "completed_emergencies",
                     "avg_response_time",
                     "rating",
+                    "rating_sum",
                     "rating_count",
                 )
             },
         ),
         (
             "Availability & Schedule",
-            {"fields": ("schedule", "last_ping", "max_distance")},
+            {"fields": ("schedule", "max_distance")},
         ),
         ("Financial", {"fields": ("hourly_rate", "service_fee")}),
     )
+
+    # Current status, location and last ping (the narrow live-state table)
+    inlines = [ProviderLiveStateInline]
+
+    def get_queryset(self, request):
+        # The manager already joins the live state, and the changelist only
+        # applies list_select_related to querysets without select_related,
+        # so join the user here
+        return super().get_queryset(request).select_related("user")
+
+    @admin.display(description="status", ordering="live__status")
+    def live_status(self, obj):
+        return obj.get_live().get_status_display()
+
+    def run_bulk(self, request, queryset, operation, done):
+        ids = queryset.order_by().values_list("pk", flat=True).iterator()
+        changed, queued = operation(ids, request.user)
+        if queued:
+            message = f"Queued {queued} providers for the outbox relay"
+        else:
+            message = f"{done}: {changed} providers"
+        self.message_user(request, message)
+
+    @admin.action(description="Verify selected providers", permissions=["change"])
+    def verify_selected(self, request, queryset):
+        self.run_bulk(request, queryset, bulk.verify, "Verified")
+
+    @admin.action(description="Set selected providers offline", permissions=["change"])
+    def set_selected_offline(self, request, queryset):
+        self.run_bulk(request, queryset, bulk.set_offline, "Set offline")
@@ -0,0 +1,147 @@
+# backend/providers/availability.py
+"""
+Weekly availability compiled from Provider.schedule.
+
+A schedule is free-form JSON keyed by weekday:
+
+    {"monday": {"start": "08:00", "end": "20:00"},
+     "saturday": [{"start": "06:00", "end": "10:00"},
+                  {"start": "22:00", "end": "02:00"}]}
+
+A shift that ends at or before its start runs past midnight into the next
+day. On save it is compiled into one ProviderAvailability row per weekday
+holding a 48-bit mask of 30-minute slots, so "who is scheduled at T" is
+`slots & (1 << slot) != 0` on an indexed (weekday, provider) row instead of
+loading every provider's JSON. A slot is set when any part of it is covered.
+Times are wall-clock in SCHEDULES["TIME_ZONE"].
+
+Provider.clean() rejects a schedule that can't be compiled. One saved
+without validation is logged and leaves the provider unscheduled.
+"""
+
+import json
+import logging
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+
+logger = logging.getLogger("providers.availability")
+
+DEFAULTS = {
+    "TIME_ZONE": "Asia/Manila",
+}
+
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES  # 48 bits, fits a signed bigint
+
+
+def schedule_setting(name):
+    return getattr(settings, "SCHEDULES", {}).get(name, DEFAULTS[name])
+
+
+def parse_minutes(value):
+    """Minutes since midnight for "HH:MM"; "24:00" is the end of the day"""
+    try:
+        hours, minutes = (int(part) for part in str(value).split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid schedule time {value!r}") from None
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > 1440:
+        raise ValueError(f"Invalid schedule time {value!r}")
+    return hours * 60 + minutes
+
+
+def compile_schedule(schedule):
+    """{weekday: slot mask} for a schedule; weekday 0 is Monday
+
+    Raises ValueError for a schedule that can't be interpreted.
+    """
+    if isinstance(schedule, str):
+        # Older rows hold the schedule as a JSON-encoded string
+        schedule = json.loads(schedule) if schedule.strip() else {}
+    if not schedule:
+        return {}
+    if not isinstance(schedule, dict):
+        raise ValueError("Schedule must map weekdays to shifts")
+
+    week = 0
+    for day, shifts in schedule.items():
+        try:
+            weekday = WEEKDAYS.index(day.lower())
+        except ValueError:
+            raise ValueError(f"Unknown schedule day {day!r}") from None
+        if isinstance(shifts, dict):
+            shifts = [shifts]
+        if not isinstance(shifts, (list, type(None))):
+            raise ValueError(f"Shifts on {day} must be a shift or a list of them")
+        for shift in shifts or []:
+            try:
+                start = parse_minutes(shift["start"])
+                end = parse_minutes(shift["end"])
+            except (KeyError, TypeError):
+                raise ValueError(f"Shift on {day} needs a start and an end") from None
+            if end <= start:
+                end += 1440
+            first = start // SLOT_MINUTES
+            last = -(-end // SLOT_MINUTES)  # ceil: partly covered slots count
+            for slot in range(first, last):
+                week |= 1 << (weekday * SLOTS_PER_DAY + slot) % (7 * SLOTS_PER_DAY)
+
+    mask = (1 << SLOTS_PER_DAY) - 1
+    return {
+        weekday: week >> (weekday * SLOTS_PER_DAY) & mask
+        for weekday in range(7)
+        if week >> (weekday * SLOTS_PER_DAY) & mask
+    }
+
+
+def slot_at(when):
+    """(weekday, slot) of an aware datetime in the schedule time zone"""
+    local = when.astimezone(ZoneInfo(schedule_setting("TIME_ZONE")))
+    return local.weekday(), (local.hour * 60 + local.minute) // SLOT_MINUTES
+
+
+def sync_availability(provider):
+    """Replace the provider's compiled rows; call inside a transaction"""
+    from providers.models import ProviderAvailability
+
+    try:
+        compiled = compile_schedule(provider.schedule)
+    except ValueError as e:
+        logger.warning("Provider %s left unscheduled: %s", provider.pk, e)
+        compiled = {}
+    rows = [
+        ProviderAvailability(provider=provider, weekday=weekday, slots=slots)
+        for weekday, slots in compiled.items()
+    ]
+    ProviderAvailability.objects.filter(provider=provider).delete()
+    ProviderAvailability.objects.bulk_create(rows)
+
+
+def filter_scheduled(queryset, when, provider_field="pk"):
+    """Narrow a queryset to rows whose provider is scheduled at `when`
+
+    Composes with other filters, e.g. within_radius() for the nearest
+    providers on duty.
+    """
+    from providers.models import ProviderAvailability
+
+    weekday, slot = slot_at(when)
+    return queryset.filter(
+        Exists(
+            ProviderAvailability.objects.filter(
+                provider=OuterRef(provider_field), weekday=weekday
+            )
+            .alias(on=F("slots").bitand(1 << slot))
+            .filter(on__gt=0)
+        )
+    )
@@ -0,0 +1,98 @@
+# backend/providers/bulk.py
+"""
+Set-wise provider changes for admin actions and staff mutations.
+
+Each chunk is one UPDATE of the rows that still need the change plus one
+INSERT of their outbox events, in place of a save() and a publish() per
+provider. Large selections run from the relay (outbox/jobs.py).
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from outbox.jobs import run_chunked
+from outbox.publish import publish_many
+from providers.models import Provider, ProviderLiveState
+
+
+def set_status_chunk(live_states, status, **fields):
+    """Provider.set_status() for the providers of `live_states` at once
+
+    `live_states` is a ProviderLiveState queryset; rows already in `status`
+    are left alone. Returns how many providers changed.
+    """
+    with transaction.atomic():
+        rows = list(
+            live_states.select_for_update(of=("self",))
+            .exclude(status=status)
+            .values_list("provider_id", "provider__user_id", "status")
+        )
+        if not rows:
+            return 0
+        ProviderLiveState.objects.filter(
+            provider_id__in=[provider_id for provider_id, _, _ in rows]
+        ).update(status=status, **fields)
+        current_emergency_id = fields.get("current_emergency_id")
+        publish_many(
+            "provider.status_changed",
+            (
+                (
+                    Provider(pk=provider_id),
+                    {
+                        "status": status,
+                        "previous_status": previous_status,
+                        "user_id": str(user_id),
+                        "current_emergency_id": (
+                            str(current_emergency_id) if current_emergency_id else None
+                        ),
+                    },
+                )
+                for provider_id, user_id, previous_status in rows
+            ),
+        )
+    return len(rows)
+
+
+def offline_chunk(ids):
+    return set_status_chunk(
+        ProviderLiveState.objects.filter(provider_id__in=ids), "OFFLINE"
+    )
+
+
+def release_providers(emergency_ids):
+    """Make providers working on any of `emergency_ids` available again"""
+    return set_status_chunk(
+        ProviderLiveState.objects.filter(current_emergency_id__in=emergency_ids),
+        "AVAILABLE",
+        current_emergency_id=None,
+    )
+
+
+def verify_chunk(ids):
+    now = timezone.now()
+    with transaction.atomic():
+        providers = list(
+            Provider.objects.select_for_update(of=("self",))
+            .filter(pk__in=ids, is_verified=False)
+            .values_list("pk", "user_id")
+        )
+        if not providers:
+            return 0
+        Provider.objects.filter(pk__in=[pk for pk, _ in providers]).update(
+            is_verified=True, verification_date=now
+        )
+        publish_many(
+            "provider.verified",
+            ((Provider(pk=pk), {"user_id": str(user_id)}) for pk, user_id in providers),
+        )
+    return len(providers)
+
+
+def set_offline(ids, actor):
+    """Force providers OFFLINE; returns (changed, queued)"""
+    return run_chunked("provider.bulk_offline", ids, offline_chunk, actor)
+
+
+def verify(ids, actor):
+    """Mark providers verified as of now; returns (verified, queued)"""
+    return run_chunked("provider.bulk_verify", ids, verify_chunk, actor)
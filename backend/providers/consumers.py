@@ -0,0 +1,30 @@
+# backend/providers/consumers.py
+from outbox.registry import consumer
+from providers import bulk, metrics
+
+
+@consumer("providers.metrics", topics=["emergency.status_changed"])
+def update_metrics(event):
+    provider_id = event.payload.get("provider_id")
+    if provider_id:
+        metrics.record_transition(
+            provider_id,
+            event.payload["status"],
+            event.payload.get("stamped", []),
+            event.aggregate_id,
+        )
+
+
+@consumer("providers.rating", topics=["emergency.rated"])
+def update_rating(event):
+    metrics.record_rating(event.payload["provider_id"], event.payload["rating"])
+
+
+@consumer("providers.bulk_offline", topics=["provider.bulk_offline"], batched=False)
+def bulk_offline(event):
+    bulk.offline_chunk(event.payload["ids"])
+
+
+@consumer("providers.bulk_verify", topics=["provider.bulk_verify"], batched=False)
+def bulk_verify(event):
+    bulk.verify_chunk(event.payload["ids"])
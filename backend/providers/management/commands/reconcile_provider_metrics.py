@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from providers import metrics
+
+
+class Command(BaseCommand):
+    help = "Check incremental provider metrics against a full recomputation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Overwrite drifted counters"
+        )
+
+    def handle(self, *args, **options):
+        drift = metrics.reconcile(fix=options["fix"])
+        for provider_id, fields in drift.items():
+            changes = ", ".join(
+                f"{field} {stored} -> {expected}"
+                for field, (stored, expected) in fields.items()
+            )
+            self.stdout.write(f"{provider_id}: {changes}")
+        verb = "fixed" if options["fix"] else "found"
+        self.stdout.write(f"Drift {verb} on {len(drift)} providers")
@@ -0,0 +1,186 @@
+# backend/providers/metrics.py
+"""
+Provider performance counters, maintained incrementally.
+
+Each emergency transition becomes a single UPDATE of one provider row with
+F() expressions, so concurrent transitions never read-modify-write in
+Python and nothing rescans the emergencies table. The response time is kept
+as a running mean: mean += (sample - mean) / (count + 1). Ratings are small
+integers, so their sum is kept and the rounded rating derived from it.
+
+`reconcile()` recomputes every counter from emergencies in one grouped
+query, for drift checks (manage.py reconcile_provider_metrics).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import (
+    Avg,
+    BigIntegerField,
+    Count,
+    DecimalField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce
+
+from emergencies.models import Emergency
+from providers.models import Provider
+
+
+def running_mean(field, count_field, sample, output_field):
+    current = Coalesce(F(field), Value(sample * 0), output_field=output_field)
+    # Float divisor: SQLite would otherwise divide integers
+    count = Cast(F(count_field) + 1, FloatField())
+    return ExpressionWrapper(
+        current + (Value(sample, output_field=output_field) - current) / count,
+        output_field=output_field,
+    )
+
+
+def response_time_mean(sample):
+    if connection.features.has_native_duration_field:
+        return running_mean(
+            "avg_response_time", "response_count", sample, DurationField()
+        )
+    # Without an interval type durations are stored as integer microseconds,
+    # and Django can't combine them in an UPDATE; average the integers
+    microseconds = sample // timedelta(microseconds=1)
+    return Cast(
+        running_mean(
+            "avg_response_time", "response_count", microseconds, BigIntegerField()
+        ),
+        BigIntegerField(),
+    )
+
+
+def record_transition(provider_id, status, stamped, emergency_id):
+    """Apply the counter deltas of an emergency entering `status`
+
+    `stamped` lists the timestamp fields set by this transition; counters
+    only move the first time an emergency reaches a status.
+    """
+    updates = {}
+    if "dispatched_at" in stamped:
+        updates["total_emergencies"] = F("total_emergencies") + 1
+    if "resolved_at" in stamped:
+        updates["completed_emergencies"] = F("completed_emergencies") + 1
+    if "arrived_at" in stamped:
+        created_at, arrived_at = Emergency.objects.values_list(
+            "created_at", "arrived_at"
+        ).get(id=emergency_id)
+        updates["avg_response_time"] = response_time_mean(arrived_at - created_at)
+        updates["response_count"] = F("response_count") + 1
+    if updates:
+        Provider.objects.filter(id=provider_id).update(**updates)
+
+
+def mean_rating(rating_sum, rating_count):
+    return ExpressionWrapper(
+        Cast(rating_sum, FloatField()) / Cast(rating_count, FloatField()),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def record_rating(provider_id, rating):
+    Provider.objects.filter(id=provider_id).update(
+        # The right-hand F()s read the row as it was before this UPDATE
+        rating=mean_rating(F("rating_sum") + rating, F("rating_count") + 1),
+        rating_sum=F("rating_sum") + rating,
+        rating_count=F("rating_count") + 1,
+    )
+
+
+METRIC_FIELDS = [
+    "total_emergencies",
+    "completed_emergencies",
+    "avg_response_time",
+    "response_count",
+    "rating",
+    "rating_sum",
+    "rating_count",
+]
+
+
+def recomputed_metrics():
+    """{provider_id: {field: value}} from one grouped aggregate over emergencies"""
+    rows = (
+        Emergency.objects.filter(provider__isnull=False)
+        .order_by()
+        .values("provider_id")
+        .annotate(
+            total_emergencies=Count("id", filter=Q(dispatched_at__isnull=False)),
+            completed_emergencies=Count("id", filter=Q(resolved_at__isnull=False)),
+            avg_response_time=Avg(
+                ExpressionWrapper(
+                    F("arrived_at") - F("created_at"), output_field=DurationField()
+                ),
+                filter=Q(arrived_at__isnull=False),
+            ),
+            response_count=Count("id", filter=Q(arrived_at__isnull=False)),
+            rating=Avg("provider_rating"),
+            rating_sum=Coalesce(Sum("provider_rating"), 0),
+            rating_count=Count("provider_rating"),
+        )
+    )
+    return {row.pop("provider_id"): row for row in rows}
+
+
+EMPTY_METRICS = {
+    "total_emergencies": 0,
+    "completed_emergencies": 0,
+    "avg_response_time": None,
+    "response_count": 0,
+    "rating": 0,
+    "rating_sum": 0,
+    "rating_count": 0,
+}
+
+
+def differs(field, stored, expected):
+    if field == "avg_response_time":
+        if stored is None or expected is None:
+            return stored != expected
+        return abs(stored - expected) > timedelta(seconds=1)
+    if field == "rating":
+        return abs(Decimal(stored) - Decimal(expected or 0)) >= Decimal("0.01")
+    return stored != expected
+
+
+def reconcile(fix=False, chunk_size=500):
+    """Compare stored counters with a full recomputation
+
+    Returns {provider_id: {field: (stored, expected)}} for every provider
+    that drifted, and writes the recomputed values when `fix` is set.
+    """
+    expected = recomputed_metrics()
+    drift = {}
+    stale = []
+    for provider in Provider.objects.only("id", *METRIC_FIELDS).iterator(
+        chunk_size=chunk_size
+    ):
+        values = expected.get(provider.id, EMPTY_METRICS)
+        changed = {
+            field: (getattr(provider, field), values[field])
+            for field in METRIC_FIELDS
+            if differs(field, getattr(provider, field), values[field])
+        }
+        if not changed:
+            continue
+        drift[provider.id] = changed
+        if fix:
+            for field, (_, value) in changed.items():
+                if field == "rating":
+                    value = Decimal(value or 0).quantize(Decimal("0.01"))
+                setattr(provider, field, value)
+            stale.append(provider)
+    if stale:
+        Provider.objects.bulk_update(stale, METRIC_FIELDS, batch_size=chunk_size)
+    return drift
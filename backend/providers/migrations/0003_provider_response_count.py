@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provider",
+            name="response_count",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0003_provider_response_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProviderAvailability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("weekday", models.PositiveSmallIntegerField()),
+                ("slots", models.BigIntegerField()),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability",
+                        to="providers.provider",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "provider_availability",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="provideravailability",
+            constraint=models.UniqueConstraint(
+                fields=("weekday", "provider"), name="provider_availability_day_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from providers.availability import compile_schedule
+
+CHUNK = 2000
+
+
+def backfill(apps, schema_editor):
+    """Compile existing schedules; ones that can't be read stay unscheduled"""
+    Provider = apps.get_model("providers", "Provider")
+    ProviderAvailability = apps.get_model("providers", "ProviderAvailability")
+    providers = Provider.objects.only("id", "schedule").order_by("pk")
+    chunk = []
+    for provider in providers.iterator(chunk_size=CHUNK):
+        try:
+            compiled = compile_schedule(provider.schedule)
+        except ValueError:
+            continue
+        chunk.extend(
+            ProviderAvailability(provider_id=provider.id, weekday=day, slots=slots)
+            for day, slots in compiled.items()
+        )
+        if len(chunk) >= CHUNK:
+            ProviderAvailability.objects.bulk_create(chunk)
+            chunk = []
+    ProviderAvailability.objects.bulk_create(chunk)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0004_provider_availability"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
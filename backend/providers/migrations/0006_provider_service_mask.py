@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0005_backfill_provider_availability"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provider",
+            name="service_mask",
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,61 @@
+import json
+
+from django.db import migrations
+
+CHUNK = 2000
+
+# SERVICE_TYPES as of this migration; providers.services reads the live model
+SERVICE_BITS = {
+    code: 1 << i
+    for i, code in enumerate(
+        [
+            "AMBULANCE",
+            "FIRE_TRUCK",
+            "POLICE_CAR",
+            "TOW_TRUCK",
+            "PLUMBER",
+            "ELECTRICIAN",
+            "LOCKSMITH",
+            "GENERAL",
+        ]
+    )
+}
+
+
+def service_mask(service_types):
+    if isinstance(service_types, str):
+        try:
+            service_types = json.loads(service_types or "[]")
+        except ValueError:
+            return 0
+    if not isinstance(service_types, list):
+        return 0
+    mask = 0
+    for code in service_types:
+        if isinstance(code, str):
+            mask |= SERVICE_BITS.get(code, 0)
+    return mask
+
+
+def backfill(apps, schema_editor):
+    Provider = apps.get_model("providers", "Provider")
+    providers = Provider.objects.only("id", "service_types").order_by("pk")
+    chunk = []
+    for provider in providers.iterator(chunk_size=CHUNK):
+        provider.service_mask = service_mask(provider.service_types)
+        if provider.service_mask:
+            chunk.append(provider)
+        if len(chunk) == CHUNK:
+            Provider.objects.bulk_update(chunk, ["service_mask"])
+            chunk = []
+    Provider.objects.bulk_update(chunk, ["service_mask"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0006_provider_service_mask"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
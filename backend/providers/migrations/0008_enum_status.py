@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+import config.fields
+from config.fields import code_case, value_case
+
+STATUS_CHOICES = [
+    ("OFFLINE", "Offline"),
+    ("AVAILABLE", "Available"),
+    ("ON_DUTY", "On Duty"),
+    ("IN_EMERGENCY", "In Emergency"),
+    ("BREAK", "On Break"),
+]
+
+
+def to_codes(apps, schema_editor):
+    Provider = apps.get_model("providers", "Provider")
+    Provider.objects.update(status_code=code_case("status", STATUS_CHOICES, "OFFLINE"))
+
+
+def to_strings(apps, schema_editor):
+    Provider = apps.get_model("providers", "Provider")
+    Provider.objects.update(status=value_case("status_code", STATUS_CHOICES))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0007_backfill_provider_service_mask"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provider",
+            name="status_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(to_codes, to_strings),
+        migrations.RemoveField(model_name="provider", name="status"),
+        migrations.RenameField(
+            model_name="provider", old_name="status_code", new_name="status"
+        ),
+        migrations.AlterField(
+            model_name="provider",
+            name="status",
+            field=config.fields.EnumField(choices=STATUS_CHOICES, default="OFFLINE"),
+        ),
+        migrations.AddIndex(
+            model_name="provider",
+            index=models.Index(fields=["status"], name="providers_status_idx"),
+        ),
+    ]
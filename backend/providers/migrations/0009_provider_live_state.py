@@ -0,0 +1,99 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import config.fields
+
+CHUNK = 2000
+FIELDS = ["status", "latitude", "longitude", "last_ping", "current_emergency_id"]
+# Leaves room on each page for the new version of an updated row (HOT)
+FILLFACTOR = 70
+
+STATUS_CHOICES = [
+    ("OFFLINE", "Offline"),
+    ("AVAILABLE", "Available"),
+    ("ON_DUTY", "On Duty"),
+    ("IN_EMERGENCY", "In Emergency"),
+    ("BREAK", "On Break"),
+]
+
+
+def set_fillfactor(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"ALTER TABLE provider_live_state SET (fillfactor = {FILLFACTOR})"
+        )
+
+
+def move_out(apps, schema_editor):
+    """One provider_live_state row per provider"""
+    Provider = apps.get_model("providers", "Provider")
+    ProviderLiveState = apps.get_model("providers", "ProviderLiveState")
+    rows = Provider.objects.order_by("pk").values_list("pk", *FIELDS)
+    chunk = []
+    for pk, *values in rows.iterator(chunk_size=CHUNK):
+        chunk.append(ProviderLiveState(pk, *values))
+        if len(chunk) == CHUNK:
+            ProviderLiveState.objects.bulk_create(chunk)
+            chunk = []
+    ProviderLiveState.objects.bulk_create(chunk)
+
+
+def move_back(apps, schema_editor):
+    Provider = apps.get_model("providers", "Provider")
+    ProviderLiveState = apps.get_model("providers", "ProviderLiveState")
+    chunk = []
+    for live in ProviderLiveState.objects.order_by("pk").iterator(CHUNK):
+        chunk.append(
+            Provider(pk=live.pk, **{name: getattr(live, name) for name in FIELDS})
+        )
+        if len(chunk) == CHUNK:
+            Provider.objects.bulk_update(chunk, FIELDS)
+            chunk = []
+    Provider.objects.bulk_update(chunk, FIELDS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("providers", "0008_enum_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProviderLiveState",
+            fields=[
+                (
+                    "provider",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="live",
+                        serialize=False,
+                        to="providers.provider",
+                    ),
+                ),
+                (
+                    "status",
+                    config.fields.EnumField(choices=STATUS_CHOICES, default="OFFLINE"),
+                ),
+                ("latitude", models.FloatField(blank=True, null=True)),
+                ("longitude", models.FloatField(blank=True, null=True)),
+                ("last_ping", models.DateTimeField(blank=True, null=True)),
+                ("current_emergency_id", models.UUIDField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "live state",
+                "db_table": "provider_live_state",
+                "indexes": [
+                    models.Index(fields=["status"], name="provider_live_status_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(set_fillfactor, migrations.RunPython.noop),
+        migrations.RunPython(move_out, move_back),
+        migrations.RemoveIndex(model_name="provider", name="providers_status_idx"),
+        migrations.RemoveField(model_name="provider", name="status"),
+        migrations.RemoveField(model_name="provider", name="latitude"),
+        migrations.RemoveField(model_name="provider", name="longitude"),
+        migrations.RemoveField(model_name="provider", name="last_ping"),
+        migrations.RemoveField(model_name="provider", name="current_emergency_id"),
+    ]
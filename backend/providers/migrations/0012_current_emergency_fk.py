@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def clear_dangling(apps, schema_editor):
+    """Drop current emergency ids that don't point at an emergency"""
+    Emergency = apps.get_model("emergencies", "Emergency")
+    ProviderLiveState = apps.get_model("providers", "ProviderLiveState")
+    ProviderLiveState.objects.filter(current_emergency_id__isnull=False).exclude(
+        current_emergency_id__in=Emergency.objects.values("id")
+    ).update(current_emergency_id=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0013_search_indexes"),
+        ("providers", "0011_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_dangling, migrations.RunPython.noop),
+        # current_emergency_id becomes the column of a current_emergency
+        # relation; the data stays where it is
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name="providerlivestate",
+                    old_name="current_emergency_id",
+                    new_name="current_emergency",
+                ),
+                migrations.AlterField(
+                    model_name="providerlivestate",
+                    name="current_emergency",
+                    field=models.UUIDField(
+                        blank=True, null=True, db_column="current_emergency_id"
+                    ),
+                ),
+            ],
+        ),
+        # Adds the foreign key constraint and its index
+        migrations.AlterField(
+            model_name="providerlivestate",
+            name="current_emergency",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="emergencies.emergency",
+            ),
+        ),
+    ]
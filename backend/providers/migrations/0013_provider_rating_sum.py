@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+CHUNK = 2000
+
+
+def backfill(apps, schema_editor):
+    """Sum the ratings given so far and derive the rating from them again"""
+    Emergency = apps.get_model("emergencies", "Emergency")
+    Provider = apps.get_model("providers", "Provider")
+    rows = (
+        Emergency.objects.filter(provider__isnull=False, provider_rating__isnull=False)
+        .order_by()
+        .values("provider_id")
+        .annotate(total=Sum("provider_rating"), count=Count("provider_rating"))
+    )
+    providers = [
+        Provider(
+            id=row["provider_id"],
+            rating_sum=row["total"],
+            rating_count=row["count"],
+            rating=(Decimal(row["total"]) / row["count"]).quantize(Decimal("0.01")),
+        )
+        for row in rows
+    ]
+    Provider.objects.bulk_update(
+        providers, ["rating_sum", "rating_count", "rating"], batch_size=CHUNK
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emergencies", "0013_search_indexes"),
+        ("providers", "0012_current_emergency_fk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provider",
+            name="rating_sum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
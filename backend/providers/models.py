@@ -1,7 +1,31 @@
 # backend/providers/models.py
-import uuid
+from django.db import models, transaction
 
-from django.db import models
+from config.fields import EnumField
+from config.uuids import uuid7
+
+LIVE_FIELDS = (
+    "status",
+    "latitude",
+    "longitude",
+    "last_ping",
+    "current_emergency",
+    "current_emergency_id",
+)
+
+
+class ProviderManager(models.Manager):
+    def get_queryset(self):
+        # Status and location are read almost everywhere a provider is
+        return super().get_queryset().select_related("live")
+
+
+def live_field(name):
+    """Provider attribute reading and writing the ProviderLiveState column"""
+    return property(
+        lambda self: getattr(self.get_live(), name),
+        lambda self, value: setattr(self.get_live(), name, value),
+    )
 
 
 class Provider(models.Model):
@@ -25,7 +49,7 @@ class Provider(models.Model):
     ]
 
     id = models.UUIDField(  # noqa: A003
-        primary_key=True, default=uuid.uuid4, editable=False
+        primary_key=True, default=uuid7, editable=False
     )
     user = models.OneToOneField(
         "users.User", on_delete=models.CASCADE, related_name="provider_profile"
@@ -33,23 +57,16 @@ class Provider(models.Model):
 
     # Service information
     service_types = models.JSONField(default=list)  # Changed from ArrayField
+    # One bit per SERVICE_TYPES code, kept in sync by save() (providers/services.py)
+    service_mask = models.PositiveSmallIntegerField(default=0, db_index=True)
     certification_level = models.CharField(max_length=50, blank=True)
     license_number = models.CharField(max_length=100, blank=True)
     is_verified = models.BooleanField(default=False)
     verification_date = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
-    # Current state
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="OFFLINE")
-
-    # Location - using simple Float fields instead of PointField for now
-    latitude = models.FloatField(null=True, blank=True)
-    longitude = models.FloatField(null=True, blank=True)
-
-    # Fix: Use string reference instead of direct model reference
-    current_emergency_id = models.UUIDField(
-        null=True, blank=True
-    )  # Store ID instead of ForeignKey
+    # Current state (status, location, last_ping, current_emergency_id) lives
+    # in ProviderLiveState; see the properties below
 
     # Vehicle information
     vehicle_type = models.CharField(max_length=50, blank=True)
@@ -60,12 +77,15 @@ class Provider(models.Model):
     total_emergencies = models.IntegerField(default=0)
     completed_emergencies = models.IntegerField(default=0)
     avg_response_time = models.DurationField(null=True, blank=True)
+    # Arrivals averaged into avg_response_time
+    response_count = models.IntegerField(default=0)
+    # rating_sum / rating_count, rounded; the sum keeps the mean exact
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
+    rating_sum = models.IntegerField(default=0)
     rating_count = models.IntegerField(default=0)
 
     # Availability
     schedule = models.JSONField(default=dict, blank=True)  # Changed to JSONField
-    last_ping = models.DateTimeField(null=True, blank=True)
     max_distance = models.IntegerField(default=50000)  # Max service distance in meters
 
     # Financial
@@ -74,20 +94,154 @@ class Provider(models.Model):
     )
     service_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
+    objects = ProviderManager()
+
     class Meta:
         db_table = "providers"
 
+    status = live_field("status")
+    latitude = live_field("latitude")
+    longitude = live_field("longitude")
+    last_ping = live_field("last_ping")
+    current_emergency_id = live_field("current_emergency_id")
+    # Loaded along with the providers by select_related or prefetch_related
+    # on "live__current_emergency"
+    current_emergency = live_field("current_emergency")
+
     def __str__(self):
         return f"{self.user.get_full_name()}"
 
-    @property
-    def current_emergency(self):
-        """Get the current emergency instance"""
-        if self.current_emergency_id:
-            from emergencies.models import Emergency
-
-            try:
-                return Emergency.objects.get(id=self.current_emergency_id)
-            except Emergency.DoesNotExist:
-                return None
-        return None
+    def get_live(self):
+        """The ProviderLiveState row, or a new one saved along with the provider"""
+        if self._state.adding and not Provider.live.is_cached(self):
+            # Nothing to look up for a provider that isn't saved yet
+            self.live = ProviderLiveState(provider=self)
+        try:
+            return self.live
+        except ProviderLiveState.DoesNotExist:
+            self.live = ProviderLiveState(provider=self)
+            return self.live
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+
+        from providers.availability import compile_schedule
+
+        try:
+            compile_schedule(self.schedule)
+        except ValueError as e:
+            raise ValidationError({"schedule": str(e)}) from e
+
+    def save(self, *args, **kwargs):
+        from providers.availability import sync_availability
+        from providers.services import service_mask
+
+        update_fields = kwargs.get("update_fields")
+        live_fields = None
+        self.service_mask = service_mask(self.service_types)
+        if update_fields is not None:
+            # Live columns are written to the narrow table only, so a
+            # location ping never touches the providers row
+            live_fields = [name for name in update_fields if name in LIVE_FIELDS]
+            update_fields = [name for name in update_fields if name not in LIVE_FIELDS]
+            if "service_types" in update_fields:
+                update_fields.append("service_mask")
+            kwargs["update_fields"] = update_fields
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Recompile only when the schedule may have changed
+            if update_fields is None or "schedule" in update_fields:
+                sync_availability(self)
+            self.save_live(adding, live_fields)
+
+    def save_live(self, adding, live_fields):
+        # A full save() writes the live row back only if it was read or set
+        if not (adding or live_fields or Provider.live.is_cached(self)):
+            return
+        live = self.get_live()
+        if live._state.adding or live_fields is None:
+            live.save()
+        else:
+            live.save(update_fields=live_fields)
+
+    def set_status(self, status, **fields):
+        """Save a new status, plus any other `fields`, and publish the change"""
+        from outbox.publish import publish
+
+        previous_status = self.status
+        self.status = status
+        for name, value in fields.items():
+            setattr(self, name, value)
+        with transaction.atomic():
+            self.save(update_fields=["status", *fields])
+            publish(
+                "provider.status_changed",
+                self,
+                {
+                    "status": status,
+                    "previous_status": previous_status,
+                    "user_id": str(self.user_id),
+                    "current_emergency_id": (
+                        str(self.current_emergency_id)
+                        if self.current_emergency_id
+                        else None
+                    ),
+                },
+            )
+
+
+class ProviderLiveState(models.Model):
+    """Columns of a provider that change all the time, kept in a narrow table
+
+    Location pings rewrite only this row. The table is created with a
+    fillfactor below 100 on PostgreSQL and latitude, longitude and last_ping
+    are left unindexed, so those updates stay HOT: the new row version fits
+    on the same page and no index entry is written.
+    """
+
+    provider = models.OneToOneField(
+        Provider, on_delete=models.CASCADE, primary_key=True, related_name="live"
+    )
+    status = EnumField(choices=Provider.STATUS_CHOICES, default="OFFLINE")
+    # Location - using simple Float fields instead of PointField for now
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    last_ping = models.DateTimeField(null=True, blank=True)
+    current_emergency = models.ForeignKey(
+        "emergencies.Emergency",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    class Meta:
+        db_table = "provider_live_state"
+        verbose_name = "live state"
+        # Status and the current emergency change far less often than
+        # location; their indexes cost only those updates their HOT
+        # eligibility
+        indexes = [models.Index(fields=["status"], name="provider_live_status_idx")]
+
+    def __str__(self):
+        return f"{self.get_status_display()} ({self.provider_id})"
+
+
+class ProviderAvailability(models.Model):
+    """One weekday of a provider's compiled schedule (providers/availability.py)"""
+
+    provider = models.ForeignKey(
+        Provider, on_delete=models.CASCADE, related_name="availability"
+    )
+    weekday = models.PositiveSmallIntegerField()  # 0 is Monday
+    # Bit n set: scheduled from n * 30 minutes past midnight, local time
+    slots = models.BigIntegerField()
+
+    class Meta:
+        db_table = "provider_availability"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["weekday", "provider"], name="provider_availability_day_uniq"
+            )
+        ]
@@ -0,0 +1,59 @@
+# backend/providers/services.py
+"""
+Capability filtering on Provider.service_mask.
+
+`service_types` stays the source of truth; save() mirrors it into an integer
+with one bit per SERVICE_TYPES code. With eight service types there are only
+256 possible masks, so "has any/all of these services" is rewritten as
+`service_mask IN (<every mask that matches>)`, which a plain btree index on
+the column can answer instead of a JSON containment test per row.
+"""
+
+import json
+
+from providers.models import Provider
+
+# Bits follow SERVICE_TYPES order: append new codes, never reorder
+SERVICE_BITS = {code: 1 << i for i, (code, _) in enumerate(Provider.SERVICE_TYPES)}
+ALL_MASKS = range(1 << len(SERVICE_BITS))
+
+
+def service_mask(service_types):
+    """Bitmask for a list of service codes
+
+    Unknown codes are ignored, and a value that isn't a list gives 0.
+    """
+    if isinstance(service_types, str):
+        # Older rows hold the list as a JSON-encoded string
+        try:
+            service_types = json.loads(service_types) if service_types.strip() else []
+        except ValueError:
+            return 0
+    if not isinstance(service_types, (list, tuple)):
+        return 0
+    mask = 0
+    for code in service_types:
+        if isinstance(code, str):
+            mask |= SERVICE_BITS.get(code, 0)
+    return mask
+
+
+def matching_masks(services, match_all=False):
+    """Every service_mask value that has any (or all) of `services`
+
+    Raises ValueError for an unknown service code.
+    """
+    unknown = [code for code in services if code not in SERVICE_BITS]
+    if unknown:
+        raise ValueError(f"Unknown service types: {', '.join(unknown)}")
+    wanted = service_mask(services)
+    if match_all:
+        return [mask for mask in ALL_MASKS if mask & wanted == wanted]
+    return [mask for mask in ALL_MASKS if mask & wanted]
+
+
+def filter_services(queryset, services, match_all=False, field="service_mask"):
+    """Providers offering any (or, with match_all, every one) of `services`"""
+    if not services:
+        return queryset
+    return queryset.filter(**{f"{field}__in": matching_masks(services, match_all)})
@@ -0,0 +1,504 @@
+import importlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from emergencies.models import Emergency
+from outbox.models import OutboxEvent
+from outbox.publish import publish
+from outbox.relay import relay_batch
+from providers import bulk, metrics
+from providers.availability import SLOTS_PER_DAY, compile_schedule, filter_scheduled
+from providers.models import Provider, ProviderAvailability, ProviderLiveState
+from providers.services import (
+    SERVICE_BITS,
+    filter_services,
+    matching_masks,
+    service_mask,
+)
+from users.testing import make_user
+
+
+class BulkTests(TestCase):
+    """Set-wise provider changes, inline or chunked through the outbox"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = make_user("dispatcher", is_staff=True)
+
+    def providers(self, count, **extra):
+        start = Provider.objects.count()
+        return [
+            Provider.objects.create(user=make_user(f"provider{i}"), **extra)
+            for i in range(start, start + count)
+        ]
+
+    def statuses(self, providers):
+        return [
+            ProviderLiveState.objects.values_list("status", flat=True).get(
+                provider_id=p.pk
+            )
+            for p in providers
+        ]
+
+    def test_offline_chunk(self):
+        online = self.providers(2, status="AVAILABLE")
+        offline = self.providers(1)
+
+        self.assertEqual(bulk.offline_chunk([p.pk for p in online + offline]), 2)
+
+        self.assertEqual(self.statuses(online + offline), ["OFFLINE"] * 3)
+        events = OutboxEvent.objects.filter(topic="provider.status_changed")
+        self.assertEqual(
+            sorted(e.aggregate_id for e in events), sorted(str(p.pk) for p in online)
+        )
+        self.assertEqual({e.payload["previous_status"] for e in events}, {"AVAILABLE"})
+        self.assertEqual(bulk.offline_chunk([p.pk for p in online]), 0)
+
+    def test_verify_chunk(self):
+        providers = self.providers(3)
+        Provider.objects.filter(pk=providers[0].pk).update(is_verified=True)
+
+        self.assertEqual(bulk.verify_chunk([p.pk for p in providers]), 2)
+
+        self.assertEqual(
+            Provider.objects.filter(is_verified=True, verification_date__isnull=False)
+            .exclude(pk=providers[0].pk)
+            .count(),
+            2,
+        )
+        self.assertEqual(
+            OutboxEvent.objects.filter(topic="provider.verified").count(), 2
+        )
+        self.assertEqual(bulk.verify_chunk([p.pk for p in providers]), 0)
+
+    def test_queries_do_not_grow_with_the_chunk(self):
+        def queries(count):
+            ids = [p.pk for p in self.providers(count, status="AVAILABLE")]
+            with CaptureQueriesContext(connection) as offline:
+                bulk.offline_chunk(ids)
+            with CaptureQueriesContext(connection) as verify:
+                bulk.verify_chunk(ids)
+            return len(offline), len(verify)
+
+        self.assertEqual(queries(2), queries(20))
+
+    def test_large_selections_are_queued_a_chunk_per_event(self):
+        providers = self.providers(5, status="AVAILABLE")
+        ids = [p.pk for p in providers]
+
+        with self.settings(OUTBOX={"JOB_CHUNK": 2, "JOB_INLINE_LIMIT": 3}):
+            self.assertEqual(bulk.set_offline(ids, self.staff), (0, 5))
+            self.assertEqual(bulk.verify(ids, self.staff), (0, 5))
+            self.assertEqual(bulk.verify(ids[:3], self.staff), (3, 0))
+        self.assertEqual(set(self.statuses(providers)), {"AVAILABLE"})
+
+        # Every chunk commits in a relay batch of its own
+        self.assertEqual([relay_batch() for _ in range(6)], [1] * 6)
+        self.assertEqual(set(self.statuses(providers)), {"OFFLINE"})
+        self.assertEqual(Provider.objects.filter(is_verified=True).count(), 5)
+
+
+class MetricsTests(TestCase):
+    """Counters moved by the relay, checked against a full recomputation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reporter = make_user("reporter")
+        cls.provider = Provider.objects.create(user=make_user("responder"))
+
+    def emergency(self):
+        return Emergency.objects.create(
+            user=self.reporter, emergency_type="FIRE", latitude=14.6, longitude=121.0
+        )
+
+    def relay(self):
+        while relay_batch():
+            pass
+        self.provider.refresh_from_db()
+
+    def rate(self, emergency, rating):
+        emergency.provider_rating = rating
+        emergency.save(update_fields=["provider_rating"])
+        with transaction.atomic():
+            publish(
+                "emergency.rated", emergency, emergency.event_payload(rating=rating)
+            )
+
+    def test_transitions_count_once(self):
+        emergency = self.emergency()
+        Emergency.objects.filter(pk=emergency.pk).update(
+            created_at=emergency.created_at - timedelta(minutes=10)
+        )
+        emergency.refresh_from_db()
+        for status in ("DISPATCHED", "ON_SITE", "RESOLVED"):
+            emergency.transition_to(status, provider=self.provider)
+        # Re-resolving doesn't stamp anything, so nothing is counted again
+        emergency.transition_to("RESOLVED")
+        self.relay()
+
+        self.assertEqual(self.provider.total_emergencies, 1)
+        self.assertEqual(self.provider.completed_emergencies, 1)
+        self.assertEqual(self.provider.response_count, 1)
+        self.assertAlmostEqual(
+            self.provider.avg_response_time.total_seconds(), 600, delta=1
+        )
+        self.assertEqual(metrics.reconcile(), {})
+
+    def test_rating_is_derived_from_the_sum(self):
+        ratings = [5, 4, 4] + [5, 4] * 20
+        for rating in ratings:
+            emergency = self.emergency()
+            emergency.transition_to("DISPATCHED", provider=self.provider)
+            self.rate(emergency, rating)
+        self.relay()
+
+        self.assertEqual(self.provider.rating_sum, sum(ratings))
+        self.assertEqual(self.provider.rating_count, len(ratings))
+        expected = (Decimal(sum(ratings)) / len(ratings)).quantize(Decimal("0.01"))
+        self.assertEqual(self.provider.rating, expected)
+        self.assertEqual(metrics.reconcile(), {})
+
+    def test_reconcile_fixes_drift(self):
+        emergency = self.emergency()
+        emergency.transition_to("DISPATCHED", provider=self.provider)
+        self.rate(emergency, 3)
+        self.relay()
+        Provider.objects.filter(pk=self.provider.pk).update(
+            total_emergencies=5, rating=1, rating_sum=1
+        )
+        idle = Provider.objects.create(user=make_user("idle"), completed_emergencies=2)
+
+        drift = metrics.reconcile(fix=True)
+
+        self.assertEqual(
+            drift[self.provider.pk],
+            {
+                "total_emergencies": (5, 1),
+                "rating": (Decimal("1.00"), 3),
+                "rating_sum": (1, 3),
+            },
+        )
+        self.assertEqual(drift[idle.pk], {"completed_emergencies": (2, 0)})
+        self.provider.refresh_from_db()
+        self.assertEqual(
+            (self.provider.total_emergencies, self.provider.rating_sum),
+            (1, 3),
+        )
+        self.assertEqual(self.provider.rating, Decimal("3.00"))
+        self.assertEqual(metrics.reconcile(), {})
+
+
+def slots(*ranges):
+    """Slot mask with the half-open [first, last) slot ranges set"""
+    mask = 0
+    for first, last in ranges:
+        for slot in range(first, last):
+            mask |= 1 << slot
+    return mask
+
+
+class CompileScheduleTests(SimpleTestCase):
+    def test_day_shift(self):
+        self.assertEqual(
+            compile_schedule({"monday": {"start": "08:00", "end": "20:15"}}),
+            # The partly covered 20:00-20:30 slot counts
+            {0: slots((16, 41))},
+        )
+
+    def test_overnight_shift_wraps_into_the_next_day(self):
+        self.assertEqual(
+            compile_schedule(
+                {
+                    "saturday": [
+                        {"start": "06:00", "end": "10:00"},
+                        {"start": "22:00", "end": "02:00"},
+                    ]
+                }
+            ),
+            {5: slots((12, 20), (44, 48)), 6: slots((0, 4))},
+        )
+
+    def test_sunday_night_wraps_into_monday(self):
+        self.assertEqual(
+            compile_schedule({"sunday": {"start": "22:00", "end": "02:00"}}),
+            {6: slots((44, 48)), 0: slots((0, 4))},
+        )
+
+    def test_equal_start_and_end_is_a_full_day(self):
+        self.assertEqual(
+            compile_schedule({"Tuesday": {"start": "09:00", "end": "09:00"}}),
+            {1: slots((18, 48)), 2: slots((0, 18))},
+        )
+        self.assertEqual(
+            compile_schedule({"friday": {"start": "00:00", "end": "24:00"}}),
+            {4: slots((0, SLOTS_PER_DAY))},
+        )
+
+    def test_json_string_and_empty_schedules(self):
+        self.assertEqual(
+            compile_schedule('{"monday": {"start": "00:00", "end": "00:30"}}'),
+            {0: 1},
+        )
+        self.assertEqual(compile_schedule(""), {})
+        self.assertEqual(compile_schedule({"monday": []}), {})
+
+    def test_bad_schedules(self):
+        for schedule in (
+            ["monday"],
+            {"someday": {"start": "08:00", "end": "09:00"}},
+            {"monday": {"start": "25:00", "end": "09:00"}},
+            {"monday": {"start": "08:60", "end": "09:00"}},
+            {"monday": {"start": "8am", "end": "09:00"}},
+            {"monday": {"start": "08:00"}},
+            {"monday": "08:00-09:00"},
+            {"monday": 8},
+            "{not json",
+        ):
+            with self.subTest(schedule=schedule):
+                with self.assertRaises(ValueError):
+                    compile_schedule(schedule)
+
+
+class ProviderScheduleTests(TestCase):
+    def test_save_compiles_the_schedule(self):
+        provider = Provider.objects.create(
+            user=make_user("responder"),
+            schedule={"sunday": {"start": "22:00", "end": "02:00"}},
+        )
+        manila = ZoneInfo("Asia/Manila")
+        scheduled = Provider.objects.filter(pk=provider.pk)
+
+        # Monday 01:00 is the end of the Sunday night shift
+        self.assertTrue(
+            filter_scheduled(scheduled, datetime(2026, 3, 2, 1, tzinfo=manila))
+        )
+        self.assertFalse(
+            filter_scheduled(scheduled, datetime(2026, 3, 2, 3, tzinfo=manila))
+        )
+
+        provider.schedule = {}
+        provider.save(update_fields=["schedule"])
+        self.assertFalse(ProviderAvailability.objects.filter(provider=provider))
+
+    def test_bad_schedule_saves_unscheduled(self):
+        provider = Provider(
+            user=make_user("responder"), schedule={"monday": {"start": "late"}}
+        )
+        with self.assertRaises(ValidationError):
+            provider.clean()
+
+        with self.assertLogs("providers.availability", "WARNING"):
+            provider.save()
+
+        self.assertEqual(Provider.objects.get().schedule, {"monday": {"start": "late"}})
+        self.assertFalse(ProviderAvailability.objects.exists())
+
+
+class ServiceMaskTests(TestCase):
+    """service_types mirrored into an indexed bitmask"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ambulance = Provider.objects.create(
+            user=make_user("ambulance"), service_types=["AMBULANCE"]
+        )
+        cls.both = Provider.objects.create(
+            user=make_user("both"), service_types=["AMBULANCE", "FIRE_TRUCK"]
+        )
+        cls.fire = Provider.objects.create(
+            user=make_user("fire"), service_types='["FIRE_TRUCK"]'
+        )
+
+    def test_mask_building(self):
+        self.assertEqual(service_mask(["AMBULANCE", "GENERAL"]), 0b10000001)
+        self.assertEqual(service_mask(["AMBULANCE", "SPACESHIP"]), 1)
+        self.assertEqual(service_mask('["FIRE_TRUCK"]'), 2)
+        for malformed in ("", "[AMBULANCE", '{"a": 1}', "7", None, 7, [["AMBULANCE"]]):
+            with self.subTest(service_types=malformed):
+                self.assertEqual(service_mask(malformed), 0)
+        self.assertEqual(self.fire.service_mask, 2)
+
+    def test_malformed_service_types_save(self):
+        provider = Provider.objects.create(
+            user=make_user("broken"), service_types="[AMBULANCE"
+        )
+        self.assertEqual(provider.service_mask, 0)
+
+    def test_in_list_filter(self):
+        self.assertEqual(len(matching_masks(["AMBULANCE"])), 128)
+        self.assertEqual(len(matching_masks(["AMBULANCE", "GENERAL"], True)), 64)
+        with self.assertRaises(ValueError):
+            matching_masks(["SPACESHIP"])
+
+        providers = Provider.objects.order_by("user__username")
+        self.assertEqual(
+            list(filter_services(providers, ["AMBULANCE", "FIRE_TRUCK"])),
+            [self.ambulance, self.both, self.fire],
+        )
+        self.assertEqual(
+            list(filter_services(providers, ["AMBULANCE", "FIRE_TRUCK"], True)),
+            [self.both],
+        )
+        self.assertEqual(list(filter_services(providers, [])), list(providers))
+
+        self.both.service_types = ["GENERAL"]
+        self.both.save(update_fields=["service_types"])
+        self.assertEqual(
+            list(filter_services(providers, ["FIRE_TRUCK", "GENERAL"], True)), []
+        )
+
+    def test_backfill(self):
+        migration = importlib.import_module(
+            "providers.migrations.0007_backfill_provider_service_mask"
+        )
+        # Codes are only ever appended, so the frozen table is a prefix
+        self.assertLessEqual(migration.SERVICE_BITS.items(), SERVICE_BITS.items())
+        Provider.objects.update(service_mask=0)
+
+        migration.backfill(apps, None)
+
+        self.assertEqual(
+            dict(Provider.objects.values_list("user__username", "service_mask")),
+            {"ambulance": 1, "both": 3, "fire": 2},
+        )
+
+
+class LiveStateTests(TestCase):
+    """Status and location in the narrow provider_live_state table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.provider = Provider.objects.create(
+            user=make_user("responder"),
+            service_types=["AMBULANCE"],
+            status="AVAILABLE",
+            latitude=14.6,
+        )
+
+    def test_manager_joins_the_live_state(self):
+        with self.assertNumQueries(1):
+            provider = Provider.objects.get(pk=self.provider.pk)
+            self.assertEqual((provider.status, provider.latitude), ("AVAILABLE", 14.6))
+        with self.assertNumQueries(1):
+            statuses = [p.status for p in Provider.objects.all()]
+        self.assertEqual(statuses, ["AVAILABLE"])
+
+    def test_location_ping_writes_the_live_row_only(self):
+        provider = Provider.objects.get(pk=self.provider.pk)
+        provider.latitude, provider.longitude = 14.7, 121.1
+        provider.last_ping = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            provider.save(update_fields=["latitude", "longitude", "last_ping"])
+
+        writes = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(writes), 1)
+        self.assertIn("provider_live_state", writes[0])
+        live = ProviderLiveState.objects.get(provider=provider)
+        self.assertEqual((live.latitude, live.longitude), (14.7, 121.1))
+
+    def test_set_status_publishes_the_change(self):
+        self.provider.set_status("OFFLINE")
+        self.assertEqual(
+            ProviderLiveState.objects.get(provider=self.provider).status, "OFFLINE"
+        )
+        event = OutboxEvent.objects.get(topic="provider.status_changed")
+        self.assertEqual(
+            (event.payload["previous_status"], event.payload["status"]),
+            ("AVAILABLE", "OFFLINE"),
+        )
+
+    def test_admin_cannot_edit_the_live_state(self):
+        self.client.force_login(make_user("admin", is_staff=True, is_superuser=True))
+        url = reverse("admin:providers_provider_change", args=[self.provider.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        forms = [response.context["adminform"].form]
+        for inline in response.context["inline_admin_formsets"]:
+            forms += [inline.formset.management_form, *inline.formset.forms]
+        # Resubmit the page as rendered
+        data = {
+            form.add_prefix(name): form[name].value()
+            for form in forms
+            for name in form.fields
+            if form[name].value() is not None
+        }
+        data["live-0-status"] = "OFFLINE"
+        data["vehicle_number"] = "ABC 123"
+
+        response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 302)
+        self.provider.refresh_from_db()
+        self.assertEqual(self.provider.vehicle_number, "ABC 123")
+        self.assertEqual(
+            ProviderLiveState.objects.get(provider=self.provider).status, "AVAILABLE"
+        )
+
+
+class CurrentEmergencyTests(TestCase):
+    """current_emergency as a foreign key to the emergency being handled"""
+
+    def assign(self, name):
+        provider = Provider.objects.create(
+            user=make_user(name), service_types=["AMBULANCE"]
+        )
+        emergency = Emergency.objects.create(
+            user=make_user(f"{name}-caller"),
+            emergency_type="MEDICAL",
+            latitude=14.6,
+            longitude=121.0,
+        )
+        provider.set_status("IN_EMERGENCY", current_emergency_id=emergency.pk)
+        return provider, emergency
+
+    def test_clear_dangling(self):
+        migration = importlib.import_module(
+            "providers.migrations.0012_current_emergency_fk"
+        )
+        kept, emergency = self.assign("kept")
+        dangling, _ = self.assign("dangling")
+        ProviderLiveState.objects.filter(provider=dangling).update(
+            current_emergency_id=uuid.uuid4()
+        )
+
+        migration.clear_dangling(apps, None)
+
+        self.assertEqual(
+            dict(
+                ProviderLiveState.objects.values_list(
+                    "provider__user__username", "current_emergency_id"
+                )
+            ),
+            {"kept": emergency.pk, "dangling": None},
+        )
+
+    def test_current_emergency_is_joined(self):
+        def query():
+            response = self.client.post(
+                "/graphql/",
+                json.dumps({"query": "{ providers { currentEmergency { id } } }"}),
+                content_type="application/json",
+            )
+            return response.json()["data"]["providers"]
+
+        self.assign("first")
+        with CaptureQueriesContext(connection) as one:
+            self.assertEqual(len(query()), 1)
+        self.assign("second")
+        self.assign("third")
+        with self.assertNumQueries(len(one)):
+            providers = query()
+        self.assertEqual(len(providers), 3)
+        self.assertTrue(all(p["currentEmergency"] for p in providers))
@@ -9,11 +9,11 @@ from decimal import Decimal
 import django
 from django.db.models import Count
 
-from emergencies.models import Emergency
+from emergencies.models import Emergency, EmergencyDetails
 from providers.models import Provider
 
 # Import your models
-from users.models import User
+from users.models import User, UserProfile
 
 # Setup Django
 sys.path.insert(0, os.getcwd())
@@ -43,6 +43,8 @@ user_types = [
 ]  # Mostly citizens
 # Users
 for i in range(1000):
+    latitude = 14.5995 + random.uniform(-0.1, 0.1)
+    longitude = 120.9842 + random.uniform(-0.1, 0.1)
     try:
         user = User.objects.create_user(
             username=f"citizen{i + 1}",
@@ -52,6 +54,16 @@ for i in range(1000):
             last_name="User",
             phone=f"+63{9000000000 + i}",  # Unique phone numbers
             user_type=random.choice(user_types),
+            blood_type=random.choice(
+                ["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-", ""]
+            ),
+            last_known_location=f"{latitude},{longitude}",
+            latitude=latitude,
+            longitude=longitude,
+            is_online=random.choice([True, False]),
+        )
+        UserProfile.objects.create(
+            user=user,
             emergency_contacts=json.dumps(
                 [
                     {
@@ -85,11 +97,6 @@ for i in range(1000):
                     ),
                 }
             ),
-            blood_type=random.choice(
-                ["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-", ""]
-            ),
-            last_known_location=f"{14.5995 + random.uniform(-0.1, 0.1)},{120.9842 + random.uniform(-0.1, 0.1)}",
-            is_online=random.choice([True, False]),
             notification_preferences=json.dumps(
                 {
                     "emergency_alerts": True,
@@ -119,9 +126,10 @@ for i in range(500):
             last_name="Responder",
             phone=f"+63{9100000000 + i}",  # Different range for providers
             user_type="PROVIDER",  # Provider user type
-            emergency_contacts=json.dumps([]),
-            medical_info=json.dumps({}),
             is_online=True,  # Providers are usually online
+        )
+        UserProfile.objects.create(
+            user=user,
             notification_preferences=json.dumps(
                 {
                     "emergency_alerts": True,
@@ -222,12 +230,12 @@ print(f"📊 Created {len(providers)} provider profiles")
 print("\n🚨 Creating emergency cases...")
 
 emergency_types = [
-    "medical",
-    "fire",
-    "police",
-    "accident",
-    "natural_disaster",
-    "hazard",
+    "MEDICAL",
+    "FIRE",
+    "POLICE",
+    "CAR_ACCIDENT",
+    "NATURAL_DISASTER",
+    "UTILITY",
 ]
 philippine_cities = [
     "Manila",
@@ -243,10 +251,10 @@ philippine_cities = [
 ]
 
 symptoms_examples = {
-    "medical": ["Chest pain", "Difficulty breathing", "Unconscious", "Severe bleeding"],
-    "fire": ["Smoke visible", "Open flames", "Electrical sparks", "Burning smell"],
-    "police": ["Assault in progress", "Burglary", "Disturbance", "Suspicious activity"],
-    "accident": [
+    "MEDICAL": ["Chest pain", "Difficulty breathing", "Unconscious", "Severe bleeding"],
+    "FIRE": ["Smoke visible", "Open flames", "Electrical sparks", "Burning smell"],
+    "POLICE": ["Assault in progress", "Burglary", "Disturbance", "Suspicious activity"],
+    "CAR_ACCIDENT": [
         "Vehicle collision",
         "Multiple injuries",
         "Road blocked",
@@ -278,12 +286,19 @@ for i in range(1001):
             user=reporter,
             provider=assigned_provider,
             emergency_type=emergency_type,
-            priority=random.choice(["low", "medium", "high", "critical"]),
-            status=random.choice(["pending", "dispatched", "arrived", "resolved"]),
+            priority=random.choice(["GREEN", "YELLOW", "ORANGE", "RED"]),
+            status=random.choice(["PENDING", "DISPATCHED", "ON_SITE", "RESOLVED"]),
             latitude=14.5995 + random.uniform(-0.2, 0.2),
             longitude=120.9842 + random.uniform(-0.2, 0.2),
             address=f"{random.randint(1, 999)} {random.choice(['EDSA', 'C5', 'Roxas Blvd', 'Ayala Ave', 'Shaw Blvd'])}",
             city=random.choice(philippine_cities),
+            description=f"{emergency_type.capitalize()} emergency reported at {random.choice(['residential area', 'commercial establishment', 'public road', 'park'])}",
+            is_anonymous=reporter is None,
+            created_at=datetime.now()
+            - timedelta(hours=random.randint(0, 168)),  # Up to 7 days ago
+        )
+        EmergencyDetails.objects.create(
+            emergency=emergency,
             symptoms=json.dumps(
                 random.sample(
                     symptoms_examples.get(emergency_type, ["Emergency reported"]),
@@ -299,30 +314,26 @@ for i in range(1001):
                         "blood_type": random.choice(["O+", "A+", "B+", "AB+"]),
                     }
                 )
-                if emergency_type in ["medical", "accident"]
+                if emergency_type in ["MEDICAL", "CAR_ACCIDENT"]
                 else json.dumps({})
             ),
-            description=f"{emergency_type.capitalize()} emergency reported at {random.choice(['residential area', 'commercial establishment', 'public road', 'park'])}",
             attachments=json.dumps(
                 [f"photo_{j + 1}.jpg" for j in range(random.randint(0, 2))]
             ),
-            is_anonymous=reporter is None,
-            created_at=datetime.now()
-            - timedelta(hours=random.randint(0, 168)),  # Up to 7 days ago
         )
 
         # Update timestamps based on status
-        if emergency.status in ["dispatched", "arrived", "resolved"]:
+        if emergency.status in ["DISPATCHED", "ON_SITE", "RESOLVED"]:
             emergency.dispatched_at = emergency.created_at + timedelta(
                 minutes=random.randint(2, 15)
             )
 
-        if emergency.status in ["arrived", "resolved"]:
+        if emergency.status in ["ON_SITE", "RESOLVED"]:
             emergency.arrived_at = emergency.dispatched_at + timedelta(
                 minutes=random.randint(5, 30)
             )
 
-        if emergency.status == "resolved":
+        if emergency.status == "RESOLVED":
             emergency.resolved_at = emergency.arrived_at + timedelta(
                 minutes=random.randint(20, 120)
             )
@@ -330,7 +341,7 @@ for i in range(1001):
         emergency.save()
 
         # Update provider if assigned
-        if assigned_provider and emergency.status in ["dispatched", "arrived"]:
+        if assigned_provider and emergency.status in ["DISPATCHED", "ON_SITE"]:
             assigned_provider.current_emergency_id = emergency.id
             assigned_provider.status = "IN_EMERGENCY"
             assigned_provider.save()
@@ -360,7 +371,7 @@ print(f"  Total providers: {Provider.objects.count()}")
 print(f"  Verified providers: {Provider.objects.filter(is_verified=True).count()}")
 print(f"  Active providers: {Provider.objects.filter(is_active=True).count()}")
 for status in ["AVAILABLE", "ON_DUTY", "IN_EMERGENCY", "BREAK", "OFFLINE"]:
-    count = Provider.objects.filter(status=status).count()
+    count = Provider.objects.filter(live__status=status).count()
     if count > 0:
         print(f"  {status}: {count}")
 
@@ -376,12 +387,12 @@ for etype in emergency_types:
         print(f"  {etype}: {count}")
 
 print("\n📊 EMERGENCY STATUS:")
-for status in ["pending", "dispatched", "arrived", "resolved"]:
+for status in ["PENDING", "DISPATCHED", "ON_SITE", "RESOLVED"]:
     count = Emergency.objects.filter(status=status).count()
     print(f"  {status}: {count}")
 
 print("\n📊 EMERGENCY PRIORITY:")
-for priority in ["low", "medium", "high", "critical"]:
+for priority in ["GREEN", "YELLOW", "ORANGE", "RED"]:
     count = Emergency.objects.filter(priority=priority).count()
     if count > 0:
         print(f"  {priority}: {count}")
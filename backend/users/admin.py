@@ -2,14 +2,22 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from config.pagination import EstimatedCountPaginator
+from config.search import USERS, IndexedSearchMixin
 from providers.admin import ProviderInline
 
-from .models import User
+from .models import User, UserProfile
+
+
+class UserProfileInline(admin.StackedInline):
+    model = UserProfile
+    can_delete = False
+    extra = 0
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
-    inlines = [ProviderInline]
+class CustomUserAdmin(IndexedSearchMixin, UserAdmin):
+    inlines = [UserProfileInline, ProviderInline]
 
     # What to display in the list view
     list_display = (
@@ -25,11 +33,15 @@ class CustomUserAdmin(UserAdmin):
         "is_online",
     )
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     # Filter options on the right
     list_filter = ("user_type", "is_staff", "is_superuser", "is_active", "is_online")
 
-    # Search fields
+    # Search fields, through the trigram and full-text indexes (config/search.py)
     search_fields = ("username", "email", "first_name", "last_name", "phone")
+    search_spec = USERS
 
     # Fieldsets for detail view
     fieldsets = (
@@ -40,12 +52,11 @@ class CustomUserAdmin(UserAdmin):
             {
                 "fields": (
                     "user_type",
-                    "emergency_contacts",
-                    "medical_info",
                     "blood_type",
                     "last_known_location",
+                    "latitude",
+                    "longitude",
                     "is_online",
-                    "notification_preferences",
                 )
             },
         ),
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+CHUNK = 2000
+
+
+def parse(value):
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def backfill(apps, schema_editor):
+    """Parse "lat,lng" strings from last_known_location into the new columns"""
+    User = apps.get_model("users", "User")
+    users = (
+        User.objects.exclude(last_known_location="")
+        .filter(latitude__isnull=True)
+        .only("id", "last_known_location")
+        .order_by("pk")
+    )
+    chunk = []
+    for user in users.iterator(chunk_size=CHUNK):
+        point = parse(user.last_known_location)
+        if point is None:
+            continue
+        user.latitude, user.longitude = point
+        chunk.append(user)
+        if len(chunk) == CHUNK:
+            User.objects.bulk_update(chunk, ["latitude", "longitude"])
+            chunk = []
+    User.objects.bulk_update(chunk, ["latitude", "longitude"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0002_user_location"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
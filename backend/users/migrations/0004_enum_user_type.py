@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+import config.fields
+from config.fields import code_case, value_case
+
+USER_TYPES = [
+    ("CITIZEN", "Citizen"),
+    ("PROVIDER", "Provider"),
+    ("FIRST_RESPONDER", "First Responder"),
+    ("ADMIN", "Admin"),
+]
+
+
+def to_codes(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    User.objects.update(user_type_code=code_case("user_type", USER_TYPES, "CITIZEN"))
+
+
+def to_strings(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    User.objects.update(user_type=value_case("user_type_code", USER_TYPES))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_backfill_user_location"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="user_type_code",
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(to_codes, to_strings),
+        migrations.RemoveField(model_name="user", name="user_type"),
+        migrations.RenameField(
+            model_name="user", old_name="user_type_code", new_name="user_type"
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="user_type",
+            field=config.fields.EnumField(choices=USER_TYPES, default="CITIZEN"),
+        ),
+    ]
@@ -0,0 +1,72 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+CHUNK = 2000
+FIELDS = ["emergency_contacts", "medical_info", "notification_preferences"]
+
+
+def move_out(apps, schema_editor):
+    """Copy non-empty payloads into user_profiles"""
+    User = apps.get_model("users", "User")
+    UserProfile = apps.get_model("users", "UserProfile")
+    rows = User.objects.order_by("pk").values_list("pk", *FIELDS)
+    chunk = []
+    for pk, *values in rows.iterator(chunk_size=CHUNK):
+        if any(values):
+            chunk.append(UserProfile(pk, *values))
+        if len(chunk) == CHUNK:
+            UserProfile.objects.bulk_create(chunk)
+            chunk = []
+    UserProfile.objects.bulk_create(chunk)
+
+
+def move_back(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    UserProfile = apps.get_model("users", "UserProfile")
+    chunk = []
+    for profile in UserProfile.objects.order_by("pk").iterator(CHUNK):
+        chunk.append(
+            User(pk=profile.pk, **{name: getattr(profile, name) for name in FIELDS})
+        )
+        if len(chunk) == CHUNK:
+            User.objects.bulk_update(chunk, FIELDS)
+            chunk = []
+    User.objects.bulk_update(chunk, FIELDS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_enum_user_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserProfile",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="profile",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("emergency_contacts", models.JSONField(blank=True, default=list)),
+                ("medical_info", models.JSONField(blank=True, default=dict)),
+                (
+                    "notification_preferences",
+                    models.JSONField(blank=True, default=dict),
+                ),
+            ],
+            options={
+                "db_table": "user_profiles",
+            },
+        ),
+        migrations.RunPython(move_out, move_back),
+        migrations.RemoveField(model_name="user", name="emergency_contacts"),
+        migrations.RemoveField(model_name="user", name="medical_info"),
+        migrations.RemoveField(model_name="user", name="notification_preferences"),
+    ]
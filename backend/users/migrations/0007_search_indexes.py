@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Index expressions must match the ones config/search.py queries with
+INDEXES = {
+    "users_search_idx": (
+        "USING gin (to_tsvector('simple', coalesce(\"first_name\", '') "
+        "|| ' ' || coalesce(\"last_name\", '')))"
+    ),
+    "users_username_trgm_idx": 'USING gin ("username" gin_trgm_ops)',
+    "users_email_trgm_idx": 'USING gin ("email" gin_trgm_ops)',
+    "users_phone_trgm_idx": 'USING gin ("phone" gin_trgm_ops)',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, definition in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON users {definition}"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("users", "0006_uuid7_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
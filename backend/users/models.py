@@ -1,30 +1,41 @@
 # backend/users/models.py
-import uuid
-
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+
+from config.fields import EnumField
+from config.uuids import uuid7
 
 
 class User(AbstractUser):
     """Custom User model extending AbstractUser"""
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Stored as smallint codes (config/fields.py); append new types only
+    USER_TYPES = [
+        ("CITIZEN", "Citizen"),
+        ("PROVIDER", "Provider"),
+        ("FIRST_RESPONDER", "First Responder"),
+        ("ADMIN", "Admin"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     phone = models.CharField(max_length=20, unique=True)
-    user_type = models.CharField(max_length=20, default="CITIZEN")
+    user_type = EnumField(choices=USER_TYPES, default="CITIZEN")
 
-    # Use django.db.models.JSONField instead of django.contrib.postgres.fields.JSONField
-    emergency_contacts = models.JSONField(default=list, blank=True)
-    medical_info = models.JSONField(default=dict, blank=True)
+    # Emergency contacts, medical info and notification preferences live in
+    # UserProfile
     blood_type = models.CharField(max_length=5, blank=True)
 
     # Location tracking
     last_known_location = models.CharField(max_length=100, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    location_updated_at = models.DateTimeField(null=True, blank=True)
     is_online = models.BooleanField(default=False)
     last_active = models.DateTimeField(auto_now=True)
 
     # Notification preferences
     push_token = models.TextField(blank=True)
-    notification_preferences = models.JSONField(default=dict, blank=True)
 
     # Fix: Add custom related_name to avoid clashes
     groups = models.ManyToManyField(
@@ -46,6 +57,42 @@ class User(AbstractUser):
 
     class Meta:
         db_table = "users"
+        indexes = [
+            # Bounding-box prefilter for geofenced broadcasts (config/geo.py)
+            models.Index(fields=["latitude", "longitude"], name="users_location_idx"),
+        ]
 
     def __str__(self):
         return f"{self.email} ({self.user_type})"
+
+    def get_profile(self):
+        """The UserProfile row, or an unsaved empty one"""
+        try:
+            return self.profile
+        except UserProfile.DoesNotExist:
+            return UserProfile(user=self)
+
+    def set_location(self, latitude, longitude):
+        """Update coordinates, keeping last_known_location in step"""
+        self.latitude = latitude
+        self.longitude = longitude
+        self.last_known_location = f"{latitude},{longitude}"
+        self.location_updated_at = timezone.now()
+
+
+class UserProfile(models.Model):
+    """JSON payloads kept off the users row, which every request reads
+
+    Rows exist only for users that have set any of them.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="profile"
+    )
+    emergency_contacts = models.JSONField(default=list, blank=True)
+    medical_info = models.JSONField(default=dict, blank=True)
+    # {"emergency_created": false, ...}; a missing key means opted in
+    notification_preferences = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = "user_profiles"
@@ -0,0 +1,19 @@
+# backend/users/testing.py
+"""Helpers shared by the apps' tests"""
+
+from itertools import count
+
+from users.models import User
+
+# Unique phone numbers across every test module
+phones = count(9170000000)
+
+
+def make_user(name, **extra):
+    return User.objects.create_user(
+        username=name,
+        email=f"{name}@example.com",
+        phone=f"+63{next(phones)}",
+        password=None,
+        **extra,
+    )